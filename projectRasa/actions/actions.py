@@ -3,23 +3,117 @@
 # See this guide on how to implement these action:
 # https://rasa.com/docs/rasa/custom-actions
 
-from typing import Any, Text, Dict, List
+from typing import Any, Text, Dict, List, Optional
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-from rasa_sdk.events import SlotSet
+from rasa_sdk.events import SlotSet, FollowupAction
+import asyncio
+import atexit
 import logging
+import os
+from database.backends import backend_from_config
 from database.database import UniversityDatabase
+from database.async_database import AsyncUniversityDatabase
+from database.metrics import demarrer_serveur, mesurer_action, metriques
+from actions import reponses
+from actions.gabarits import format_du_canal
+from actions.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
-# Initialiser la base de données
-db = UniversityDatabase()
+# Base de données ouverte au premier usage ; le stockage est choisi par
+# UNIVERSITY_DB_URL ou la section catalogue_store de endpoints.yml. Les workers
+# peuvent la partager en lecture seule (UNIVERSITY_DB_READ_ONLY=1) une fois
+# les migrations passées
+db = UniversityDatabase(backend=backend_from_config(
+    read_only=os.environ.get("UNIVERSITY_DB_READ_ONLY") == "1"
+))
+# Accès non bloquant pour la boucle d'événements du serveur d'actions ; les
+# appels identiques simultanés partagent un résultat gardé
+# UNIVERSITY_DB_COALESCE_TTL secondes (0 : partage limité aux appels en cours)
+adb = AsyncUniversityDatabase(db, ttl_partage=float(os.environ.get("UNIVERSITY_DB_COALESCE_TTL", "1.0")))
+atexit.register(adb.close)
+
+# Cache des réponses qui ne dépendent que du contenu du catalogue
+response_cache = ResponseCache()
+
+def jauges_serveur():
+    """Jauges du pool de connexions, du cache de réponses et du catalogue"""
+    for cle, valeur in db.pool_stats().items():
+        yield f'university_db_pool_{cle}', "Pool de connexions au stockage", {}, valeur
+    cache = response_cache.stats()
+    for cle in ('size', 'hits', 'misses'):
+        yield f'rasa_response_cache_{cle}', "Cache des réponses rendues", {}, cache[cle]
+    consultations = cache['hits'] + cache['misses']
+    yield ('rasa_response_cache_hit_ratio', "Part des réponses servies par le cache", {},
+           cache['hits'] / consultations if consultations else 0.0)
+    yield 'university_catalogue_version', "Version du catalogue en mémoire", {}, db.catalogue_version
+
+# Endpoint Prometheus à côté du serveur d'actions (ACTION_METRICS_PORT=0 pour le désactiver)
+metriques.ajouter_collecteur(jauges_serveur)
+METRICS_PORT = int(os.environ.get("ACTION_METRICS_PORT", "5056"))
+if METRICS_PORT:
+    demarrer_serveur(METRICS_PORT)
+
+async def reponse_en_cache(cle, construire) -> Optional[Text]:
+    """Retourner la réponse rendue pour cette clé, en la construisant au besoin.
+
+    ``construire`` retourne None quand la réponse ne peut pas être construite
+    (catalogue vide ou inaccessible) : rien n'est mis en cache, la prochaine
+    demande réessaie.
+    """
+    version = db.check_for_changes()
+    response = response_cache.get(cle, version)
+    if response is None:
+        response = await construire()
+        if response is not None:
+            response_cache.put(cle, version, response)
+    return response
+
+# Score minimal pour accepter une correction orthographique sans demander confirmation
+SEUIL_RESOLUTION = 0.75
+
+# Nombre de filières affichées par page (première réponse et « la suite »)
+TAILLE_PAGE = 5
+
+def curseur_suivant(filtres: Dict[Text, Any], order_by: Text, offset: int,
+                    total: int) -> Optional[Dict[Text, Any]]:
+    """Curseur de la page suivante à mémoriser dans le slot curseur_resultats (None si tout est affiché)"""
+    if offset >= total:
+        return None
+    return {"filtres": filtres, "order_by": order_by, "offset": offset, "total": total}
+
+def format_reponse(tracker: Tracker) -> Text:
+    """Format des réponses (markdown ou texte brut) selon le canal de l'utilisateur"""
+    return format_du_canal(tracker.get_latest_input_channel())
+
+def avec_fin(dates) -> List[Dict[Text, Any]]:
+    """Dates avec le champ ``fin`` des gabarits : la date de fin quand elle diffère du début"""
+    return [{**date, 'fin': date['date_fin'] if date['date_fin'] != date['date_debut'] else None}
+            for date in dates]
+
+async def resoudre_filiere(filiere_nom: Text):
+    """Trouver une filière malgré les fautes de frappe.
+
+    Retourne (filière retenue ou None, candidats proposés). La correction
+    n'est retenue que si le meilleur candidat est sûr et sans ex-aequo.
+    """
+    details = await adb.get_filiere_details(filiere_nom)
+    if details:
+        return details, []
+
+    candidats = await adb.resolve(filiere_nom, kind="filiere", k=3)
+    if candidats and candidats[0][1] >= SEUIL_RESOLUTION:
+        if len(candidats) == 1 or candidats[1][1] < candidats[0][1]:
+            return candidats[0][0], []
+    return None, [filiere for filiere, _ in candidats]
 
 class ActionGuideOrientation(Action):
     def name(self) -> Text:
         return "action_guide_orientation"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -30,41 +124,41 @@ class ActionGuideOrientation(Action):
             dispatcher.utter_message(text="Pour mieux vous orienter, pourriez-vous me préciser votre domaine d'intérêt ? (sciences, santé, droit, technologie, commerce, etc.)")
             return []
         
-        # Rechercher les filières correspondantes
-        filieres = db.get_filieres_by_domaine(domaine_interest)
+        # Première page et total, filtrés et paginés par la base
+        filtres = {"domaine": domaine_interest}
+        filieres, total = await asyncio.gather(
+            adb.get_filieres(**filtres, limit=TAILLE_PAGE),
+            adb.count_filieres(**filtres),
+        )
         
         if not filieres:
             dispatcher.utter_message(text=f"Je n'ai pas trouvé de filières spécifiques pour le domaine '{domaine_interest}'. Voici plutôt toutes nos formations disponibles :")
-            etablissements = db.get_etablissements()
-            response = "Établissements disponibles :\n"
-            for etab in etablissements:
-                response += f"• {etab['nom']} - {etab['description']}\n"
+            etablissements = await adb.get_etablissements()
+            format = format_reponse(tracker)
+            response = (reponses.ORIENTATION_ETABLISSEMENTS.rendre(format=format)
+                        + reponses.ORIENTATION_ETABLISSEMENT.rendre_lignes(etablissements, format))
             dispatcher.utter_message(text=response)
             return []
         
         # Préparer la réponse
-        response = f"Voici les filières correspondant à vos intérêts en '{domaine_interest}':\n\n"
-        
-        for filiere in filieres[:5]:  # Limiter à 5 résultats
-            type_icon = "🎯" if filiere['type'] == 'professionnelle' else "📚"
-            response += f"{type_icon} **{filiere['nom']}** ({filiere['type']})\n"
-            response += f"   📍 {filiere['etablissement_nom']}\n"
-            response += f"   ⏱️ {filiere['duree']}\n"
-            response += f"   💰 {filiere['frais_inscription']}\n\n"
-        
-        if len(filieres) > 5:
-            response += f"Et {len(filieres) - 5} autres formations...\n"
-        
-        response += "Pour plus de détails sur une filière spécifique, dites-moi son nom !"
+        format = format_reponse(tracker)
+        response = ''.join((
+            reponses.ORIENTATION_ENTETE.rendre(format=format, domaine=domaine_interest),
+            reponses.FILIERE_LISTE.rendre_lignes(filieres, format),
+            reponses.ORIENTATION_SUITE.rendre(format=format, reste=max(total - len(filieres), 0)),
+            reponses.PIED_DETAILS.rendre(format=format),
+        ))
         
         dispatcher.utter_message(text=response)
-        return [SlotSet("domaine_interet", domaine_interest)]
+        return [SlotSet("domaine_interet", domaine_interest),
+                SlotSet("curseur_resultats", curseur_suivant(filtres, 'id', len(filieres), total))]
 
 class ActionDetailFiliere(Action):
     def name(self) -> Text:
         return "action_detail_filiere"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -74,162 +168,104 @@ class ActionDetailFiliere(Action):
             dispatcher.utter_message(text="De quelle filière souhaitez-vous connaître les détails ?")
             return []
         
-        details = db.get_filiere_details(filiere_nom)
+        details, candidats = await resoudre_filiere(filiere_nom)
         
         if not details:
             # Essayer une recherche approximative
-            similar_filieres = db.search_filieres(filiere_nom)
+            similar_filieres = candidats or await adb.search_filieres(filiere_nom, limit=3)
             if similar_filieres:
-                response = f"Je n'ai pas trouvé '{filiere_nom}' exactement. Peut-être cherchez-vous :\n"
-                for filiere in similar_filieres[:3]:
-                    response += f"• {filiere['nom']}\n"
+                format = format_reponse(tracker)
+                response = (reponses.DETAIL_PROPOSITIONS.rendre(format=format, filiere=filiere_nom)
+                            + reponses.NOM_PROPOSE.rendre_lignes(similar_filieres, format))
                 dispatcher.utter_message(text=response)
             else:
                 dispatcher.utter_message(text=f"Je n'ai pas trouvé la filière '{filiere_nom}'. Vérifiez l'orthographe ou consultez la liste complète des filières.")
             return []
         
         # Construire une réponse détaillée
-        response = f"🎓 **{details['nom']}**\n\n"
-        response += f"**Type :** {details['type'].capitalize()}\n"
-        response += f"**Durée :** {details['duree']}\n"
-        response += f"**Établissement :** {details['etablissement_nom']}\n"
-        response += f"**Frais d'inscription :** {details['frais_inscription']}\n\n"
-        
-        response += f"**Description :**\n{details['description']}\n\n"
-        
-        if details['debouches']:
-            response += f"**Débouchés :**\n{details['debouches']}\n\n"
-        
-        if details['conditions_admission']:
-            response += f"**Conditions d'admission :**\n{details['conditions_admission']}\n\n"
-        
-        if details['contact_etablissement']:
-            response += f"**Contact :** {details['contact_etablissement']}\n"
-        
-        if details['site_web_etablissement']:
-            response += f"**Site web :** {details['site_web_etablissement']}"
+        response = reponses.DETAIL_FILIERE.rendre(details, format_reponse(tracker))
         
         dispatcher.utter_message(text=response)
         return [SlotSet("filiere_choisie", details['nom'])]
 
-class ActionListeEtablissements(Action):
-    def name(self) -> Text:
-        return "action_liste_etablissements"
-
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        etablissements = db.get_etablissements()
-        
-        response = "🏛️ **Établissements de l'Université de Douala**\n\n"
-        
-        for etab in etablissements:
-            response += f"**• {etab['nom']}** ({etab['type']})\n"
-            response += f"  {etab['description']}\n"
-            if etab['contact']:
-                response += f"  📞 {etab['contact']}\n"
-            if etab['site_web']:
-                response += f"  🌐 {etab['site_web']}\n"
-            response += "\n"
-        
-        dispatcher.utter_message(text=response)
-        return []
-
 class ActionGuidePreinscription(Action):
     def name(self) -> Text:
         return "action_guide_preinscription"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        processus = db.get_processus_preinscription()
-        documents = db.get_documents_requis()
-        dates = db.get_dates_importantes()
-        
-        response = "📝 **Guide de Préinscription - Université de Douala**\n\n"
-        
-        response += "**📋 Étapes du processus :**\n"
-        for etape in processus:
-            response += f"{etape['etape']}. {etape['description']}\n"
-            if etape['details']:
-                response += f"   → {etape['details']}\n"
-        
-        response += "\n**📄 Documents requis :**\n"
-        for doc in documents:
-            obligatoire = "🔴" if doc['obligatoire'] else "🟡"
-            response += f"{obligatoire} {doc['type_document']}\n"
-        
-        response += "\n**📅 Dates importantes :**\n"
-        for date in dates:
-            response += f"• {date['evenement']} : {date['date_debut']}"
-            if date['date_fin'] and date['date_fin'] != date['date_debut']:
-                response += f" au {date['date_fin']}"
-            response += f" ({date['annee_academique']})\n"
-        
-        response += "\n**💡 Important :** Consultez régulièrement le site officiel pour les mises à jour."
-        
+        format = format_reponse(tracker)
+        response = await reponse_en_cache((self.name(), format), lambda: self.construire_reponse(format))
         dispatcher.utter_message(text=response)
         return []
 
+    async def construire_reponse(self, format: Text) -> Text:
+        processus, documents, dates = await asyncio.gather(
+            adb.get_processus_preinscription(),
+            adb.get_documents_requis(),
+            adb.get_dates_importantes(),
+        )
+        
+        return ''.join((
+            reponses.PREINSCRIPTION_ENTETE.rendre(format=format),
+            reponses.ETAPE.rendre_lignes(processus, format),
+            reponses.PREINSCRIPTION_DOCUMENTS.rendre(format=format),
+            reponses.DOCUMENT.rendre_lignes(documents, format),
+            reponses.PREINSCRIPTION_DATES.rendre(format=format),
+            reponses.DATE_ANNEE.rendre_lignes(avec_fin(dates), format),
+            reponses.PREINSCRIPTION_PIED.rendre(format=format),
+        ))
+
+async def reponse_filieres_science(type_filiere: Text, format: Text) -> Text:
+    """Filières d'un type de la Faculté des Sciences, avec l'en-tête et les avantages de ce type"""
+    filieres = await adb.get_filieres_by_type(type_filiere, "Faculté des Sciences")
+    entete, pied = reponses.FILIERES_SCIENCE[type_filiere]
+    return ''.join((
+        entete.rendre(format=format),
+        reponses.FILIERE_DESCRIPTION.rendre_lignes(filieres, format),
+        pied.rendre(format=format),
+    ))
+
 class ActionFiliereProfessionnelleScience(Action):
     def name(self) -> Text:
         return "action_filieres_professionnelles_science"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        filieres = db.get_filieres_by_type("professionnelle", "Faculté des Sciences")
-        
-        response = "🎯 **Filières Professionnelles - Faculté des Sciences**\n\n"
-        response += "Ces formations pratiques préparent directement à l'insertion professionnelle :\n\n"
-        
-        for filiere in filieres:
-            response += f"**• {filiere['nom']}**\n"
-            response += f"  Durée : {filiere['duree']}\n"
-            response += f"  Frais : {filiere['frais_inscription']}\n"
-            response += f"  {filiere['description']}\n"
-            response += f"  Débouchés : {filiere['debouches']}\n\n"
-        
-        response += "💼 **Avantages des filières professionnelles :**\n"
-        response += "• Formation pratique et concrète\n• Stages en entreprise\n• Insertion professionnelle rapide\n• Compétences directement opérationnelles"
-        
+        format = format_reponse(tracker)
+        response = await reponse_en_cache((self.name(), format), lambda: self.construire_reponse(format))
         dispatcher.utter_message(text=response)
         return []
 
+    async def construire_reponse(self, format: Text) -> Text:
+        return await reponse_filieres_science("professionnelle", format)
+
 class ActionFiliereClassiqueScience(Action):
     def name(self) -> Text:
         return "action_filieres_classiques_science"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        filieres = db.get_filieres_by_type("classique", "Faculté des Sciences")
-        
-        response = "📚 **Filières Classiques - Faculté des Sciences**\n\n"
-        response += "Formations fondamentales permettant la poursuite d'études ou la recherche :\n\n"
-        
-        for filiere in filieres:
-            response += f"**• {filiere['nom']}**\n"
-            response += f"  Durée : {filiere['duree']}\n"
-            response += f"  Frais : {filiere['frais_inscription']}\n"
-            response += f"  {filiere['description']}\n"
-            response += f"  Débouchés : {filiere['debouches']}\n\n"
-        
-        response += "🎓 **Avantages des filières classiques :**\n"
-        response += "• Formation théorique solide\n• Poursuite en master/doctorat\n• Orientation vers la recherche\n• Base large pour diverses spécialisations"
-        
+        format = format_reponse(tracker)
+        response = await reponse_en_cache((self.name(), format), lambda: self.construire_reponse(format))
         dispatcher.utter_message(text=response)
         return []
 
+    async def construire_reponse(self, format: Text) -> Text:
+        return await reponse_filieres_science("classique", format)
+
 class ActionComparerFiliere(Action):
     def name(self) -> Text:
         return "action_comparer_filieres"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -239,29 +275,28 @@ class ActionComparerFiliere(Action):
             dispatcher.utter_message(text="Quelle filière souhaitez-vous que je compare ?")
             return []
         
-        details = db.get_filiere_details(filiere_nom)
+        details, _ = await resoudre_filiere(filiere_nom)
         
         if not details:
             dispatcher.utter_message(text=f"Je n'ai pas trouvé la filière '{filiere_nom}'.")
             return []
         
-        # Trouver des filières similaires pour comparaison
-        similaires = db.search_filieres(details['nom'].split()[-1])  # Recherche par mot-clé
+        # Voisins précalculés (python -m database.similaires), sinon calculés à la volée
+        similaires = await adb.get_filieres_similaires(details['id'], limit=2)
+        if not similaires:
+            similaires = [f for f, _ in await adb.calculer_filieres_similaires(details['id'], k=2)]
         
-        if len(similaires) <= 1:
+        if not similaires:
             dispatcher.utter_message(text=f"Voici les détails de {details['nom']} :\n\n{details['description']}")
             return []
         
-        response = f"🔍 **Comparaison de filières similaires**\n\n"
-        
-        for filiere in similaires[:3]:  # Comparer avec 2 autres maximum
-            response += f"**{filiere['nom']}** ({filiere['type']})\n"
-            response += f"• Durée : {filiere['duree']}\n"
-            response += f"• Frais : {filiere['frais_inscription']}\n"
-            response += f"• Établissement : {filiere['etablissement_nom']}\n"
-            response += f"• Type : {filiere['type'].capitalize()}\n\n"
-        
-        response += "💡 **Conseil :** Les filières professionnelles sont plus pratiques, les classiques plus théoriques."
+        format = format_reponse(tracker)
+        response = ''.join((
+            reponses.COMPARAISON_ENTETE.rendre(format=format),
+            # Comparer avec 2 autres maximum
+            reponses.FILIERE_COMPARAISON.rendre_lignes([details] + similaires, format),
+            reponses.COMPARAISON_PIED.rendre(format=format),
+        ))
         
         dispatcher.utter_message(text=response)
         return []
@@ -270,7 +305,8 @@ class ActionSuggestFiliere(Action):
     def name(self) -> Text:
         return "action_suggest_filieres"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -282,76 +318,102 @@ class ActionSuggestFiliere(Action):
             dispatcher.utter_message(text="Pour vous suggérer des filières, dites-moi ce qui vous intéresse !")
             return []
         
-        # Rechercher les filières correspondantes
-        if type_prefere:
-            filieres = db.get_filieres_by_type(type_prefere)
-            # Filtrer par domaine
-            filieres = [f for f in filieres if any(domaine.lower() in f['description'].lower() or 
-                                                  domaine.lower() in f['nom'].lower() for f in [f])]
-        else:
-            filieres = db.get_filieres_by_domaine(domaine)
+        # Classer le catalogue par pertinence pour ces préférences (les filières du
+        # type préféré passent en tête, sans écarter les autres)
+        filtres = {"domaine": domaine, "type_filiere": type_prefere}
+        recommandations, total = await asyncio.gather(
+            adb.recommander_filieres(**filtres, k=3),
+            adb.count_recommandations(**filtres),
+        )
+        filieres = [filiere for filiere, _ in recommandations]
         
         if not filieres:
             dispatcher.utter_message(text=f"Je n'ai pas trouvé de filières correspondant à vos critères. Essayez d'élargir votre recherche.")
             return []
         
-        # Trier par popularité ou pertinence (ici simple tri alphabétique)
-        filieres = sorted(filieres, key=lambda x: x['nom'])[:3]
+        format = format_reponse(tracker)
+        response = ''.join((
+            reponses.SUGGESTIONS_ENTETE.rendre(format=format, domaine=domaine, type_prefere=type_prefere),
+            *(reponses.FILIERE_SUGGESTION.rendre(filiere, format, rang=i)
+              for i, filiere in enumerate(filieres, 1)),
+            reponses.SUGGESTIONS_PIED.rendre(format=format, reste=max(total - len(filieres), 0)),
+        ))
         
-        response = f"💡 **Suggestions pour vous** (basé sur : {domaine}"
-        if type_prefere:
-            response += f", {type_prefere}"
-        response += ")\n\n"
+        dispatcher.utter_message(text=response)
+        return [SlotSet("curseur_resultats", curseur_suivant(filtres, 'pertinence', len(filieres), total))]
+
+class ActionAfficherPlus(Action):
+    def name(self) -> Text:
+        return "action_afficher_plus"
+
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
-        for i, filiere in enumerate(filieres, 1):
-            response += f"{i}. **{filiere['nom']}**\n"
-            response += f"   📍 {filiere['etablissement_nom']}\n"
-            response += f"   ⏱️ {filiere['duree']} | 💰 {filiere['frais_inscription']}\n"
-            response += f"   {filiere['description'][:100]}...\n\n"
+        # Seule la page demandée est lue, à partir du curseur de la réponse précédente
+        curseur = tracker.get_slot("curseur_resultats")
+        filieres = []
+        if curseur and curseur['order_by'] == 'pertinence':
+            recommandations = await adb.recommander_filieres(**curseur['filtres'], k=TAILLE_PAGE,
+                                                             offset=curseur['offset'])
+            filieres = [filiere for filiere, _ in recommandations]
+        elif curseur:
+            filieres = await adb.get_filieres(**curseur['filtres'], order_by=curseur['order_by'],
+                                              limit=TAILLE_PAGE, offset=curseur['offset'])
         
-        response += "Dites-moi laquelle vous intéresse pour plus de détails !"
+        if not filieres:
+            dispatcher.utter_message(text="Il n'y a pas d'autres résultats à afficher. Quel domaine ou quelle filière vous intéresse ?")
+            return [SlotSet("curseur_resultats", None)]
+        
+        debut = curseur['offset'] + 1
+        fin = curseur['offset'] + len(filieres)
+        suivant = curseur_suivant(curseur['filtres'], curseur['order_by'], fin, curseur['total'])
+        format = format_reponse(tracker)
+        response = ''.join((
+            reponses.PAGE_ENTETE.rendre(format=format, debut=debut, fin=fin, total=curseur['total']),
+            reponses.FILIERE_LISTE.rendre_lignes(filieres, format),
+            reponses.PAGE_SUITE.rendre(format=format, reste=max(curseur['total'] - fin, 0)),
+            reponses.PIED_DETAILS.rendre(format=format),
+        ))
         
         dispatcher.utter_message(text=response)
-        return []
+        return [SlotSet("curseur_resultats", suivant)]
 
 class ActionInformationsPratiques(Action):
     def name(self) -> Text:
         return "action_informations_pratiques"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        dates = db.get_dates_importantes()
-        documents = [doc for doc in db.get_documents_requis() if doc['obligatoire']]
-        
-        response = "ℹ️ **Informations Pratiques - Préinscription**\n\n"
-        
-        response += "**📅 Calendrier académique 2024-2025 :**\n"
-        for date in dates:
-            response += f"• {date['evenement']} : {date['date_debut']}"
-            if date['date_fin'] and date['date_fin'] != date['date_debut']:
-                response += f" au {date['date_fin']}"
-            response += "\n"
-        
-        response += "\n**📄 Documents obligatoires :**\n"
-        for doc in documents:
-            response += f"• {doc['type_document']}\n"
-        
-        response += "\n**💻 Plateforme :** http://preinscription.univ-douala.cm"
-        response += "\n**📞 Support :** +237 233 40 20 00"
-        response += "\n**📧 Email :** preinscription@univ-douala.cm"
-        
-        response += "\n\n**⚠️ Important :** Ces informations peuvent changer, consultez toujours le site officiel."
-        
+        format = format_reponse(tracker)
+        response = await reponse_en_cache((self.name(), format), lambda: self.construire_reponse(format))
         dispatcher.utter_message(text=response)
         return []
 
+    async def construire_reponse(self, format: Text) -> Text:
+        dates, documents = await asyncio.gather(
+            adb.get_dates_importantes(),
+            adb.get_documents_requis(),
+        )
+        documents = [doc for doc in documents if doc['obligatoire']]
+        
+        return ''.join((
+            reponses.PRATIQUES_ENTETE.rendre(format=format),
+            reponses.DATE.rendre_lignes(avec_fin(dates), format),
+            reponses.PRATIQUES_DOCUMENTS.rendre(format=format),
+            reponses.DOCUMENT_OBLIGATOIRE.rendre_lignes(documents, format),
+            reponses.PRATIQUES_PIED.rendre(format=format),
+        ))
+
 class ActionFilieresEtablissement(Action):
     def name(self) -> Text:
         return "action_filieres_etablissement"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -361,47 +423,36 @@ class ActionFilieresEtablissement(Action):
             dispatcher.utter_message(text="De quel établissement souhaitez-vous connaître les filières ?")
             return []
         
-        # Chercher l'établissement
-        etablissements = db.get_etablissements()
+        # Chercher l'établissement (tolérant aux fautes et aux abréviations)
+        candidats = await adb.resolve(etablissement_nom, kind="etablissement", k=1)
         etablissement_trouve = None
         
-        for etab in etablissements:
-            if etablissement_nom.lower() in etab['nom'].lower():
-                etablissement_trouve = etab
-                break
+        if candidats and candidats[0][1] >= SEUIL_RESOLUTION:
+            etablissement_trouve = candidats[0][0]
         
         if not etablissement_trouve:
             dispatcher.utter_message(text=f"Je n'ai pas trouvé l'établissement '{etablissement_nom}'. Voici la liste des établissements disponibles :")
             return [FollowupAction("action_liste_etablissements")]
         
         # Récupérer les filières de cet établissement
-        filieres = db.get_filieres_by_etablissement(etablissement_trouve['id'])
+        filieres = await adb.get_filieres_by_etablissement(etablissement_trouve['id'])
         
         if not filieres:
             dispatcher.utter_message(text=f"L'établissement {etablissement_trouve['nom']} ne propose pas encore de filières dans notre base de données.")
             return []
         
-        response = f"🎓 **Filières de {etablissement_trouve['nom']}**\n\n"
+        format = format_reponse(tracker)
+        morceaux = [reponses.ETABLISSEMENT_ENTETE.rendre(etablissement_trouve, format)]
         
         # Séparer filières professionnelles et classiques
-        filieres_pro = [f for f in filieres if f['type'] == 'professionnelle']
-        filieres_classiques = [f for f in filieres if f['type'] == 'classique']
+        for type_filiere, titre in reponses.ETABLISSEMENT_GROUPES:
+            groupe = [f for f in filieres if f['type'] == type_filiere]
+            if groupe:
+                morceaux += [titre.rendre(format=format),
+                             reponses.FILIERE_COURTE.rendre_lignes(groupe, format), "\n"]
         
-        if filieres_pro:
-            response += "🎯 **Filières Professionnelles**\n"
-            for filiere in filieres_pro:
-                response += f"• {filiere['nom']} ({filiere['duree']}) - {filiere['frais_inscription']}\n"
-            response += "\n"
-        
-        if filieres_classiques:
-            response += "📚 **Filières Classiques**\n"
-            for filiere in filieres_classiques:
-                response += f"• {filiere['nom']} ({filiere['duree']}) - {filiere['frais_inscription']}\n"
-            response += "\n"
-        
-        response += f"💼 *Total : {len(filieres)} filière(s)*\n"
-        response += f"📞 Contact : {etablissement_trouve['contact']}\n"
-        response += f"🌐 Site : {etablissement_trouve['site_web']}"
+        morceaux.append(reponses.ETABLISSEMENT_PIED.rendre(etablissement_trouve, format, total=len(filieres)))
+        response = ''.join(morceaux)
         
         dispatcher.utter_message(text=response)
         return [SlotSet("dernier_etablissement", etablissement_trouve['nom'])]
@@ -410,36 +461,27 @@ class ActionListeEtablissements(Action):
     def name(self) -> Text:
         return "action_liste_etablissements"
 
-    def run(self, dispatcher: CollectingDispatcher,
+    @mesurer_action
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
-        
-        etablissements = db.get_etablissements()
+        format = format_reponse(tracker)
+        response = await reponse_en_cache((self.name(), format), lambda: self.construire_reponse(format))
+        if response is None:
+            response = "Je n'ai pas pu récupérer la liste des établissements pour le moment."
+        dispatcher.utter_message(text=response)
+        return []
+
+    async def construire_reponse(self, format: Text) -> Optional[Text]:
+        # Une seule requête groupée plutôt qu'une requête de filières par établissement
+        etablissements = await adb.get_etablissements_with_filiere_count()
         
         if not etablissements:
-            dispatcher.utter_message(text="Je n'ai pas pu récupérer la liste des établissements pour le moment.")
-            return []
-        
-        # Construire une réponse structurée
-        response = "🏛️ **Établissements de l'Université de Douala**\n\n"
-        
-        for etab in etablissements:
-            response += f"**• {etab['nom']}** ({etab['type']})\n"
-            response += f"  _{etab['description']}_\n"
-            
-            # Ajouter les filières pour cet établissement
-            filieres = db.get_filieres_by_etablissement(etab['id'])
-            if filieres:
-                response += f"  📚 {len(filieres)} filière(s) disponible(s)\n"
-            
-            if etab['contact']:
-                response += f"  📞 {etab['contact']}\n"
-            if etab['site_web']:
-                response += f"  🌐 {etab['site_web']}\n"
-            
-            response += "\n"
-        
-        response += "💡 *Pour voir les filières d'un établissement spécifique, dites-moi son nom !*"
-        
-        dispatcher.utter_message(text=response)
-        return []
\ No newline at end of file
+            return None
+        
+        # Construire une réponse structurée (nombre de filières, contact et site quand ils sont connus)
+        return ''.join((
+            reponses.ETABLISSEMENTS_ENTETE.rendre(format=format),
+            reponses.ETABLISSEMENT.rendre_lignes(etablissements, format),
+            reponses.ETABLISSEMENTS_PIED.rendre(format=format),
+        ))
\ No newline at end of file
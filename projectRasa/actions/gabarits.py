@@ -0,0 +1,154 @@
+"""Gabarits de réponses, compilés une fois au chargement du module.
+
+Un gabarit est un texte markdown avec des champs ``{nom}`` lus dans un
+mapping (enregistrement du catalogue, dict) :
+
+- ``{type|capitaliser}`` applique un ou plusieurs filtres de FILTRES ;
+- ``{description:.100}`` tronque la valeur à 100 caractères ;
+- ``[[ ... ]]`` délimite une section rendue seulement si tous ses champs
+  ont une valeur (ni None ni vide).
+
+À la compilation, le texte est découpé en fragments fixes et en champs, puis
+traduit en une fonction Python : chaque section devient une substitution
+``%`` sur un modèle précalculé, les champs sont lus directement (par
+attribut sur les enregistrements du catalogue, par clé sur les dicts) et
+une liste se rend dans une seule compréhension, sans appel par ligne.
+Chaque gabarit est compilé pour les deux formats de sortie : markdown, et
+texte brut (marques ``**``, ``*`` et ``_`` retirées du texte fixe, jamais
+des valeurs) pour les canaux qui n'interprètent pas le markdown.
+"""
+import os
+import re
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Text, Tuple
+
+MARKDOWN = 'markdown'
+TEXTE = 'texte'
+FORMATS = (MARKDOWN, TEXTE)
+
+# Canaux (noms de credentials.yml) dont les clients affichent le markdown tel quel
+CANAUX_TEXTE = frozenset(
+    canal.strip() for canal in os.environ.get(
+        "ACTION_PLAIN_TEXT_CHANNELS", "facebook,telegram,twilio,twilio_voice,hangouts"
+    ).split(',') if canal.strip()
+)
+
+# Filtres utilisables dans les champs : {nom|filtre|filtre}
+FILTRES: Dict[str, Callable[[Any], Any]] = {
+    'capitaliser': lambda valeur: valeur.capitalize(),
+    'icone_type': lambda valeur: "🎯" if valeur == 'professionnelle' else "📚",
+    'pastille': lambda valeur: "🔴" if valeur else "🟡",
+}
+
+SECTION = re.compile(r'\[\[(.*?)\]\]', re.DOTALL)
+MARQUES_MARKDOWN = re.compile(r'\*\*|[*_]')
+
+# Partie compilée : (modèle %, champs (clé, filtres), section conditionnelle)
+Partie = Tuple[Text, List[Tuple[Text, List[Text]]], bool]
+
+def format_du_canal(canal: Optional[Text]) -> Text:
+    """Format de sortie des réponses pour un canal d'entrée"""
+    return TEXTE if canal in CANAUX_TEXTE else MARKDOWN
+
+def _analyser(texte: Text, format: Text) -> List[Partie]:
+    """Découper un gabarit en parties (texte hors section, sections conditionnelles)"""
+    parties = []
+    for i, fragment in enumerate(SECTION.split(texte)):
+        # split alterne texte hors section (rangs pairs) et contenu des sections
+        if not fragment:
+            continue
+        morceaux, champs = [], []
+        for litteral, nom, spec, conversion in Formatter().parse(fragment):
+            if format == TEXTE:
+                litteral = MARQUES_MARKDOWN.sub('', litteral)
+            morceaux.append(litteral.replace('%', '%%'))
+            if nom is None:
+                continue
+            cle, *filtres = nom.split('|')
+            if not cle.isidentifier():
+                raise ValueError(f"Nom de champ invalide : {{{nom}}}")
+            inconnus = [f for f in filtres if f not in FILTRES]
+            if inconnus:
+                raise ValueError(f"Filtre inconnu dans {{{nom}}} : {', '.join(inconnus)}")
+            if conversion or (spec and not re.fullmatch(r'\.\d+', spec)):
+                raise ValueError(f"Format non pris en charge dans {{{nom}}} : {conversion or spec}")
+            morceaux.append(f'%{spec}s')
+            champs.append((cle, filtres))
+        parties.append((''.join(morceaux), champs, i % 2 == 1))
+    return parties
+
+def _compiler(parties: List[Partie], par_attribut: bool) -> Tuple[Callable, Callable]:
+    """Traduire les parties en deux fonctions : rendu d'une ligne ``l`` et d'une liste de lignes"""
+    espace: Dict[str, Any] = {f'_f_{nom}': filtre for nom, filtre in FILTRES.items()}
+
+    def lire(cle: Text) -> Text:
+        return f'l.{cle}' if par_attribut else f'l[{cle!r}]'
+
+    expressions = []
+    for i, (modele, champs, conditionnelle) in enumerate(parties):
+        if not champs:
+            # Texte fixe : les doubles % n'ont pas été substitués
+            espace[f'_m{i}'] = modele.replace('%%', '%')
+            expressions.append(f'_m{i}')
+            continue
+        espace[f'_m{i}'] = modele
+        valeurs = []
+        for cle, filtres in champs:
+            valeur = lire(cle)
+            for filtre in filtres:
+                valeur = f'_f_{filtre}({valeur})'
+            valeurs.append(valeur)
+        expression = f"_m{i} % ({', '.join(valeurs)},)"
+        if conditionnelle:
+            condition = ' and '.join(lire(cle) for cle in dict.fromkeys(cle for cle, _ in champs))
+            expression = f"({expression} if {condition} else '')"
+        expressions.append(expression)
+
+    corps = ' + '.join(expressions) or "''"
+    source = (f"def rendre(l):\n    return {corps}\n"
+              f"def rendre_lignes(lignes):\n    return ''.join([{corps} for l in lignes])\n")
+    exec(compile(source, '<gabarit>', 'exec'), espace)
+    return espace['rendre'], espace['rendre_lignes']
+
+class Gabarit:
+    """Gabarit de réponse compilé, rendu pour une ligne ou une liste de lignes"""
+
+    __slots__ = ('texte', 'cles', '_par_cle', '_par_attribut', '_classes')
+
+    def __init__(self, texte: Text):
+        self.texte = texte
+        self._par_cle, self._par_attribut = {}, {}
+        for format in FORMATS:
+            parties = _analyser(texte, format)
+            self._par_cle[format] = _compiler(parties, par_attribut=False)
+            self._par_attribut[format] = _compiler(parties, par_attribut=True)
+        self.cles = frozenset(cle for _, champs, _ in _analyser(texte, MARKDOWN) for cle, _ in champs)
+        # Classes d'enregistrements dont tous les champs du gabarit sont des attributs
+        self._classes: Dict[type, bool] = {}
+
+    def _rendus(self, ligne: Any, format: Text) -> Tuple[Callable, Callable]:
+        """Fonctions de rendu adaptées au type de la ligne"""
+        classe = type(ligne)
+        par_attribut = self._classes.get(classe)
+        if par_attribut is None:
+            # Les namedtuple du catalogue se lisent par attribut, bien plus vite que par clé
+            par_attribut = self._classes[classe] = self.cles <= set(getattr(classe, '_fields', ()))
+        return (self._par_attribut if par_attribut else self._par_cle)[format]
+
+    def rendre(self, valeurs: Optional[Mapping] = None, format: Text = MARKDOWN, **champs) -> Text:
+        """Rendre le gabarit avec les valeurs d'un mapping ou passées par nom"""
+        if champs:
+            valeurs = {**valeurs, **champs} if valeurs else champs
+        return self._rendus(valeurs, format)[0](valeurs)
+
+    def rendre_lignes(self, lignes: Iterable[Mapping], format: Text = MARKDOWN) -> Text:
+        """Rendre le gabarit pour chaque ligne et concaténer le tout"""
+        if not isinstance(lignes, (list, tuple)):
+            lignes = list(lignes)
+        if not lignes:
+            return ''
+        try:
+            return self._rendus(lignes[0], format)[1](lignes)
+        except AttributeError:
+            # Liste mêlant enregistrements et dicts : lecture par clé pour toutes les lignes
+            return self._par_cle[format][1](lignes)
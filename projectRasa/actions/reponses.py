@@ -0,0 +1,157 @@
+"""Gabarits des réponses des actions, compilés au démarrage du serveur d'actions.
+
+Les formats de ligne (filière, établissement, étape, ...) sont partagés
+entre les actions qui affichent les mêmes enregistrements.
+"""
+from actions.gabarits import Gabarit
+
+# Lignes réutilisées par plusieurs actions
+FILIERE_LISTE = Gabarit(
+    "{type|icone_type} **{nom}** ({type})\n"
+    "   📍 {etablissement_nom}\n"
+    "   ⏱️ {duree}\n"
+    "   💰 {frais_inscription}\n\n"
+)
+FILIERE_DESCRIPTION = Gabarit(
+    "**• {nom}**\n"
+    "  Durée : {duree}\n"
+    "  Frais : {frais_inscription}\n"
+    "  {description}\n"
+    "  Débouchés : {debouches}\n\n"
+)
+FILIERE_COURTE = Gabarit("• {nom} ({duree}) - {frais_inscription}\n")
+FILIERE_COMPARAISON = Gabarit(
+    "**{nom}** ({type})\n"
+    "• Durée : {duree}\n"
+    "• Frais : {frais_inscription}\n"
+    "• Établissement : {etablissement_nom}\n"
+    "• Type : {type|capitaliser}\n\n"
+)
+FILIERE_SUGGESTION = Gabarit(
+    "{rang}. **{nom}**\n"
+    "   📍 {etablissement_nom}\n"
+    "   ⏱️ {duree} | 💰 {frais_inscription}\n"
+    "   {description:.100}...\n\n"
+)
+NOM_PROPOSE = Gabarit("• {nom}\n")
+PIED_DETAILS = Gabarit("Pour plus de détails sur une filière spécifique, dites-moi son nom !")
+
+# action_guide_orientation
+ORIENTATION_ETABLISSEMENTS = Gabarit("Établissements disponibles :\n")
+ORIENTATION_ETABLISSEMENT = Gabarit("• {nom} - {description}\n")
+ORIENTATION_ENTETE = Gabarit("Voici les filières correspondant à vos intérêts en '{domaine}':\n\n")
+ORIENTATION_SUITE = Gabarit("[[Et {reste} autres formations... Dites « la suite » pour les voir.\n]]")
+
+# action_detail_filiere
+DETAIL_PROPOSITIONS = Gabarit("Je n'ai pas trouvé '{filiere}' exactement. Peut-être cherchez-vous :\n")
+DETAIL_FILIERE = Gabarit(
+    "🎓 **{nom}**\n\n"
+    "**Type :** {type|capitaliser}\n"
+    "**Durée :** {duree}\n"
+    "**Établissement :** {etablissement_nom}\n"
+    "**Frais d'inscription :** {frais_inscription}\n\n"
+    "**Description :**\n{description}\n\n"
+    "[[**Débouchés :**\n{debouches}\n\n]]"
+    "[[**Conditions d'admission :**\n{conditions_admission}\n\n]]"
+    "[[**Contact :** {contact_etablissement}\n]]"
+    "[[**Site web :** {site_web_etablissement}]]"
+)
+
+# action_guide_preinscription et action_informations_pratiques
+# (``fin`` : date de fin quand elle diffère de la date de début)
+PREINSCRIPTION_ENTETE = Gabarit(
+    "📝 **Guide de Préinscription - Université de Douala**\n\n"
+    "**📋 Étapes du processus :**\n"
+)
+ETAPE = Gabarit("{etape}. {description}\n[[   → {details}\n]]")
+PREINSCRIPTION_DOCUMENTS = Gabarit("\n**📄 Documents requis :**\n")
+DOCUMENT = Gabarit("{obligatoire|pastille} {type_document}\n")
+PREINSCRIPTION_DATES = Gabarit("\n**📅 Dates importantes :**\n")
+DATE_ANNEE = Gabarit("• {evenement} : {date_debut}[[ au {fin}]] ({annee_academique})\n")
+PREINSCRIPTION_PIED = Gabarit(
+    "\n**💡 Important :** Consultez régulièrement le site officiel pour les mises à jour."
+)
+
+PRATIQUES_ENTETE = Gabarit(
+    "ℹ️ **Informations Pratiques - Préinscription**\n\n"
+    "**📅 Calendrier académique 2024-2025 :**\n"
+)
+DATE = Gabarit("• {evenement} : {date_debut}[[ au {fin}]]\n")
+PRATIQUES_DOCUMENTS = Gabarit("\n**📄 Documents obligatoires :**\n")
+DOCUMENT_OBLIGATOIRE = Gabarit("• {type_document}\n")
+PRATIQUES_PIED = Gabarit(
+    "\n**💻 Plateforme :** http://preinscription.univ-douala.cm"
+    "\n**📞 Support :** +237 233 40 20 00"
+    "\n**📧 Email :** preinscription@univ-douala.cm"
+    "\n\n**⚠️ Important :** Ces informations peuvent changer, consultez toujours le site officiel."
+)
+
+# action_filieres_professionnelles_science et action_filieres_classiques_science :
+# (en-tête, pied) par type de filière
+FILIERES_SCIENCE = {
+    'professionnelle': (
+        Gabarit(
+            "🎯 **Filières Professionnelles - Faculté des Sciences**\n\n"
+            "Ces formations pratiques préparent directement à l'insertion professionnelle :\n\n"
+        ),
+        Gabarit(
+            "💼 **Avantages des filières professionnelles :**\n"
+            "• Formation pratique et concrète\n• Stages en entreprise\n"
+            "• Insertion professionnelle rapide\n• Compétences directement opérationnelles"
+        ),
+    ),
+    'classique': (
+        Gabarit(
+            "📚 **Filières Classiques - Faculté des Sciences**\n\n"
+            "Formations fondamentales permettant la poursuite d'études ou la recherche :\n\n"
+        ),
+        Gabarit(
+            "🎓 **Avantages des filières classiques :**\n"
+            "• Formation théorique solide\n• Poursuite en master/doctorat\n"
+            "• Orientation vers la recherche\n• Base large pour diverses spécialisations"
+        ),
+    ),
+}
+
+# action_comparer_filieres
+COMPARAISON_ENTETE = Gabarit("🔍 **Comparaison de filières similaires**\n\n")
+COMPARAISON_PIED = Gabarit(
+    "💡 **Conseil :** Les filières professionnelles sont plus pratiques, les classiques plus théoriques."
+)
+
+# action_suggest_filieres
+SUGGESTIONS_ENTETE = Gabarit("💡 **Suggestions pour vous** (basé sur : {domaine}[[, {type_prefere}]])\n\n")
+SUGGESTIONS_PIED = Gabarit(
+    "[[{reste} autre(s) suggestion(s) : dites « la suite » pour les voir.\n]]"
+    "Dites-moi laquelle vous intéresse pour plus de détails !"
+)
+
+# action_afficher_plus
+PAGE_ENTETE = Gabarit("Formations {debut} à {fin} sur {total} :\n\n")
+PAGE_SUITE = Gabarit("[[Il reste {reste} formation(s). Dites « la suite » pour continuer.\n]]")
+
+# action_filieres_etablissement : un groupe par type de filière
+ETABLISSEMENT_ENTETE = Gabarit("🎓 **Filières de {nom}**\n\n")
+ETABLISSEMENT_GROUPES = (
+    ('professionnelle', Gabarit("🎯 **Filières Professionnelles**\n")),
+    ('classique', Gabarit("📚 **Filières Classiques**\n")),
+)
+ETABLISSEMENT_PIED = Gabarit(
+    "💼 *Total : {total} filière(s)*\n"
+    "📞 Contact : {contact}\n"
+    "🌐 Site : {site_web}"
+)
+
+# action_liste_etablissements
+ETABLISSEMENTS_ENTETE = Gabarit("🏛️ **Établissements de l'Université de Douala**\n\n")
+ETABLISSEMENT = Gabarit(
+    "**• {nom}** ({type})\n"
+    "  _{description}_\n"
+    "[[  📚 {nb_filieres} filière(s) disponible(s)\n]]"
+    "[[  📞 {contact}\n]]"
+    "[[  🌐 {site_web}\n]]"
+    "\n"
+)
+ETABLISSEMENTS_PIED = Gabarit(
+    "💡 *Pour voir les filières d'un établissement spécifique, dites-moi son nom !*"
+)
@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Text
+
+class ResponseCache:
+    """Cache LRU des réponses déjà rendues par les actions.
+
+    Les clés sont de la forme (nom de l'action, valeurs de slots/entités
+    utilisées). Chaque entrée est valable pour une version du catalogue :
+    dès que la version change, tout le cache est vidé, puisque les réponses
+    ne dépendent que du contenu du catalogue. Les versions ne font
+    qu'augmenter : une requête commencée avant un rechargement ne peut ni
+    lire ni remplir le cache de la nouvelle version.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Text]" = OrderedDict()
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version: int) -> bool:
+        """Vider le cache si le catalogue a changé ; False pour une version dépassée"""
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        return True
+
+    def get(self, key: Hashable, version: int) -> Optional[Text]:
+        """Retourner la réponse en cache pour cette clé, ou None"""
+        with self._lock:
+            response = self._entries.get(key) if self._check_version(version) else None
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: Hashable, version: int, response: Text):
+        """Mémoriser une réponse rendue, en évinçant la moins récemment utilisée"""
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiques du cache (taille, hits, misses)"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'version': self._version,
+            }
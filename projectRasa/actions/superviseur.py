@@ -0,0 +1,275 @@
+"""Serveur d'actions multi-processus partageant un seul catalogue en mémoire.
+
+Le superviseur charge une fois le catalogue (snapshot, résolveur, index de
+recommandation), ouvre le port du endpoint /webhook puis forke N workers
+rasa_sdk qui acceptent les connexions sur ce même socket. Les workers
+héritent du catalogue en copie sur écriture : aucun ne le relit ni ne
+reconstruit ses index. ``gc.freeze()`` juste avant le fork évite que le
+ramasse-miettes des workers ne recopie ces pages ; les tableaux numpy de
+l'index de recommandation ne sont jamais écrits et restent partagés.
+
+Quand le catalogue change (version tenue à jour par triggers, relue toutes
+les ``--intervalle`` secondes) ou sur SIGHUP, le superviseur le recharge puis remplace les workers par une nouvelle
+génération : les nouveaux acceptent les connexions pendant que les anciens
+terminent leurs requêtes en cours (arrêt gracieux de Sanic sur SIGTERM).
+Un worker qui s'arrête de lui-même est relancé ; SIGTERM ou SIGINT arrête
+le superviseur et tous ses workers.
+
+Le worker de rang i expose ses métriques sur ACTION_METRICS_PORT + i
+(5056, 5057, ...).
+
+Usage (depuis projectRasa/, à la place de ``rasa run actions``) :
+    python -m actions.superviseur --workers 4
+    python -m actions.superviseur --workers 4 --port 5055 --intervalle 5
+    kill -HUP <pid du superviseur>    # forcer le rechargement du catalogue
+"""
+import argparse
+import gc
+import inspect
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Iterable
+
+from database.metrics import demarrer_serveur
+
+logger = logging.getLogger(__name__)
+
+# Un worker mort plus tôt que ce délai après son lancement est relancé avec ce délai
+DELAI_RELANCE = 1.0
+# Temps laissé aux workers pour finir leurs requêtes avant SIGKILL à l'arrêt
+DELAI_ARRET = 20.0
+
+def creer_app(package: str):
+    """Application Sanic du endpoint rasa_sdk pour un package d'actions"""
+    from rasa_sdk import endpoint
+    if 'action_executor' in inspect.signature(endpoint.create_app).parameters:
+        # Versions récentes de rasa_sdk : l'exécuteur est construit par l'appelant
+        from rasa_sdk.executor import ActionExecutor
+        executor = ActionExecutor()
+        executor.register_package(package)
+        return endpoint.create_app(executor)
+    return endpoint.create_app(package)
+
+def servir(app, sock: socket.socket):
+    """Servir l'application dans le processus courant, sur un socket déjà ouvert"""
+    options = {'sock': sock, 'access_log': False}
+    if 'single_process' in inspect.signature(app.run).parameters:
+        # Sanic >= 22.9 lancerait sinon ses propres processus
+        options['single_process'] = True
+    else:
+        options['workers'] = 1
+    app.run(**options)
+
+def _code_sortie(statut: int) -> int:
+    """Code de sortie d'un statut de waitpid (opposé du signal si tué)"""
+    return os.WEXITSTATUS(statut) if os.WIFEXITED(statut) else -os.WTERMSIG(statut)
+
+class Superviseur:
+    """Processus parent : catalogue partagé, socket d'écoute et workers forkés"""
+
+    def __init__(self, module, sock: socket.socket, nb_workers: int,
+                 port_metriques: int = 0, package: str = "actions"):
+        # Module des actions : son ``db`` est le catalogue hérité par les workers
+        self.module = module
+        self.sock = sock
+        self.nb_workers = nb_workers
+        self.port_metriques = port_metriques
+        self.package = package
+
+        self._workers: Dict[int, int] = {}   # pid -> rang, génération courante
+        self._anciens: Dict[int, int] = {}   # pid -> rang, génération en cours d'arrêt
+        self._demarrages: Dict[int, float] = {}
+        self._version = None
+        self._recharger = False
+        self._arreter = False
+
+    def charger(self):
+        """Charger le catalogue et construire ses index dans le parent"""
+        db = self.module.db
+        db.reload()
+        db.resolver
+        db.recommender
+        self._version = db.catalogue_version
+
+    def _forker(self, rangs: Iterable[int]):
+        """Lancer un worker par rang sur le catalogue actuellement chargé"""
+        db = self.module.db
+        # Pas de connexion ni de thread du stockage à travers le fork
+        db.close()
+        gc.collect()
+        gc.freeze()
+        try:
+            for rang in rangs:
+                pid = os.fork()
+                if pid == 0:
+                    self._executer_worker(rang)
+                self._workers[pid] = rang
+                self._demarrages[pid] = time.monotonic()
+        finally:
+            # Le parent doit pouvoir libérer les anciens snapshots après un rechargement
+            gc.unfreeze()
+            db.rouvrir()
+
+    def _executer_worker(self, rang: int):
+        """Corps d'un worker ; ne retourne jamais"""
+        code = 1
+        try:
+            # Sanic installe ses propres gestionnaires pour SIGINT et SIGTERM
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+            db = self.module.db
+            db.rouvrir()
+            # Le catalogue hérité reste celui du worker : le superviseur remplace
+            # les workers quand il change au lieu que chacun le recharge
+            db.snapshot_check_interval = math.inf
+            if self.port_metriques:
+                threading.Thread(
+                    target=demarrer_serveur, args=(self.port_metriques + rang,),
+                    kwargs={'attente': DELAI_ARRET}, name="metrics-demarrage", daemon=True,
+                ).start()
+
+            logger.info("Worker %d démarré (pid %d)", rang, os.getpid())
+            servir(creer_app(self.package), self.sock)
+            code = 0
+        except Exception:
+            logger.exception("Worker %d arrêté sur une erreur", rang)
+        finally:
+            os._exit(code)
+
+    def recharger(self):
+        """Recharger le catalogue puis remplacer les workers sans interrompre le service"""
+        try:
+            self.charger()
+        except Exception:
+            logger.exception("Rechargement du catalogue impossible, les workers actuels sont conservés")
+            return
+
+        anciens, self._workers = self._workers, {}
+        self._forker(range(self.nb_workers))
+        for pid, rang in anciens.items():
+            self._anciens[pid] = rang
+            self._signaler(pid, signal.SIGTERM)
+        logger.info("Catalogue version %d : %d workers remplacés",
+                    self._version, len(anciens))
+
+    def _signaler(self, pid: int, signum: int):
+        """Envoyer un signal à un worker qui a pu déjà se terminer"""
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _recuperer(self):
+        """Récupérer les workers terminés et relancer ceux de la génération courante"""
+        while True:
+            try:
+                pid, statut = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            demarrage = self._demarrages.pop(pid, 0.0)
+            if self._anciens.pop(pid, None) is not None:
+                continue
+            rang = self._workers.pop(pid, None)
+            if rang is None or self._arreter:
+                continue
+            logger.warning("Worker %d (pid %d) arrêté avec le code %d, relance",
+                           rang, pid, _code_sortie(statut))
+            if time.monotonic() - demarrage < DELAI_RELANCE:
+                time.sleep(DELAI_RELANCE)
+            self._forker([rang])
+
+    def _sur_sighup(self, signum, frame):
+        self._recharger = True
+
+    def _sur_arret(self, signum, frame):
+        self._arreter = True
+
+    def executer(self, intervalle: float = 2.0) -> int:
+        """Lancer les workers puis surveiller le catalogue jusqu'à l'arrêt"""
+        signal.signal(signal.SIGHUP, self._sur_sighup)
+        signal.signal(signal.SIGTERM, self._sur_arret)
+        signal.signal(signal.SIGINT, self._sur_arret)
+
+        self.charger()
+        self._forker(range(self.nb_workers))
+        logger.info("Superviseur (pid %d) : %d workers sur le port %d",
+                    os.getpid(), self.nb_workers, self.sock.getsockname()[1])
+
+        db = self.module.db
+        verifie_le = time.monotonic()
+        while not self._arreter:
+            time.sleep(0.2)
+            self._recuperer()
+            if self._arreter:
+                break
+            # Le rechargement se fait ici, au premier plan : les workers ne sont
+            # remplacés qu'une fois le nouveau catalogue et ses index construits
+            if not self._recharger and time.monotonic() - verifie_le >= intervalle:
+                verifie_le = time.monotonic()
+                self._recharger = db.modifications_en_attente()
+            if self._recharger:
+                self._recharger = False
+                self.recharger()
+        return self.arreter()
+
+    def arreter(self) -> int:
+        """Arrêter tous les workers en leur laissant finir leurs requêtes"""
+        restants = {**self._workers, **self._anciens}
+        for pid in restants:
+            self._signaler(pid, signal.SIGTERM)
+
+        limite = time.monotonic() + DELAI_ARRET
+        while restants and time.monotonic() < limite:
+            for pid in list(restants):
+                try:
+                    termine, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    termine = pid
+                if termine:
+                    del restants[pid]
+            time.sleep(0.1)
+        for pid in restants:
+            logger.warning("Worker pid %d toujours actif après %.0fs, arrêt forcé", pid, DELAI_ARRET)
+            self._signaler(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+        self._workers.clear()
+        self._anciens.clear()
+        self.sock.close()
+        self.module.db.close()
+        return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serveur d'actions multi-processus à catalogue partagé")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--hote", default=os.environ.get("SANIC_HOST", "0.0.0.0"))
+    parser.add_argument("--intervalle", type=float, default=2.0,
+                        help="secondes entre deux vérifications de la signature du catalogue")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s [%(process)d] %(name)s %(levelname)s %(message)s")
+
+    # Le parent ne sert pas de métriques : chaque worker ouvre son propre port.
+    # La variable doit être fixée avant l'import du module des actions
+    port_metriques = int(os.environ.get("ACTION_METRICS_PORT", "5056"))
+    os.environ["ACTION_METRICS_PORT"] = "0"
+    import actions.actions as module
+
+    # Le superviseur vérifie lui-même la version, sans rechargement en arrière-plan
+    module.db.snapshot_check_interval = math.inf
+    sock = socket.create_server((args.hote, args.port), backlog=100)
+    return Superviseur(module, sock, max(1, args.workers), port_metriques).executer(args.intervalle)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Génération d'un catalogue synthétique pour les benchmarks.
+
+Usage :
+    python -m benchmarks.catalogue bench.db --filieres 10000 --etablissements 200
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from database import migrations
+
+DISCIPLINES = [
+    "Mathématiques", "Physique", "Chimie", "Informatique", "Électronique",
+    "Génie Civil", "Biologie", "Géologie", "Droit Privé", "Droit Public",
+    "Économie", "Gestion", "Comptabilité", "Marketing", "Médecine",
+    "Pharmacie", "Lettres Modernes", "Histoire", "Géographie", "Sociologie",
+    "Réseaux et Télécommunications", "Génie Électrique", "Génie Mécanique",
+    "Agronomie", "Sciences de l'Éducation", "Journalisme", "Langues Étrangères",
+]
+
+NIVEAUX = [
+    ("Licence en", "classique", "3 ans"),
+    ("Licence Professionnelle en", "professionnelle", "3 ans"),
+    ("Master en", "classique", "2 ans"),
+    ("Master Professionnel en", "professionnelle", "2 ans"),
+    ("DUT en", "professionnelle", "2 ans"),
+    ("BTS en", "professionnelle", "2 ans"),
+]
+
+TYPES_ETABLISSEMENT = ["faculte", "institut", "ecole"]
+
+def inserer(cursor, table: str, colonnes: tuple, lignes: list):
+    """Insérer des lignes, nom_normalise compris (aucun trigger ne le calcule)"""
+    colonnes, lignes = migrations.avec_nom_normalise(table, colonnes, lignes)
+    cursor.executemany(f"INSERT INTO {table} ({', '.join(colonnes)}) "
+                       f"VALUES ({', '.join('?' * len(colonnes))})", lignes)
+
+def generer_catalogue(db_path: str, nb_filieres: int = 10000, nb_etablissements: int = 200,
+                      seed: int = 42) -> dict:
+    """Créer (ou compléter) une base SQLite jusqu'aux volumes demandés.
+
+    La base est d'abord migrée avec les données d'exemple, puis complétée
+    par des établissements et filières synthétiques. La génération est
+    déterministe pour une graine donnée. Retourne les volumes finaux.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        migrations.migrate(conn)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) FROM etablissements")
+        existants = cursor.fetchone()[0]
+        inserer(cursor, 'etablissements', ('nom', 'type', 'description', 'contact', 'site_web'), [
+            (f"Établissement {i}", rng.choice(TYPES_ETABLISSEMENT),
+             f"Établissement synthétique numéro {i}", f"+237 233 {i:06d}",
+             f"http://etab{i}.univ-douala.cm")
+            for i in range(existants + 1, nb_etablissements + 1)
+        ])
+
+        cursor.execute("SELECT id FROM etablissements")
+        etablissement_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM domaines_interet")
+        domaine_ids = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute("SELECT COUNT(*) FROM filieres")
+        existantes = cursor.fetchone()[0]
+        lignes = []
+        for i in range(existantes + 1, nb_filieres + 1):
+            prefixe, type_filiere, duree = rng.choice(NIVEAUX)
+            discipline = rng.choice(DISCIPLINES)
+            lignes.append((
+                f"{prefixe} {discipline} {i}", type_filiere, duree,
+                f"Formation en {discipline.lower()} ({type_filiere})",
+                f"Débouchés en {discipline.lower()}, recherche et entreprise",
+                "Baccalauréat toutes séries",
+                rng.choice(etablissement_ids),
+                f"{rng.choice((45, 50, 60, 75, 100))},000 FCFA",
+            ))
+        inserer(cursor, 'filieres', ('nom', 'type', 'duree', 'description', 'debouches',
+                                     'conditions_admission', 'etablissement_id', 'frais_inscription'), lignes)
+
+        # Chaque nouvelle filière est rattachée à un à trois domaines
+        cursor.execute("SELECT id FROM filieres WHERE id NOT IN (SELECT filiere_id FROM filiere_domaines)")
+        liaisons = [
+            (filiere_id, domaine_id)
+            for (filiere_id,) in cursor.fetchall()
+            for domaine_id in rng.sample(domaine_ids, k=min(len(domaine_ids), rng.randint(1, 3)))
+        ]
+        cursor.executemany(
+            "INSERT OR IGNORE INTO filiere_domaines (filiere_id, domaine_id) VALUES (?, ?)", liaisons
+        )
+        conn.commit()
+
+        volumes = {}
+        for table in ('etablissements', 'filieres', 'filiere_domaines'):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            volumes[table] = cursor.fetchone()[0]
+        return volumes
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Générer un catalogue synthétique")
+    parser.add_argument("db_path")
+    parser.add_argument("--filieres", type=int, default=10000)
+    parser.add_argument("--etablissements", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    volumes = generer_catalogue(args.db_path, args.filieres, args.etablissements, args.seed)
+    print(f"{args.db_path} : {volumes} en {time.perf_counter() - debut:.1f}s")
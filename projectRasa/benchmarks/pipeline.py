@@ -0,0 +1,221 @@
+"""Comparaison des profils du pipeline NLU : latence, taille du modèle et F1.
+
+Entraîne un modèle NLU par fichier de configuration (``rasa train nlu``),
+le charge en processus et analyse les exemples de test de tests/ (blocs
+``nlu`` et messages utilisateur des stories) : latence par message p50/p95,
+taille de l'archive du modèle, F1 des intents (pondéré par le nombre
+d'exemples de chaque intent) et F1 des entités (type et texte repéré).
+Le profil retenu est le plus rapide dont les deux F1 restent à
+``--tolerance`` des meilleurs.
+
+Usage (depuis projectRasa/) :
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline config.yml config.fast.yml --repetitions 20 --json profils.json
+    python -m benchmarks.pipeline config.fast.yml --modeles /tmp/profils --tolerance 0.01
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ruamel.yaml import YAML
+
+from benchmarks.run import percentile, preparer_base
+from database.catalogue import normaliser
+
+# Entité attendue ou prédite : (type, texte normalisé)
+Entite = Tuple[str, str]
+
+def _lire_yaml(path: Path) -> Any:
+    return YAML(typ='safe').load(path.read_text(encoding='utf-8')) or {}
+
+def _fichiers_yaml(chemin: str) -> List[Path]:
+    path = Path(chemin)
+    if path.is_file():
+        return [path]
+    return sorted(f for motif in ("*.yml", "*.yaml") for f in path.rglob(motif))
+
+def exemples_test(chemin: str) -> List[Tuple[str, str, Set[Entite]]]:
+    """Exemples annotés des fichiers de test : (texte, intent, entités)"""
+    from rasa.shared.nlu.training_data.entities_parser import parse_training_example
+
+    annotes: List[Tuple[str, str]] = []
+    for fichier in _fichiers_yaml(chemin):
+        contenu = _lire_yaml(fichier)
+        for bloc in contenu.get('nlu') or ():
+            if 'intent' in bloc:
+                annotes += [(ligne.strip()[2:].strip(), bloc['intent'])
+                            for ligne in str(bloc.get('examples') or '').splitlines()
+                            if ligne.strip().startswith('- ')]
+        for histoire in (contenu.get('stories') or []) + (contenu.get('rules') or []):
+            annotes += [(str(etape['user']).strip(), etape['intent'])
+                        for etape in histoire.get('steps') or () if 'user' in etape and 'intent' in etape]
+
+    exemples = []
+    for annote, intent in annotes:
+        message = parse_training_example(annote, intent)
+        texte = message.get('text')
+        entites = {(e['entity'], normaliser(texte[e['start']:e['end']])) for e in message.get('entities') or ()}
+        exemples.append((texte, intent, entites))
+    return exemples
+
+def intents_entrainement(donnees: str) -> Set[str]:
+    """Intents des données d'entraînement"""
+    return {bloc['intent'] for fichier in _fichiers_yaml(donnees)
+            for bloc in _lire_yaml(fichier).get('nlu') or () if 'intent' in bloc}
+
+def composants(config: str) -> List[str]:
+    """Noms des composants du pipeline d'une configuration"""
+    return [composant['name'] for composant in _lire_yaml(Path(config)).get('pipeline') or ()]
+
+def entrainer(config: str, donnees: str, sortie: str) -> Tuple[str, float]:
+    """Entraîner le modèle NLU d'une configuration : (chemin de l'archive, durée)"""
+    nom = Path(config).name.replace('.yml', '').replace('.yaml', '')
+    commande = [sys.executable, "-m", "rasa", "train", "nlu", "--config", config, "--nlu", donnees,
+                "--out", sortie, "--fixed-model-name", nom]
+    print(" ".join(commande[2:]), flush=True)
+    debut = time.monotonic()
+    subprocess.run(commande, check=True)
+    return os.path.join(sortie, f"{nom}.tar.gz"), time.monotonic() - debut
+
+async def analyser(modele: str, exemples: List[Tuple[str, str, Set[Entite]]],
+                   repetitions: int) -> Tuple[List[Tuple[str, Set[Entite]]], List[float]]:
+    """Prédictions du modèle pour chaque exemple et latences de chaque analyse"""
+    from rasa.core.agent import Agent
+
+    agent = Agent.load(modele)
+    # La première analyse initialise les graphes TensorFlow : elle n'est pas mesurée
+    await agent.parse_message("bonjour")
+
+    predictions, durees = [], []
+    for texte, _, _ in exemples:
+        for _ in range(max(repetitions, 1)):
+            debut = time.perf_counter()
+            resultat = await agent.parse_message(texte)
+            durees.append(time.perf_counter() - debut)
+        entites = {(e['entity'], normaliser(texte[e['start']:e['end']])) for e in resultat.get('entities') or ()}
+        predictions.append(((resultat.get('intent') or {}).get('name'), entites))
+    return predictions, durees
+
+def f1_intents(attendus: List[str], predits: List[Optional[str]]) -> float:
+    """F1 des intents, moyenne des F1 par intent pondérée par leur nombre d'exemples"""
+    total = 0.0
+    for intent in set(attendus):
+        vrais = sum(1 for a, p in zip(attendus, predits) if a == p == intent)
+        nb_predits = sum(1 for p in predits if p == intent)
+        nb_attendus = sum(1 for a in attendus if a == intent)
+        if vrais:
+            precision, rappel = vrais / nb_predits, vrais / nb_attendus
+            total += nb_attendus * 2 * precision * rappel / (precision + rappel)
+    return total / len(attendus) if attendus else 0.0
+
+def f1_entites(attendues: List[Set[Entite]], predites: List[Set[Entite]]) -> Optional[float]:
+    """F1 global des entités (type et texte) ; None s'il n'y a aucune entité"""
+    vrais = sum(len(a & p) for a, p in zip(attendues, predites))
+    nb_attendues = sum(len(a) for a in attendues)
+    nb_predites = sum(len(p) for p in predites)
+    if not nb_attendues and not nb_predites:
+        return None
+    return 2 * vrais / (nb_attendues + nb_predites)
+
+def evaluer(config: str, modele: str, duree_entrainement: float,
+            exemples: List[Tuple[str, str, Set[Entite]]], repetitions: int) -> Dict[str, Any]:
+    """Mesures d'un profil"""
+    predictions, durees = asyncio.run(analyser(modele, exemples, repetitions))
+    return {
+        'config': config,
+        'modele': modele,
+        'taille_mio': os.path.getsize(modele) / 1024 / 1024,
+        'entrainement_s': duree_entrainement,
+        'p50_ms': percentile(durees, 50) * 1000,
+        'p95_ms': percentile(durees, 95) * 1000,
+        'f1_intents': f1_intents([e[1] for e in exemples], [p[0] for p in predictions]),
+        'f1_entites': f1_entites([e[2] for e in exemples], [p[1] for p in predictions]),
+    }
+
+def choisir(resultats: List[Dict[str, Any]], tolerance: float) -> Dict[str, Any]:
+    """Profil le plus rapide dont les F1 restent à ``tolerance`` des meilleurs"""
+    def f1(r, cle):
+        return r[cle] if r[cle] is not None else 1.0
+
+    meilleurs = {cle: max(f1(r, cle) for r in resultats) for cle in ('f1_intents', 'f1_entites')}
+    retenus = [r for r in resultats
+               if all(f1(r, cle) >= meilleur - tolerance for cle, meilleur in meilleurs.items())]
+    return min(retenus, key=lambda r: (r['p50_ms'], r['taille_mio']))
+
+def afficher(resultats: List[Dict[str, Any]]):
+    """Afficher le tableau des profils"""
+    print(f"{'profil':24} {'Mio':>7} {'entr. s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'F1 intents':>10} {'F1 entités':>10}")
+    for r in resultats:
+        entites = '-' if r['f1_entites'] is None else f"{r['f1_entites']:.3f}"
+        print(f"{r['config']:24} {r['taille_mio']:>7.1f} {r['entrainement_s']:>8.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p95_ms']:>8.2f} {r['f1_intents']:>10.3f} {entites:>10}")
+
+def comparer_profils(args: argparse.Namespace, sortie: str) -> int:
+    """Entraîner, mesurer et comparer les profils, modèles écrits dans sortie"""
+    intents = intents_entrainement(args.nlu)
+    tous = exemples_test(args.tests)
+    # Les intents inconnus des données (stories de test d'un autre assistant) ne sont pas évalués
+    exemples = [e for e in tous if e[1] in intents]
+    print(f"{len(exemples)} exemples de test"
+          + (f" ({len(tous) - len(exemples)} ignorés : intents absents de {args.nlu})"
+             if len(exemples) < len(tous) else ""))
+    if not exemples:
+        print(f"Aucun exemple de test dans {args.tests}", file=sys.stderr)
+        return 1
+
+    recuperation = sorted(i for i in intents if '/' in i)
+    resultats = []
+    for config in args.configs:
+        if recuperation and 'ResponseSelector' not in composants(config):
+            print(f"{config} : pas de ResponseSelector pour les intents de récupération "
+                  f"{', '.join(recuperation)}", file=sys.stderr)
+        modele, duree = entrainer(config, args.nlu, sortie)
+        resultats.append(evaluer(config, modele, duree, exemples, args.repetitions))
+
+    afficher(resultats)
+    retenu = choisir(resultats, args.tolerance)
+    reference = resultats[0]
+    message = f"Profil retenu : {retenu['config']}"
+    if retenu is not reference:
+        message += (f" (p50 {reference['p50_ms'] / retenu['p50_ms']:.1f}x plus rapide, modèle "
+                    f"{reference['taille_mio'] / retenu['taille_mio']:.1f}x plus petit que {reference['config']})")
+    print(message)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'exemples': len(exemples), 'tolerance': args.tolerance, 'retenu': retenu['config'],
+                       'profils': resultats}, f, indent=2)
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Comparer les profils du pipeline NLU")
+    parser.add_argument("configs", nargs='*', default=["config.yml", "config.fast.yml"],
+                        help="fichiers de configuration comparés")
+    parser.add_argument("--nlu", default="data", help="données d'entraînement")
+    parser.add_argument("--tests", default="tests", help="exemples annotés de test")
+    parser.add_argument("--db", help="base SQLite du catalogue (par défaut une copie temporaire)")
+    parser.add_argument("--modeles", help="répertoire des modèles entraînés (par défaut temporaire, "
+                                          "supprimé à la fin)")
+    parser.add_argument("--repetitions", type=int, default=10, help="analyses de chaque exemple")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="perte de F1 acceptée")
+    parser.add_argument("--json", help="enregistrer les résultats dans ce fichier")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as pile:
+        # Le composant des entités du catalogue lit la base à l'entraînement et au chargement
+        db_path = pile.enter_context(preparer_base(args.db, 0, 0))
+        os.environ["UNIVERSITY_DB_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+        sortie = args.modeles or pile.enter_context(tempfile.TemporaryDirectory(prefix="profils-"))
+        return comparer_profils(args, sortie)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Vérification des plans de requête du backend SQLite.
+
+Génère un catalogue synthétique volumineux, exécute chaque méthode ``get_*``
+(et la recherche) de SQLiteBackend, relève le SQL réellement envoyé et
+passe chaque instruction dans ``EXPLAIN QUERY PLAN``. Le script échoue si
+une table du catalogue est parcourue en entier (``SCAN``) alors que la
+méthode ne renvoie pas toute la table : un index manquant ou inutilisé
+apparaît ici bien avant d'être visible en production.
+
+Usage (depuis projectRasa/) :
+    python -m benchmarks.plans
+    python -m benchmarks.plans --filieres 100000 --verbose
+    python -m benchmarks.plans --db /tmp/bench.db
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from typing import Dict, List, Set, Tuple
+
+from benchmarks.catalogue import generer_catalogue
+from database import migrations
+from database.backends.base import TABLES_CATALOGUE
+from database.backends.sqlite import SQLiteBackend
+
+# (méthode, arguments) : chaque lecture du backend, par les chemins indexés
+# (nom exact, plein texte) comme par les filtres par sous-chaîne
+APPELS: List[Tuple[str, tuple]] = [
+    ('get_etablissements', ()),
+    ('get_etablissements_with_filiere_count', ()),
+    ('get_filieres_by_etablissement', (1,)),
+    ('get_filieres_by_etablissements', ([1, 2, 3],)),
+    ('get_filiere_details', ('Médecine',)),
+    ('get_filiere_details', ('genie civil',)),
+    ('get_filiere_details', ('zzz',)),
+    ('get_filieres_by_domaine', ('Sciences',)),
+    ('get_filieres_by_type', ('professionnelle',)),
+    ('get_filieres_by_type', ('classique', 'Faculté')),
+    ('get_filieres', ('Sciences', None, None, None, 'nom', 5)),
+    ('get_filieres', (None, 'professionnelle', None, 'informatique', 'nom', 3)),
+    ('get_filieres', (None, None, 'Faculté', None, 'id', 20, 0, 500)),
+    ('count_filieres', ('Sciences',)),
+    ('count_filieres', (None, 'classique', 'Faculté')),
+    ('get_filieres_similaires', (1,)),
+    ('get_filieres_similaires', (42, 3)),
+    ('get_processus_preinscription', ()),
+    ('get_documents_requis', ()),
+    ('get_dates_importantes', ()),
+    ('search_filiere_ids', ('informatique', 10)),
+    ('search_filieres', ('informatique', 10)),
+    ('get_etablissements_by_domaine', ('Sciences',)),
+]
+
+# Tables renvoyées en entier par la méthode : les parcourir est attendu
+TABLES_RENVOYEES: Dict[str, Set[str]] = {
+    'get_etablissements': {'etablissements'},
+    'get_etablissements_with_filiere_count': {'etablissements'},
+    'get_processus_preinscription': {'processus_preinscription'},
+    'get_documents_requis': {'documents_requis'},
+    'get_dates_importantes': {'dates_importantes'},
+}
+
+# Tables de référence de quelques lignes, filtrées par sous-chaîne (LIKE
+# '%...%', qu'aucun index ne sert) : leur parcours ne dépend pas du catalogue
+PETITES_TABLES = {'domaines_interet'}
+
+TABLES = {table for table, _ in TABLES_CATALOGUE.values()}
+
+MOTS_CLES = {'on', 'where', 'join', 'cross', 'left', 'inner', 'order', 'group', 'limit'}
+
+def alias_des_tables(sql: str) -> Dict[str, str]:
+    """Associer chaque alias (ou nom) utilisé dans le SQL à sa table"""
+    alias = {}
+    for table, nom in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        alias[table] = table
+        if nom and nom.lower() not in MOTS_CLES:
+            alias[nom] = table
+    return alias
+
+def parcours_complets(conn: sqlite3.Connection, sql: str) -> Tuple[List[str], List[str]]:
+    """Plan d'une instruction et tables du catalogue qu'elle parcourt en entier"""
+    alias = alias_des_tables(sql)
+    plan, parcourues = [], []
+    for _, _, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}"):
+        plan.append(detail)
+        correspondance = re.match(r'SCAN (\w+)', detail)
+        # Les tables virtuelles (FTS5) sont interrogées par leur propre index
+        if correspondance and 'VIRTUAL TABLE' not in detail:
+            table = alias.get(correspondance.group(1), correspondance.group(1))
+            if table in TABLES:
+                parcourues.append(table)
+    return plan, parcourues
+
+def verifier_plans(db_path: str, verbose: bool = False) -> List[str]:
+    """Exécuter chaque appel et retourner les parcours complets injustifiés"""
+    backend = SQLiteBackend(db_path, pool_size=1, read_only=True)
+    instructions: List[str] = []
+    # Une seule connexion dans le pool : toutes les requêtes passent par le traceur
+    with backend.pool.connection() as conn:
+        conn.set_trace_callback(instructions.append)
+
+    explication = sqlite3.connect(db_path)
+    migrations.enregistrer_fonctions(explication)
+    problemes = []
+    try:
+        for methode, args in APPELS:
+            instructions.clear()
+            getattr(backend, methode)(*args)
+            autorisees = TABLES_RENVOYEES.get(methode, set()) | PETITES_TABLES
+            # Les instructions internes de FTS5 arrivent préfixées par « -- »
+            for sql in [s for s in instructions if s.lstrip().upper().startswith('SELECT')]:
+                plan, parcourues = parcours_complets(explication, sql)
+                if verbose:
+                    print(f"{methode}{args}")
+                    for detail in plan:
+                        print(f"    {detail}")
+                for table in parcourues:
+                    if table not in autorisees:
+                        problemes.append(
+                            f"{methode}{args} : parcours complet de {table}\n"
+                            f"    {' '.join(sql.split())}\n"
+                            + '\n'.join(f"    -> {detail}" for detail in plan)
+                        )
+    finally:
+        explication.close()
+        backend.close()
+    return problemes
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vérifier les plans de requête sur un gros catalogue")
+    parser.add_argument("--db", help="base SQLite à vérifier (par défaut un catalogue généré)")
+    parser.add_argument("--filieres", type=int, default=100000)
+    parser.add_argument("--etablissements", type=int, default=500)
+    parser.add_argument("--verbose", action="store_true", help="afficher le plan de chaque requête")
+    args = parser.parse_args(argv)
+
+    # Le catalogue généré (plusieurs dizaines de Mo) est supprimé après la vérification
+    with tempfile.TemporaryDirectory(prefix="plans-") as repertoire:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(repertoire, "catalogue.db")
+            volumes = generer_catalogue(db_path, args.filieres, args.etablissements)
+            print(f"Catalogue : {volumes}")
+        problemes = verifier_plans(db_path, args.verbose)
+
+    for probleme in problemes:
+        print(probleme)
+    print(f"{len(APPELS)} appels : {len(problemes)} parcours complet(s) injustifié(s)")
+    return 1 if problemes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
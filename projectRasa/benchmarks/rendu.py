@@ -0,0 +1,93 @@
+"""Banc de mesure du rendu des réponses sur de longues listes.
+
+Rend toutes les filières (et tous les établissements) du catalogue avec
+les gabarits compilés de actions/reponses.py, dans les deux formats, et
+avec la construction par ``response += f"..."`` qu'ils remplacent, pour
+comparer le temps de rendu d'une liste entière.
+
+Exemples (depuis projectRasa/) :
+    python -m benchmarks.rendu --db /tmp/bench.db
+    python -m benchmarks.rendu --db /tmp/bench.db --lignes 1000 --repetitions 50
+"""
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from actions import reponses
+from actions.gabarits import FORMATS
+from benchmarks.run import preparer_base
+from database.backends import create_backend
+from database.catalogue import CatalogueSnapshot
+
+def concatener_filieres(filieres) -> str:
+    """Liste de filières construite ligne à ligne, comme avant les gabarits"""
+    response = ""
+    for filiere in filieres:
+        type_icon = "🎯" if filiere['type'] == 'professionnelle' else "📚"
+        response += f"{type_icon} **{filiere['nom']}** ({filiere['type']})\n"
+        response += f"   📍 {filiere['etablissement_nom']}\n"
+        response += f"   ⏱️ {filiere['duree']}\n"
+        response += f"   💰 {filiere['frais_inscription']}\n\n"
+    return response
+
+def concatener_etablissements(etablissements) -> str:
+    """Liste d'établissements construite ligne à ligne, comme avant les gabarits"""
+    response = ""
+    for etab in etablissements:
+        response += f"**• {etab['nom']}** ({etab['type']})\n"
+        response += f"  _{etab['description']}_\n"
+        if etab['nb_filieres']:
+            response += f"  📚 {etab['nb_filieres']} filière(s) disponible(s)\n"
+        if etab['contact']:
+            response += f"  📞 {etab['contact']}\n"
+        if etab['site_web']:
+            response += f"  🌐 {etab['site_web']}\n"
+        response += "\n"
+    return response
+
+def mesurer(rendre: Callable[[], str], repetitions: int) -> Tuple[float, str]:
+    """Meilleur temps de rendu sur ``repetitions`` essais (s) et dernier texte rendu"""
+    meilleur, texte = float('inf'), ''
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        texte = rendre()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, texte
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mesurer le rendu des longues listes de réponses")
+    parser.add_argument("--db", help="base SQLite du catalogue (par défaut une copie temporaire)")
+    parser.add_argument("--lignes", type=int, default=0, help="nombre de filières rendues (0 : toutes)")
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with preparer_base(args.db, 0, 0) as db_path:
+        backend = create_backend(f"sqlite:///{db_path}")
+        try:
+            snapshot = CatalogueSnapshot(**backend.load_tables())
+            filieres = snapshot.get_filieres(limit=args.lignes or None)
+            etablissements = snapshot.get_etablissements_with_filiere_count()
+        finally:
+            backend.close()
+
+    listes: Dict[str, Tuple[List, Callable, object]] = {
+        'filières': (filieres, concatener_filieres, reponses.FILIERE_LISTE),
+        'établissements': (etablissements, concatener_etablissements, reponses.ETABLISSEMENT),
+    }
+    print(f"{'liste':16} {'lignes':>7} {'rendu':>20} {'ms':>9} {'µs/ligne':>9} {'gain':>6}")
+    for nom, (lignes, concatener, gabarit) in listes.items():
+        reference, attendu = mesurer(lambda: concatener(lignes), args.repetitions)
+        print(f"{nom:16} {len(lignes):>7} {'concaténation':>20} {reference * 1000:>9.2f} "
+              f"{reference / max(len(lignes), 1) * 1e6:>9.2f} {'':>6}")
+        for format in FORMATS:
+            duree, texte = mesurer(lambda: gabarit.rendre_lignes(lignes, format), args.repetitions)
+            if format == FORMATS[0] and texte != attendu:
+                print(f"Rendu différent de la concaténation pour {nom}", file=sys.stderr)
+                return 1
+            print(f"{nom:16} {len(lignes):>7} {'gabarit ' + format:>20} {duree * 1000:>9.2f} "
+                  f"{duree / max(len(lignes), 1) * 1e6:>9.2f} {reference / duree:>5.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
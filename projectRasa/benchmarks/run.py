@@ -0,0 +1,263 @@
+"""Banc de mesure des actions du serveur d'actions.
+
+Exécute chaque action de actions/actions.py avec des trackers synthétiques,
+soit en processus (CollectingDispatcher), soit en HTTP contre le endpoint
+/webhook d'un serveur d'actions déjà démarré, et rapporte par action les
+latences p50/p95/p99, le débit et la mémoire allouée.
+
+Exemples (depuis projectRasa/) :
+    python -m benchmarks.run --filieres 10000 --etablissements 200
+    python -m benchmarks.run --json base.json
+    python -m benchmarks.run --compare base.json --tolerance 0.2
+
+    python -m benchmarks.catalogue /tmp/bench.db --filieres 10000
+    UNIVERSITY_DB_URL=sqlite:////tmp/bench.db rasa run actions
+    UNIVERSITY_DB_URL=sqlite:////tmp/bench.db python -m actions.superviseur --workers 4
+    python -m benchmarks.run --mode http --url http://localhost:5055/webhook
+    python -m benchmarks.rendu --db /tmp/bench.db    # rendu des longues listes
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# (action, entités, slots) : au moins un scénario par action, avec des noms
+# exacts, mal orthographiés et inconnus pour passer par tous les chemins
+SCENARIOS: List[Tuple[str, List[Tuple[str, str]], Dict[str, Any]]] = [
+    ("action_guide_orientation", [("domaine", "Sciences")], {}),
+    ("action_guide_orientation", [("domaine", "zzz")], {}),
+    ("action_detail_filiere", [("filiere", "Médecine")], {}),
+    ("action_detail_filiere", [("filiere", "informatque")], {}),
+    ("action_detail_filiere", [("filiere", "genie sivil")], {}),
+    ("action_liste_etablissements", [], {}),
+    ("action_guide_preinscription", [], {}),
+    ("action_filieres_professionnelles_science", [], {}),
+    ("action_filieres_classiques_science", [], {}),
+    ("action_comparer_filieres", [("filiere", "Licence en Physique")], {}),
+    ("action_suggest_filieres", [], {"domaine_interet": "Sciences", "type_filiere_prefere": None}),
+    ("action_suggest_filieres", [], {"domaine_interet": "informatique",
+                                     "type_filiere_prefere": "professionnelle"}),
+    ("action_afficher_plus", [], {"curseur_resultats": {"filtres": {"domaine": "Sciences"},
+                                                        "order_by": "id", "offset": 5, "total": 8}}),
+    ("action_afficher_plus", [], {"curseur_resultats": {"filtres": {"domaine": "informatique",
+                                                                    "type_filiere": "professionnelle"},
+                                                        "order_by": "pertinence", "offset": 3, "total": 8}}),
+    ("action_afficher_plus", [], {"curseur_resultats": None}),
+    ("action_informations_pratiques", [], {}),
+    ("action_filieres_etablissement", [("etablissement", "IUT")], {}),
+    ("action_filieres_etablissement", [("etablissement", "zzz")], {}),
+]
+
+def tracker_json(entities: List[Tuple[str, str]], slots: Dict[str, Any]) -> Dict[str, Any]:
+    """État de tracker tel que Rasa l'envoie au serveur d'actions"""
+    return {
+        "sender_id": "benchmark",
+        "slots": dict(slots),
+        "latest_message": {
+            "intent": {"name": "benchmark", "confidence": 1.0},
+            "entities": [{"entity": e, "value": v} for e, v in entities],
+            "text": " ".join(v for _, v in entities) or "benchmark",
+        },
+        "events": [],
+        "paused": False,
+        "followup_action": None,
+        "active_loop": {},
+        "latest_action_name": "action_listen",
+    }
+
+def percentile(valeurs: List[float], p: float) -> float:
+    """Percentile par rang le plus proche d'une liste de mesures"""
+    triees = sorted(valeurs)
+    rang = max(0, min(len(triees) - 1, round(p / 100 * len(triees) + 0.5) - 1))
+    return triees[rang]
+
+def resumer(durees: Dict[str, List[float]], allocations: Dict[str, Tuple[float, float]]) -> Dict[str, Dict]:
+    """Statistiques par action : latences en ms, débit en exécutions/s, mémoire en Kio"""
+    resultats = {}
+    for action, mesures in sorted(durees.items()):
+        pic, retenu = allocations.get(action, (None, None))
+        resultats[action] = {
+            'n': len(mesures),
+            'p50_ms': percentile(mesures, 50) * 1000,
+            'p95_ms': percentile(mesures, 95) * 1000,
+            'p99_ms': percentile(mesures, 99) * 1000,
+            'debit': len(mesures) / sum(mesures) if sum(mesures) else 0.0,
+            'alloc_pic_kio': pic,
+            'alloc_retenue_kio': retenu,
+        }
+    return resultats
+
+async def mesurer_en_processus(iterations: int, concurrence: int, sans_cache: bool,
+                               allocations: bool) -> Tuple[Dict, Dict, float]:
+    """Exécuter les scénarios en processus ; retourne durées, allocations et durée totale"""
+    from rasa_sdk import Action, Tracker
+    from rasa_sdk.executor import CollectingDispatcher
+    import actions.actions as module
+
+    # Une instance par nom d'action déclaré dans le module
+    instances = {}
+    for objet in vars(module).values():
+        if isinstance(objet, type) and issubclass(objet, Action) and objet.__module__ == module.__name__:
+            instance = objet()
+            instances[instance.name()] = instance
+    manquantes = set(instances) - {nom for nom, _, _ in SCENARIOS}
+    if manquantes:
+        print(f"Actions sans scénario : {', '.join(sorted(manquantes))}", file=sys.stderr)
+
+    async def executer(nom, entities, slots) -> float:
+        if sans_cache:
+            module.response_cache.clear()
+        tracker = Tracker.from_dict(tracker_json(entities, slots))
+        debut = time.perf_counter()
+        await instances[nom].run(CollectingDispatcher(), tracker, {})
+        return time.perf_counter() - debut
+
+    # Tour de chauffe : chargement du snapshot, du résolveur, premières requêtes
+    for scenario in SCENARIOS:
+        await executer(*scenario)
+
+    durees: Dict[str, List[float]] = {}
+    debut = time.perf_counter()
+    for _ in range(iterations):
+        for i in range(0, len(SCENARIOS), concurrence):
+            lot = SCENARIOS[i:i + concurrence]
+            for (nom, _, _), duree in zip(lot, await asyncio.gather(*(executer(*s) for s in lot))):
+                durees.setdefault(nom, []).append(duree)
+    total = time.perf_counter() - debut
+
+    memoire: Dict[str, Tuple[float, float]] = {}
+    if allocations:
+        # Passe séparée : tracemalloc ralentit fortement les exécutions
+        tracemalloc.start()
+        try:
+            for nom, entities, slots in SCENARIOS:
+                avant, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await executer(nom, entities, slots)
+                apres, pic = tracemalloc.get_traced_memory()
+                ancien = memoire.get(nom, (0.0, 0.0))
+                memoire[nom] = (max(ancien[0], (pic - avant) / 1024), max(ancien[1], (apres - avant) / 1024))
+        finally:
+            tracemalloc.stop()
+    return durees, memoire, total
+
+def mesurer_http(url: str, iterations: int, concurrence: int) -> Tuple[Dict, Dict, float]:
+    """Exécuter les scénarios contre le endpoint /webhook d'un serveur d'actions"""
+    def appeler(scenario) -> Tuple[str, float]:
+        nom, entities, slots = scenario
+        corps = json.dumps({
+            "next_action": nom,
+            "sender_id": "benchmark",
+            "tracker": tracker_json(entities, slots),
+            "domain": {},
+            "version": "3.6.15",
+        }).encode('utf-8')
+        requete = urllib.request.Request(url, data=corps, headers={"Content-Type": "application/json"})
+        debut = time.perf_counter()
+        with urllib.request.urlopen(requete, timeout=30) as reponse:
+            reponse.read()
+        return nom, time.perf_counter() - debut
+
+    with ThreadPoolExecutor(max_workers=concurrence) as executor:
+        list(executor.map(appeler, SCENARIOS))
+
+        durees: Dict[str, List[float]] = {}
+        debut = time.perf_counter()
+        for nom, duree in executor.map(appeler, SCENARIOS * iterations):
+            durees.setdefault(nom, []).append(duree)
+        total = time.perf_counter() - debut
+    return durees, {}, total
+
+@contextlib.contextmanager
+def preparer_base(db_path: Optional[str], nb_filieres: int, nb_etablissements: int) -> Iterator[str]:
+    """Choisir la base mesurée, sans jamais écrire dans university_douala.db.
+
+    Sans ``db_path``, la base est créée dans un répertoire temporaire
+    supprimé à la sortie du bloc ``with``.
+    """
+    with contextlib.ExitStack() as pile:
+        if db_path is None:
+            repertoire = pile.enter_context(tempfile.TemporaryDirectory(prefix="benchmark-"))
+            db_path = os.path.join(repertoire, "catalogue.db")
+            if not nb_filieres:
+                shutil.copy("university_douala.db", db_path)
+        if nb_filieres:
+            from benchmarks.catalogue import generer_catalogue
+            volumes = generer_catalogue(db_path, nb_filieres, nb_etablissements)
+            print(f"Catalogue : {volumes}")
+        yield db_path
+
+def afficher(resultats: Dict[str, Dict], total: float):
+    """Afficher le tableau des résultats"""
+    print(f"{'action':42} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'exec/s':>9} {'pic Kio':>9} {'retenu Kio':>10}")
+    for action, r in resultats.items():
+        pic = '-' if r['alloc_pic_kio'] is None else f"{r['alloc_pic_kio']:.1f}"
+        retenu = '-' if r['alloc_retenue_kio'] is None else f"{r['alloc_retenue_kio']:.1f}"
+        print(f"{action:42} {r['n']:>6} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['debit']:>9.0f} {pic:>9} {retenu:>10}")
+    nb = sum(r['n'] for r in resultats.values())
+    print(f"Total : {nb} exécutions en {total:.2f}s ({nb / total:.0f} exec/s)")
+
+def comparer(resultats: Dict[str, Dict], reference_path: str, tolerance: float) -> List[str]:
+    """Actions dont le p95 dépasse celui de la référence de plus de ``tolerance``"""
+    with open(reference_path, encoding='utf-8') as f:
+        reference = json.load(f)['actions']
+    regressions = []
+    for action, r in resultats.items():
+        base = reference.get(action)
+        if base and r['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{action} : p95 {base['p95_ms']:.3f} ms -> {r['p95_ms']:.3f} ms")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mesurer les actions du serveur d'actions")
+    parser.add_argument("--mode", choices=("processus", "http"), default="processus")
+    parser.add_argument("--url", default="http://localhost:5055/webhook")
+    parser.add_argument("--db", help="base SQLite mesurée (par défaut une copie temporaire)")
+    parser.add_argument("--filieres", type=int, default=0, help="taille du catalogue synthétique")
+    parser.add_argument("--etablissements", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrence", type=int, default=1)
+    parser.add_argument("--sans-cache", action="store_true", help="vider le cache de réponses à chaque exécution")
+    parser.add_argument("--sans-allocations", action="store_true")
+    parser.add_argument("--json", help="enregistrer les résultats dans ce fichier")
+    parser.add_argument("--compare", help="résultats de référence (--json d'une exécution précédente)")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.mode == "http":
+        durees, memoire, total = mesurer_http(args.url, args.iterations, args.concurrence)
+    else:
+        # La base doit être choisie avant l'import du module des actions
+        with preparer_base(args.db, args.filieres, args.etablissements) as db_path:
+            os.environ["UNIVERSITY_DB_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+            durees, memoire, total = asyncio.run(mesurer_en_processus(
+                args.iterations, args.concurrence, args.sans_cache, not args.sans_allocations
+            ))
+
+    resultats = resumer(durees, memoire)
+    afficher(resultats, total)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'mode': args.mode, 'filieres': args.filieres, 'actions': resultats}, f, indent=2)
+
+    if args.compare:
+        regressions = comparer(resultats, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"Régression : {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Extraction des entités filiere, domaine et etablissement depuis le catalogue.
+
+Le composant se place dans le pipeline après DIETClassifier. Il repère
+dans chaque message les noms du catalogue et leurs variantes (celles de
+database.lookups) avec un automate d'Aho-Corasick sur les mots : un seul
+passage sur le texte, quel que soit le nombre de noms. Une forme propre à
+un enregistrement est renvoyée avec le nom exact du catalogue pour valeur ;
+une forme partagée (« Informatique ») garde le texte du message, que les
+actions résolvent ensuite. Une entité de ces types déjà extraite par DIET
+qui chevauche un nom repéré est retirée : chaque passage du message n'est
+renvoyé qu'une fois, DIET ne complète que les noms mal orthographiés.
+
+Les noms sont lus dans le catalogue au chargement du modèle, puis relus en
+arrière-plan quand sa version change : une filière ajoutée est reconnue
+sans réentraîner le modèle. Les lookup tables des données d'entraînement
+(et leurs synonymes) complètent le catalogue et le remplacent s'il est
+inaccessible.
+
+Dans config.yml :
+    - name: components.entites_catalogue.CatalogueEntityExtractor
+      entites: [etablissement, domaine, filiere]
+      intervalle: 30
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import rasa.shared.utils.io
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.extractors.extractor import EntityExtractorMixin
+from rasa.shared.nlu.constants import (
+    ENTITIES, ENTITY_ATTRIBUTE_END, ENTITY_ATTRIBUTE_START, ENTITY_ATTRIBUTE_TYPE,
+    ENTITY_ATTRIBUTE_VALUE, TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+from database.automate import AutomateMots, cle
+from database.backends import backend_from_config
+from database.lookups import Forme, formes_catalogue
+
+logger = logging.getLogger(__name__)
+
+FICHIER_FORMES = "formes.json"
+
+@DefaultV1Recipe.register([DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR], is_trainable=True)
+class CatalogueEntityExtractor(GraphComponent, EntityExtractorMixin):
+    """Repère les noms du catalogue dans les messages avec un automate d'Aho-Corasick"""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            # Entités repérées, par priorité quand une forme en désigne plusieurs
+            "entites": ["etablissement", "domaine", "filiere"],
+            # Lire les noms dans le catalogue ; sinon, les lookup tables seules
+            "catalogue": True,
+            # Secondes entre deux vérifications de la version du catalogue (0 : jamais)
+            "intervalle": 30.0,
+        }
+
+    def __init__(self, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+                 formes_entrainement: Optional[List[Forme]] = None):
+        self._config = config
+        self._model_storage = model_storage
+        self._resource = resource
+        self._formes_entrainement = [tuple(forme) for forme in formes_entrainement or ()]
+
+        self._backend = None
+        self._signature = None
+        self._verifie_le = time.monotonic()
+        self._rechargement: Optional[threading.Thread] = None
+        self._automate = self._construire(self._formes_entrainement)
+
+    @classmethod
+    def create(cls, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+               execution_context: ExecutionContext) -> "CatalogueEntityExtractor":
+        return cls(config, model_storage, resource)
+
+    @classmethod
+    def load(cls, config: Dict[Text, Any], model_storage: ModelStorage, resource: Resource,
+             execution_context: ExecutionContext, **kwargs: Any) -> "CatalogueEntityExtractor":
+        try:
+            with model_storage.read_from(resource) as directory:
+                formes = rasa.shared.utils.io.read_json_file(directory / FICHIER_FORMES)
+        except ValueError:
+            formes = []
+        extracteur = cls(config, model_storage, resource, formes)
+        if config["catalogue"]:
+            extracteur._recharger()
+        return extracteur
+
+    def train(self, training_data: TrainingData) -> Resource:
+        """Conserver les formes des lookup tables et leurs synonymes pour le chargement du modèle"""
+        entites = set(self._config["entites"])
+        formes = []
+        for table in training_data.lookup_tables:
+            # Les tables lues dans un fichier externe (chemin) ne sont pas reprises
+            if table["name"] not in entites or not isinstance(table["elements"], list):
+                continue
+            for element in table["elements"]:
+                valeur = training_data.entity_synonyms.get(element.lower())
+                formes.append((table["name"], element, valeur))
+
+        with self._model_storage.write_to(self._resource) as directory:
+            rasa.shared.utils.io.dump_obj_as_json_to_file(directory / FICHIER_FORMES, formes)
+        self._formes_entrainement = formes
+        return self._resource
+
+    def _construire(self, formes: List[Forme]) -> AutomateMots:
+        """Automate des formes : chaque écriture garde l'entité prioritaire et la première valeur vue"""
+        priorite = {entite: rang for rang, entite in enumerate(self._config["entites"])}
+        retenues: Dict[Tuple[str, ...], Tuple[str, Optional[str]]] = {}
+        for entite, forme, valeur in formes:
+            if entite not in priorite:
+                continue
+            motif = cle(forme)
+            actuelle = retenues.get(motif)
+            if actuelle is None or priorite[entite] < priorite[actuelle[0]]:
+                retenues[motif] = (entite, valeur)
+        return AutomateMots(retenues.items())
+
+    def _recharger(self):
+        """Reconstruire l'automate depuis le catalogue si sa version a changé"""
+        try:
+            if self._backend is None:
+                self._backend = backend_from_config(read_only=os.environ.get("UNIVERSITY_DB_READ_ONLY") == "1")
+            signature = self._backend.signature(fraiche=True)
+            if signature == self._signature:
+                return
+            formes = formes_catalogue(self._backend.load_tables())
+        except Exception:
+            logger.warning("Catalogue inaccessible, entités repérées d'après les lookup tables seules",
+                           exc_info=True)
+            return
+        # Le catalogue passe avant les lookup tables pour une même écriture
+        self._automate = self._construire(formes + self._formes_entrainement)
+        self._signature = signature
+        logger.info("Catalogue version %s : %d formes repérées", signature, len(self._automate))
+
+    def _verifier_catalogue(self):
+        """Relancer en arrière-plan la lecture du catalogue, au plus une fois par intervalle"""
+        intervalle = self._config["intervalle"]
+        if not self._config["catalogue"] or not intervalle:
+            return
+        if time.monotonic() - self._verifie_le < intervalle:
+            return
+        if self._rechargement is not None and self._rechargement.is_alive():
+            return
+        self._verifie_le = time.monotonic()
+        self._rechargement = threading.Thread(
+            target=self._recharger, name="catalogue-entites", daemon=True
+        )
+        self._rechargement.start()
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        """Ajouter aux messages les noms du catalogue, à la place des entités de DIET qui les chevauchent"""
+        self._verifier_catalogue()
+        automate = self._automate
+        types = set(self._config["entites"])
+        for message in messages:
+            entites = [
+                {
+                    ENTITY_ATTRIBUTE_TYPE: entite,
+                    ENTITY_ATTRIBUTE_START: debut,
+                    ENTITY_ATTRIBUTE_END: fin,
+                    ENTITY_ATTRIBUTE_VALUE: valeur or extrait,
+                }
+                for debut, fin, extrait, (entite, valeur) in automate.trouver(message.get(TEXT))
+            ]
+            if entites:
+                autres = [
+                    e for e in message.get(ENTITIES, [])
+                    if e.get(ENTITY_ATTRIBUTE_TYPE) not in types
+                    or not any(e.get(ENTITY_ATTRIBUTE_START, -1) < f[ENTITY_ATTRIBUTE_END]
+                               and f[ENTITY_ATTRIBUTE_START] < e.get(ENTITY_ATTRIBUTE_END, -1)
+                               for f in entites)
+                ]
+                message.set(ENTITIES, autres + self.add_extractor_name(entites), add_to_output=True)
+        return messages
@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from database.database import UniversityDatabase
+from database.metrics import metriques
+
+class AsyncUniversityDatabase:
+    """Façade asynchrone de UniversityDatabase.
+
+    Les méthodes coroutines reprennent l'API de UniversityDatabase et
+    exécutent les appels bloquants (sqlite3, rechargement du snapshot) dans
+    un pool de threads dédié, pour ne jamais bloquer la boucle d'événements
+    du serveur d'actions. Le pool de threads a la taille du pool de
+    connexions : un thread n'attend jamais une connexion.
+
+    Les appels identiques (même méthode, mêmes arguments) sont regroupés :
+    tant qu'un appel est en cours, puis pendant ``ttl_partage`` secondes
+    après sa fin, les suivants reçoivent le même résultat au lieu de
+    solliciter la base. Un pic de N tours identiques coûte ainsi une
+    requête, quel que soit N. Le résultat partagé ne doit pas être modifié.
+    """
+
+    def __init__(self, db: UniversityDatabase, max_workers: Optional[int] = None,
+                 ttl_partage: float = 1.0):
+        self.db = db
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or db.backend.pool_size,
+            thread_name_prefix="university-db",
+        )
+
+        # (méthode, arguments) -> (version du catalogue, échéance, future) ;
+        # échéance infinie tant que l'appel est en cours. Manipulé uniquement
+        # depuis la boucle d'événements
+        self.ttl_partage = ttl_partage
+        self._partages: Dict[tuple, tuple] = {}
+        self._prochain_nettoyage = 0.0
+
+    async def _run(self, func, *args, **kwargs):
+        """Exécuter un appel bloquant dans le pool de threads dédié"""
+        loop = asyncio.get_running_loop()
+        # Le contexte (action en cours pour les métriques) suit l'appel dans le thread
+        contexte = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(contexte.run, func, *args, **kwargs)
+        )
+
+    async def _partager(self, func, *args):
+        """Exécuter un appel de lecture, ou attendre le résultat d'un appel identique en cours ou récent"""
+        loop = asyncio.get_running_loop()
+        cle = (func.__name__, args)
+        version = self.db.catalogue_version
+        maintenant = time.monotonic()
+
+        entree = self._partages.get(cle)
+        if entree is not None:
+            version_entree, echeance, future = entree
+            if version_entree == version and maintenant < echeance and future.get_loop() is loop:
+                metriques.incrementer('university_db_coalesced_total',
+                                      "Appels servis par un appel identique en cours ou récent",
+                                      {'method': func.__name__,
+                                       'state': 'recent' if future.done() else 'in_flight'})
+                # shield : un appelant annulé n'annule pas l'appel des autres
+                return await asyncio.shield(future)
+
+        if maintenant >= self._prochain_nettoyage:
+            self._nettoyer(maintenant)
+        future = asyncio.ensure_future(self._run(func, *args))
+        self._partages[cle] = (version, float('inf'), future)
+
+        def terminer(future):
+            if self._partages.get(cle, (None, None, None))[2] is not future:
+                return
+            if future.cancelled() or future.exception() is not None or self.ttl_partage <= 0:
+                # Les erreurs ne sont pas partagées au-delà des appels déjà en attente
+                del self._partages[cle]
+            else:
+                self._partages[cle] = (version, time.monotonic() + self.ttl_partage, future)
+
+        future.add_done_callback(terminer)
+        return await asyncio.shield(future)
+
+    def _nettoyer(self, maintenant: float):
+        """Oublier les résultats dont le délai de partage est écoulé"""
+        for cle in [cle for cle, (_, echeance, _) in self._partages.items() if echeance <= maintenant]:
+            del self._partages[cle]
+        self._prochain_nettoyage = maintenant + max(self.ttl_partage, 1.0)
+
+    async def get_filieres_by_etablissement(self, etablissement_id: int) -> List[Dict]:
+        """Récupérer les filières d'un établissement"""
+        return await self._partager(self.db.get_filieres_by_etablissement, etablissement_id)
+
+    async def get_filieres_by_etablissements(self, etablissement_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Récupérer en une seule requête les filières de plusieurs établissements"""
+        return await self._partager(self.db.get_filieres_by_etablissements, tuple(etablissement_ids))
+
+    async def get_etablissements_with_filiere_count(self) -> List[Dict]:
+        """Récupérer les établissements avec leur nombre de filières"""
+        return await self._partager(self.db.get_etablissements_with_filiere_count)
+
+    async def get_filiere_details(self, filiere_nom: str) -> Optional[Dict]:
+        """Récupérer les détails d'une filière spécifique"""
+        return await self._partager(self.db.get_filiere_details, filiere_nom)
+
+    async def get_filieres_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les filières par domaine d'intérêt"""
+        return await self._partager(self.db.get_filieres_by_domaine, domaine)
+
+    async def get_filieres_by_type(self, type_filiere: str, etablissement: str = None) -> List[Dict]:
+        """Récupérer les filières par type (professionnelle/classique)"""
+        return await self._partager(self.db.get_filieres_by_type, type_filiere, etablissement)
+
+    async def get_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                           contient: str = None, order_by: str = 'id', limit: Optional[int] = None,
+                           offset: int = 0) -> List[Dict]:
+        """Récupérer une page de filières filtrées et triées"""
+        return await self._partager(self.db.get_filieres, domaine, type_filiere, etablissement, contient,
+                                     order_by, limit, offset)
+
+    async def count_filieres(self, domaine: str = None, type_filiere: str = None,
+                             etablissement: str = None, contient: str = None) -> int:
+        """Nombre de filières correspondant aux filtres de get_filieres"""
+        return await self._partager(self.db.count_filieres, domaine, type_filiere, etablissement, contient)
+
+    async def get_filieres_similaires(self, filiere_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Récupérer les filières les plus proches d'une filière (table précalculée)"""
+        return await self._partager(self.db.get_filieres_similaires, filiere_id, limit)
+
+    async def get_etablissements(self) -> List[Dict]:
+        """Récupérer tous les établissements"""
+        return await self._partager(self.db.get_etablissements)
+
+    async def get_processus_preinscription(self) -> List[Dict]:
+        """Récupérer le processus de préinscription"""
+        return await self._partager(self.db.get_processus_preinscription)
+
+    async def get_documents_requis(self) -> List[Dict]:
+        """Récupérer la liste des documents requis"""
+        return await self._partager(self.db.get_documents_requis)
+
+    async def get_dates_importantes(self) -> List[Dict]:
+        """Récupérer les dates importantes"""
+        return await self._partager(self.db.get_dates_importantes)
+
+    async def search_filieres(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Rechercher des filières par nom ou description"""
+        return await self._partager(self.db.search_filieres, query, limit)
+
+    async def get_etablissements_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les établissements par domaine d'intérêt"""
+        return await self._partager(self.db.get_etablissements_by_domaine, domaine)
+
+    async def resolve(self, texte: str, kind: Optional[str] = None, k: int = 3,
+                      min_score: float = 0.3) -> List[tuple]:
+        """Trouver les enregistrements les plus proches d'un nom mal orthographié"""
+        return await self._partager(self.db.resolve, texte, kind, k, min_score)
+
+    async def recommander_filieres(self, domaine: str = None, type_filiere: str = None, texte: str = None,
+                                   k: int = 3, offset: int = 0) -> List[tuple]:
+        """Recommander les filières les plus pertinentes pour les préférences de l'utilisateur"""
+        return await self._partager(self.db.recommander_filieres, domaine, type_filiere, texte, k, offset)
+
+    async def count_recommandations(self, domaine: str = None, type_filiere: str = None,
+                                    texte: str = None) -> int:
+        """Compter les filières pertinentes pour les préférences de l'utilisateur"""
+        return await self._partager(self.db.count_recommandations, domaine, type_filiere, texte)
+
+    async def calculer_filieres_similaires(self, filiere_id: int, k: int = 3) -> List[tuple]:
+        """Filières les plus proches d'une filière, calculées à la volée"""
+        return await self._partager(self.db.calculer_filieres_similaires, filiere_id, k)
+
+    def close(self):
+        """Attendre la fin des requêtes en cours puis fermer la base"""
+        self.executor.shutdown(wait=True)
+        self.db.close()
@@ -0,0 +1,116 @@
+"""Automate d'Aho-Corasick sur les mots, pour repérer des noms du catalogue dans un texte.
+
+Les motifs sont des suites de mots normalisés (minuscules, sans accents) et
+l'alphabet de l'automate est l'ensemble de ces mots : le nombre d'états est
+celui des préfixes distincts des noms, et un texte est parcouru une seule
+fois, mot par mot, quel que soit le nombre de motifs. Les correspondances
+tombent toujours sur des frontières de mots.
+"""
+import functools
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from database.catalogue import normaliser
+
+# Lettres, chiffres et accents combinants d'un texte décomposé
+MOT = re.compile(r'[\w\u0300-\u036f]+')
+
+@functools.lru_cache(maxsize=65536)
+def _normaliser_mot(mot: str) -> str:
+    """Normaliser un mot accentué ; le vocabulaire des messages est restreint"""
+    return normaliser(mot)
+
+def mots(texte: Optional[str]) -> List[Tuple[str, int, int]]:
+    """Mots normalisés d'un texte, avec leurs positions (début, fin) dans le texte d'origine"""
+    if not texte:
+        return []
+    resultat = []
+    for m in MOT.finditer(texte):
+        mot = m.group()
+        # Un mot ASCII n'a pas d'accents : la mise en minuscules suffit
+        resultat.append((mot.lower() if mot.isascii() else _normaliser_mot(mot), m.start(), m.end()))
+    return resultat
+
+def cle(texte: str) -> Tuple[str, ...]:
+    """Suite de mots normalisés sous laquelle un motif est indexé"""
+    return tuple(mot for mot, _, _ in mots(texte))
+
+class AutomateMots:
+    """Automate d'Aho-Corasick dont les transitions sont étiquetées par des mots.
+
+    Chaque motif (suite de mots) porte une valeur. ``trouver`` renvoie, pour
+    un texte, les occurrences les plus longues qui ne se chevauchent pas, de
+    gauche à droite.
+    """
+
+    def __init__(self, motifs: Iterable[Tuple[Sequence[str], Any]]):
+        self._transitions: List[Dict[str, int]] = [{}]
+        # Motif se terminant dans l'état : (nombre de mots, valeur)
+        self._sorties: List[Optional[Tuple[int, Any]]] = [None]
+        self._nb_motifs = 0
+
+        for motif, valeur in motifs:
+            if not motif:
+                continue
+            etat = 0
+            for mot in motif:
+                suivant = self._transitions[etat].get(mot)
+                if suivant is None:
+                    suivant = self._transitions[etat][mot] = len(self._transitions)
+                    self._transitions.append({})
+                    self._sorties.append(None)
+                etat = suivant
+            if self._sorties[etat] is None:
+                self._nb_motifs += 1
+            self._sorties[etat] = (len(motif), valeur)
+
+        # Liens d'échec et liens vers le plus proche suffixe qui est un motif,
+        # calculés en largeur d'abord depuis la racine
+        self._echecs = [0] * len(self._transitions)
+        self._suffixes = [0] * len(self._transitions)
+        file = deque(self._transitions[0].values())
+        while file:
+            etat = file.popleft()
+            for mot, suivant in self._transitions[etat].items():
+                repli = self._echecs[etat]
+                while repli and mot not in self._transitions[repli]:
+                    repli = self._echecs[repli]
+                echec = self._echecs[suivant] = self._transitions[repli].get(mot, 0)
+                self._suffixes[suivant] = echec if self._sorties[echec] else self._suffixes[echec]
+                file.append(suivant)
+
+    def __len__(self) -> int:
+        return self._nb_motifs
+
+    def occurrences(self, suite: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """Toutes les occurrences de motifs dans une suite de mots : (premier mot, fin exclue, valeur)"""
+        transitions, echecs, sorties, suffixes = self._transitions, self._echecs, self._sorties, self._suffixes
+        resultat = []
+        etat = 0
+        for position, mot in enumerate(suite):
+            while etat and mot not in transitions[etat]:
+                etat = echecs[etat]
+            etat = transitions[etat].get(mot, 0)
+            sortie = etat if sorties[etat] else suffixes[etat]
+            while sortie:
+                longueur, valeur = sorties[sortie]
+                resultat.append((position + 1 - longueur, position + 1, valeur))
+                sortie = suffixes[sortie]
+        return resultat
+
+    def trouver(self, texte: Optional[str]) -> List[Tuple[int, int, str, Any]]:
+        """Occurrences les plus longues et sans chevauchement dans un texte : (début, fin, extrait, valeur)"""
+        suite = mots(texte)
+        occurrences = self.occurrences([mot for mot, _, _ in suite])
+        occurrences.sort(key=lambda o: (o[0], o[0] - o[1]))
+
+        resultat = []
+        libre = 0
+        for premier, fin, valeur in occurrences:
+            if premier < libre:
+                continue
+            debut, arret = suite[premier][1], suite[fin - 1][2]
+            resultat.append((debut, arret, texte[debut:arret], valeur))
+            libre = fin
+        return resultat
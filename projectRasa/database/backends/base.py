@@ -0,0 +1,183 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from database.records import (
+    DateImportante, Document, Domaine, Etablissement, Etape, Filiere, LiaisonDomaine, Record,
+    Similarite,
+)
+
+# Tables chargées dans le snapshot du catalogue : nom d'argument -> (table, enregistrement)
+TABLES_CATALOGUE = {
+    'etablissements': ('etablissements', Etablissement),
+    'filieres': ('filieres', Filiere),
+    'domaines': ('domaines_interet', Domaine),
+    'liaisons': ('filiere_domaines', LiaisonDomaine),
+    'processus': ('processus_preinscription', Etape),
+    'documents': ('documents_requis', Document),
+    'dates': ('dates_importantes', DateImportante),
+    'similaires': ('filiere_similaires', Similarite),
+}
+
+# Écriture en masse dans une table du catalogue (appliquer_ecritures) :
+# - 'inserer' : ``lignes`` contient les valeurs de ``colonnes`` (id compris) ;
+# - 'modifier' : les valeurs de ``colonnes`` suivies de l'id de la ligne ;
+# - 'supprimer' : les valeurs de ``colonnes`` qui désignent les lignes à supprimer.
+Ecriture = namedtuple('Ecriture', ('operation', 'table', 'colonnes', 'lignes'))
+
+# Critères de tri acceptés par get_filieres (préfixe « - » pour l'ordre décroissant)
+TRIS_FILIERES = ('id', 'nom', 'type', 'duree', 'frais_inscription', 'etablissement_nom')
+
+def analyser_tri(order_by: str) -> Tuple[str, bool]:
+    """Décomposer un critère de tri en (champ, décroissant) ; ValueError s'il est inconnu"""
+    champ = order_by.lstrip('-')
+    if champ not in TRIS_FILIERES:
+        raise ValueError(f"Tri inconnu : {order_by!r} (attendu : {', '.join(TRIS_FILIERES)})")
+    return champ, order_by.startswith('-')
+
+class CatalogueBackend(ABC):
+    """Stockage du catalogue derrière UniversityDatabase.
+
+    Une implémentation fournit les mêmes méthodes de lecture que
+    UniversityDatabase (mêmes signatures, mêmes clés dans les dicts
+    retournés), le chargement complet des tables pour le snapshot et une
+    signature bon marché qui change quand le contenu change.
+    """
+
+    #: Nombre maximal de connexions simultanées vers le stockage
+    pool_size: int = 1
+
+    @abstractmethod
+    def migrate(self) -> int:
+        """Créer ou mettre à jour le schéma ; retourne sa version"""
+
+    @abstractmethod
+    def load_tables(self) -> Dict[str, List[Record]]:
+        """Lire toutes les tables du catalogue (clés de TABLES_CATALOGUE)"""
+
+    @abstractmethod
+    def signature(self, fraiche: bool = False) -> Hashable:
+        """Valeur qui change quand le contenu du catalogue change.
+
+        Par défaut, la dernière valeur relevée en tâche de fond, sans
+        entrée-sortie ni préparation du stockage (None avant son premier
+        usage) : appelable depuis la boucle d'événements du serveur
+        d'actions. ``fraiche=True`` lit la valeur courante, depuis un thread.
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Statistiques du pool de connexions"""
+
+    @abstractmethod
+    def close(self):
+        """Fermer les connexions"""
+
+    @abstractmethod
+    def rouvrir(self):
+        """Repartir avec de nouvelles connexions après close() ou dans un processus fils.
+
+        Les connexions (et threads) hérités d'un fork ne doivent pas être
+        réutilisés : le superviseur des workers ferme le stockage avant de
+        forker puis chaque processus le rouvre.
+        """
+
+    def derniere_requete(self) -> Optional[str]:
+        """Texte de la dernière requête du thread courant, pour le journal des requêtes lentes"""
+        return None
+
+    @abstractmethod
+    def get_filieres_by_etablissement(self, etablissement_id: int) -> List[Dict]:
+        """Récupérer les filières d'un établissement"""
+
+    @abstractmethod
+    def get_filieres_by_etablissements(self, etablissement_ids: List[int]) -> Dict[int, List[Filiere]]:
+        """Récupérer en une seule requête les filières de plusieurs établissements"""
+
+    @abstractmethod
+    def get_etablissements_with_filiere_count(self) -> List[Dict]:
+        """Récupérer les établissements avec leur nombre de filières"""
+
+    @abstractmethod
+    def get_filiere_details(self, filiere_nom: str) -> Optional[Dict]:
+        """Récupérer les détails d'une filière spécifique"""
+
+    @abstractmethod
+    def get_filieres_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les filières par domaine d'intérêt"""
+
+    @abstractmethod
+    def get_filieres_by_type(self, type_filiere: str, etablissement: str = None) -> List[Dict]:
+        """Récupérer les filières par type (professionnelle/classique)"""
+
+    @abstractmethod
+    def get_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                     contient: str = None, order_by: str = 'id', limit: Optional[int] = None,
+                     offset: int = 0, apres_id: Optional[int] = None) -> List[Dict]:
+        """Récupérer une page de filières filtrées, triées par ``order_by`` puis par id.
+
+        Les filtres se cumulent ; chaque filière apparaît au plus une fois.
+        ``domaine`` et ``etablissement`` portent sur les noms, ``contient``
+        sur le nom et la description de la filière, par sous-chaîne sans
+        tenir compte de la casse ni des accents. ``apres_id`` ne garde que
+        les filières d'identifiant supérieur (parcours par lots).
+        """
+
+    @abstractmethod
+    def count_filieres(self, domaine: str = None, type_filiere: str = None,
+                       etablissement: str = None, contient: str = None) -> int:
+        """Nombre de filières correspondant aux filtres de get_filieres"""
+
+    @abstractmethod
+    def get_filieres_similaires(self, filiere_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Filières les plus proches d'une filière, d'après la table précalculée filiere_similaires"""
+
+    @abstractmethod
+    def remplacer_similaires(self, lignes: List[Tuple[int, int, int, float]]) -> int:
+        """Remplacer tout le contenu de filiere_similaires en une transaction.
+
+        ``lignes`` contient des tuples (filiere_id, rang, voisin_id, score).
+        Retourne le nombre de lignes écrites.
+        """
+
+    @abstractmethod
+    def appliquer_ecritures(self, ecritures: List[Ecriture], reconstruire_index: bool = False) -> int:
+        """Appliquer des écritures dans l'ordre, en une seule transaction.
+
+        Avec ``reconstruire_index``, les index dérivés tenus à jour ligne à
+        ligne sont reconstruits une seule fois à la fin (import en masse).
+        Retourne le nombre de lignes écrites.
+        """
+
+    @abstractmethod
+    def get_etablissements(self) -> List[Dict]:
+        """Récupérer tous les établissements"""
+
+    @abstractmethod
+    def get_processus_preinscription(self) -> List[Dict]:
+        """Récupérer le processus de préinscription"""
+
+    @abstractmethod
+    def get_documents_requis(self) -> List[Dict]:
+        """Récupérer la liste des documents requis"""
+
+    @abstractmethod
+    def get_dates_importantes(self) -> List[Dict]:
+        """Récupérer les dates importantes"""
+
+    @abstractmethod
+    def search_filiere_ids(self, query: str, limit: Optional[int] = None,
+                           phrase: bool = False) -> Optional[List[int]]:
+        """Identifiants des filières les plus pertinentes, ou None sans index plein texte.
+
+        Avec ``phrase``, seules comptent les filières dont le nom contient la
+        requête, dans l'ordre du repli de get_filiere_details.
+        """
+
+    @abstractmethod
+    def search_filieres(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Rechercher des filières par nom ou description, les plus pertinentes d'abord"""
+
+    @abstractmethod
+    def get_etablissements_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les établissements par domaine d'intérêt"""
@@ -0,0 +1,768 @@
+import asyncio
+import re
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+
+from database import migrations
+from database.backends.base import CatalogueBackend, Ecriture, TABLES_CATALOGUE, analyser_tri
+from database.backends.sqlite import COLONNES_TRI, MOTS_VIDES
+from database.catalogue import normaliser
+from database.metrics import mesurer_sql
+from database.records import (
+    DateImportante, Document, Etablissement, EtablissementAvecCompte, EtablissementDomaine,
+    Etape, Filiere, FiliereDomaine, FiliereSimilaire, Record,
+)
+
+logger = logging.getLogger(__name__)
+
+# Colonnes d'une filière et de son établissement, nommées comme les champs de
+# Filiere (search_vector et nom_normalise, colonnes techniques, ne sont jamais renvoyées)
+COLONNES_FILIERE = '''
+    f.id, f.nom, f.type, f.duree, f.description, f.debouches,
+    f.conditions_admission, f.etablissement_id, f.frais_inscription,
+    e.nom AS etablissement_nom, e.contact AS contact_etablissement,
+    e.site_web AS site_web_etablissement
+'''
+
+# Colonnes de tri de get_filieres, comparées octet par octet (COLLATE "C")
+# comme dans SQLite : les pages sont les mêmes d'un stockage à l'autre
+COLONNES_TRI_POSTGRES = {
+    champ: colonne if champ == 'id' else f'{colonne} COLLATE "C"'
+    for champ, colonne in COLONNES_TRI.items()
+}
+
+# Poids ts_rank_cd des lettres {D, C, B, A} : debouches (C), description (B), nom (A)
+POIDS_RANG = '{0, 0.1, 0.2, 1.0}'
+
+# Verrou consultatif pris pendant les migrations, pour que plusieurs nœuds
+# démarrés en même temps ne migrent pas la base en parallèle
+VERROU_MIGRATIONS = 4242
+
+def requete_tsquery(texte: str) -> Optional[str]:
+    """Construire une expression to_tsquery à partir d'un texte libre.
+
+    Même découpage que la recherche SQLite : chaque mot significatif devient
+    un préfixe (``informat:*``) et les mots sont combinés par OR.
+    """
+    mots = re.findall(r'[^\W_]+', normaliser(texte))
+    if not mots:
+        return None
+    significatifs = [m for m in mots if m not in MOTS_VIDES] or mots
+    return ' | '.join(f'{m}:*' for m in significatifs)
+
+SCHEMA_INITIAL = '''
+    CREATE TABLE IF NOT EXISTS etablissements (
+        id SERIAL PRIMARY KEY,
+        nom TEXT NOT NULL,
+        type TEXT NOT NULL,
+        description TEXT,
+        contact TEXT,
+        site_web TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS filieres (
+        id SERIAL PRIMARY KEY,
+        nom TEXT NOT NULL,
+        type TEXT NOT NULL, -- 'professionnelle' ou 'classique'
+        duree TEXT,
+        description TEXT,
+        debouches TEXT,
+        conditions_admission TEXT,
+        etablissement_id INTEGER REFERENCES etablissements (id),
+        frais_inscription TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS domaines_interet (
+        id SERIAL PRIMARY KEY,
+        nom TEXT NOT NULL,
+        description TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS filiere_domaines (
+        filiere_id INTEGER REFERENCES filieres (id),
+        domaine_id INTEGER REFERENCES domaines_interet (id),
+        PRIMARY KEY (filiere_id, domaine_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS processus_preinscription (
+        id SERIAL PRIMARY KEY,
+        etape INTEGER NOT NULL,
+        description TEXT NOT NULL,
+        details TEXT,
+        liens_utiles TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS documents_requis (
+        id SERIAL PRIMARY KEY,
+        type_document TEXT NOT NULL,
+        description TEXT,
+        obligatoire INTEGER DEFAULT 1
+    );
+
+    CREATE TABLE IF NOT EXISTS dates_importantes (
+        id SERIAL PRIMARY KEY,
+        evenement TEXT NOT NULL,
+        date_debut TEXT,
+        date_fin TEXT,
+        annee_academique TEXT
+    );
+'''
+
+# Équivalent de FTS5 + unicode61 remove_diacritics : configuration sans
+# racinisation dont les mots passent par unaccent, colonne tsvector pondérée
+# générée et index GIN
+INDEX_PLEIN_TEXTE = '''
+    CREATE EXTENSION IF NOT EXISTS unaccent;
+
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'fr_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION fr_unaccent (COPY = simple);
+            ALTER TEXT SEARCH CONFIGURATION fr_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+        END IF;
+    END
+    $$;
+
+    ALTER TABLE filieres ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(nom, '')), 'A') ||
+            setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('fr_unaccent'::regconfig, coalesce(debouches, '')), 'C')
+        ) STORED;
+
+    CREATE INDEX IF NOT EXISTS filieres_search_idx ON filieres USING GIN (search_vector);
+'''
+
+# Nom normalisé (minuscules, sans accents, espaces réduits) : colonne générée
+# à partir d'un enrobage IMMUTABLE d'unaccent, indexable ; index des clés
+# étrangères et des types, comme la migration SQLite
+INDEX_SECONDAIRES = '''
+    CREATE OR REPLACE FUNCTION catalogue_normaliser(texte TEXT) RETURNS TEXT AS $$
+        SELECT regexp_replace(lower(public.unaccent('public.unaccent'::regdictionary, btrim(texte))),
+                              '[[:space:]]+', ' ', 'g')
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+    ALTER TABLE etablissements ADD COLUMN IF NOT EXISTS nom_normalise TEXT
+        GENERATED ALWAYS AS (catalogue_normaliser(nom)) STORED;
+    ALTER TABLE filieres ADD COLUMN IF NOT EXISTS nom_normalise TEXT
+        GENERATED ALWAYS AS (catalogue_normaliser(nom)) STORED;
+    ALTER TABLE domaines_interet ADD COLUMN IF NOT EXISTS nom_normalise TEXT
+        GENERATED ALWAYS AS (catalogue_normaliser(nom)) STORED;
+
+    CREATE INDEX IF NOT EXISTS idx_etablissements_nom_normalise ON etablissements (nom_normalise);
+    CREATE INDEX IF NOT EXISTS idx_filieres_nom_normalise ON filieres (nom_normalise);
+    CREATE INDEX IF NOT EXISTS idx_domaines_interet_nom_normalise ON domaines_interet (nom_normalise);
+    CREATE INDEX IF NOT EXISTS idx_filieres_etablissement ON filieres (etablissement_id);
+    CREATE INDEX IF NOT EXISTS idx_filieres_type ON filieres (type);
+    CREATE INDEX IF NOT EXISTS idx_filiere_domaines_domaine ON filiere_domaines (domaine_id, filiere_id);
+'''
+
+TABLE_SIMILAIRES = '''
+    CREATE TABLE IF NOT EXISTS filiere_similaires (
+        filiere_id INTEGER NOT NULL REFERENCES filieres (id),
+        rang INTEGER NOT NULL,
+        voisin_id INTEGER NOT NULL REFERENCES filieres (id),
+        score DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (filiere_id, rang)
+    );
+'''
+
+# Version du catalogue : triggers par instruction (et non par ligne) comme
+# dans SQLite quand les triggers sont suspendus, un import en masse ne
+# l'incrémente donc qu'une fois par instruction
+VERSION_CATALOGUE = '''
+    CREATE TABLE IF NOT EXISTS catalogue_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version BIGINT NOT NULL DEFAULT 0,
+        modifie_le TIMESTAMPTZ DEFAULT now()
+    );
+    INSERT INTO catalogue_version (id) VALUES (1) ON CONFLICT DO NOTHING;
+
+    CREATE OR REPLACE FUNCTION catalogue_version_incrementer() RETURNS trigger AS $$
+    BEGIN
+        UPDATE catalogue_version SET version = version + 1, modifie_le = now() WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+''' + ''.join(f'''
+    DROP TRIGGER IF EXISTS {table}_version ON {table};
+    CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION catalogue_version_incrementer();
+''' for table in migrations.TABLES_VERSIONNEES)
+
+# Mêmes numéros et descriptions que les migrations SQLite
+MIGRATIONS_POSTGRES = [
+    (1, "Tables du catalogue", SCHEMA_INITIAL),
+    (2, "Index plein texte des filières", INDEX_PLEIN_TEXTE),
+    (3, "Index secondaires et noms normalisés", INDEX_SECONDAIRES),
+    (4, "Filières similaires précalculées", TABLE_SIMILAIRES),
+    (5, "Version du catalogue", VERSION_CATALOGUE),
+]
+
+class PostgresBackend(CatalogueBackend):
+    """Catalogue stocké dans PostgreSQL, partagé entre plusieurs serveurs d'actions.
+
+    Les requêtes passent par un pool asyncpg qui vit dans une boucle
+    d'événements dédiée (un thread) : les méthodes restent synchrones comme
+    celles de SQLiteBackend et peuvent être appelées depuis n'importe quel
+    thread. asyncpg garde les requêtes préparées en cache par connexion.
+    """
+
+    def __init__(self, dsn: str, pool_size: int = 8, read_only: bool = False,
+                 timeout: float = 10.0, poll_interval: float = 2.0):
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self.read_only = read_only
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        # Rien n'est ouvert ici : le pool est créé au premier usage
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[asyncpg.Pool] = None
+        self._poller: Optional[asyncio.Future] = None
+        self._ready_lock = threading.Lock()
+        self._signature = None
+        self._queries = 0
+        # Dernière requête de chaque thread, pour le journal des requêtes lentes
+        self._derniere = threading.local()
+
+    def _call(self, coro):
+        """Exécuter une coroutine dans la boucle du backend et attendre son résultat"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(self.timeout)
+
+    def _ensure_ready(self):
+        """Démarrer la boucle, ouvrir le pool et migrer le schéma au premier usage"""
+        if self._pool is not None:
+            return
+        with self._ready_lock:
+            if self._pool is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="catalogue-postgres", daemon=True
+            )
+            self._thread.start()
+            pool = self._call(self._create_pool())
+
+            if not self.read_only:
+                self._call(self._migrate(pool))
+            else:
+                version = self._call(self._schema_version(pool))
+                if version < migrations.LATEST_VERSION:
+                    logger.warning(
+                        f"Schéma en version {version} (attendue : {migrations.LATEST_VERSION}), "
+                        "lancez les migrations sans le mode lecture seule"
+                    )
+
+            self._signature = self._call(self._read_signature(pool))
+            self._poller = asyncio.run_coroutine_threadsafe(self._poll_signature(pool), self._loop)
+            self._pool = pool
+
+    async def _create_pool(self) -> asyncpg.Pool:
+        """Ouvrir le pool ; create_pool renvoie un Pool à attendre, pas une coroutine"""
+        return await asyncpg.create_pool(
+            self.dsn, min_size=1, max_size=self.pool_size, command_timeout=self.timeout
+        )
+
+    @staticmethod
+    async def _schema_version(pool) -> int:
+        """Version du schéma enregistrée dans la base (0 si jamais migrée)"""
+        async with pool.acquire() as conn:
+            if await conn.fetchval("SELECT to_regclass('schema_version')") is None:
+                return 0
+            return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+
+    async def _migrate(self, pool) -> int:
+        """Appliquer les migrations manquantes puis les données d'exemple"""
+        async with pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1)", VERROU_MIGRATIONS)
+            try:
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT,
+                        applied_at TIMESTAMPTZ DEFAULT now()
+                    )
+                ''')
+                version = await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                for numero, description, script in MIGRATIONS_POSTGRES:
+                    if numero <= version:
+                        continue
+                    logger.info(f"Migration {numero} : {description}")
+                    async with conn.transaction():
+                        await conn.execute(script)
+                        await conn.execute(
+                            "INSERT INTO schema_version (version, description) VALUES ($1, $2)",
+                            numero, description
+                        )
+                    version = numero
+
+                await self._populate_sample_data(conn)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", VERROU_MIGRATIONS)
+        return version
+
+    @staticmethod
+    async def _populate_sample_data(conn):
+        """Peupler la base avec les mêmes données d'exemple que SQLite"""
+        if await conn.fetchval("SELECT COUNT(*) FROM etablissements") > 0:
+            return
+
+        async with conn.transaction():
+            for table, colonnes, lignes in migrations.DONNEES_EXEMPLE:
+                placeholders = ', '.join(f'${i}' for i in range(1, len(colonnes) + 1))
+                await conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(colonnes)}) VALUES ({placeholders}) "
+                    "ON CONFLICT DO NOTHING",
+                    lignes
+                )
+
+    @staticmethod
+    async def _read_signature(pool):
+        """Version du catalogue (migration 5), ou à défaut compteurs d'écritures de pg_stat_user_tables"""
+        async with pool.acquire() as conn:
+            if await conn.fetchval("SELECT to_regclass('catalogue_version')") is not None:
+                return await conn.fetchval("SELECT version FROM catalogue_version WHERE id = 1")
+            # Les compteurs sont remontés avec retard et remis à zéro par pg_stat_reset
+            row = await conn.fetchrow('''
+                SELECT COALESCE(SUM(n_tup_ins), 0), COALESCE(SUM(n_tup_upd), 0),
+                       COALESCE(SUM(n_tup_del), 0)
+                FROM pg_stat_user_tables
+                WHERE relname = ANY($1::text[])
+            ''', [table for table, _ in TABLES_CATALOGUE.values()])
+        return tuple(row)
+
+    async def _poll_signature(self, pool):
+        """Rafraîchir la signature en tâche de fond, toutes les poll_interval secondes"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                self._signature = await self._read_signature(pool)
+            except (asyncpg.PostgresError, OSError) as e:
+                logger.warning(f"Signature du catalogue indisponible : {e}")
+
+    async def _fetch(self, classe, sql: str, *args) -> List[Record]:
+        """Exécuter une requête de lecture ; lignes asyncpg brutes si classe est None"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(sql, *args)
+        return rows if classe is None else [classe.depuis(row) for row in rows]
+
+    def _rows(self, classe, sql: str, *args) -> List[Record]:
+        """Exécuter une requête de lecture depuis un thread quelconque"""
+        self._ensure_ready()
+        self._queries += 1
+        self._derniere.sql = sql
+        return self._call(self._fetch(classe, sql, *args))
+
+    def derniere_requete(self) -> Optional[str]:
+        """Dernière requête exécutée par le thread courant"""
+        return getattr(self._derniere, 'sql', None)
+
+    def migrate(self) -> int:
+        """Créer ou mettre à jour le schéma (migrations puis données d'exemple)"""
+        self._ensure_ready()
+        return self._call(self._migrate(self._pool))
+
+    def signature(self, fraiche: bool = False):
+        """Dernière signature relevée par la tâche de fond, sans aller-retour réseau.
+
+        None tant que le pool n'est pas ouvert ; ``fraiche=True`` la lit
+        maintenant (hors de la boucle d'événements).
+        """
+        if not fraiche:
+            return self._signature
+        self._ensure_ready()
+        return self._call(self._read_signature(self._pool))
+
+    def stats(self) -> Dict[str, int]:
+        """Statistiques du pool asyncpg"""
+        pool = self._pool
+        if pool is None:
+            return {'size': 0, 'idle': 0, 'in_use': 0, 'max_size': self.pool_size, 'queries': 0}
+        size, idle = pool.get_size(), pool.get_idle_size()
+        return {
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'max_size': pool.get_max_size(),
+            'queries': self._queries,
+        }
+
+    def close(self):
+        """Fermer le pool puis arrêter la boucle du backend"""
+        if self._pool is None:
+            return
+        self._poller.cancel()
+        try:
+            self._call(self._pool.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(self.timeout)
+            self._pool = None
+
+    def rouvrir(self):
+        """Oublier la boucle et le pool courants ; ils sont recréés au prochain usage.
+
+        Dans un processus fils, le thread de la boucle n'existe plus : l'état
+        hérité est abandonné sans être fermé.
+        """
+        self._loop = None
+        self._thread = None
+        self._pool = None
+        self._poller = None
+        self._ready_lock = threading.Lock()
+        self._derniere = threading.local()
+
+    async def _load_tables(self) -> Dict[str, List[Record]]:
+        """Lire toutes les tables dans une même transaction (même état de la base)"""
+        tables = {}
+        async with self._pool.acquire() as conn:
+            async with conn.transaction(isolation='repeatable_read', readonly=True):
+                for cle, (table, classe) in TABLES_CATALOGUE.items():
+                    # Les champs absents de la table (search_vector, ...) sont ignorés par classe.depuis
+                    rows = await conn.fetch(f'SELECT * FROM {table} ORDER BY 1')
+                    tables[cle] = [classe.depuis(row) for row in rows]
+        return tables
+
+    @mesurer_sql
+    def load_tables(self) -> Dict[str, List[Record]]:
+        """Charger toutes les tables du catalogue"""
+        self._ensure_ready()
+        self._queries += len(TABLES_CATALOGUE)
+        return self._call(self._load_tables())
+
+    # Méthodes pour récupérer les données
+    @mesurer_sql
+    def get_filieres_by_etablissement(self, etablissement_id: int) -> List[Dict]:
+        """Récupérer les filières d'un établissement"""
+        return self._rows(Filiere, f'''
+            SELECT {COLONNES_FILIERE}
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE f.etablissement_id = $1
+            ORDER BY f.id
+        ''', etablissement_id)
+
+    @mesurer_sql
+    def get_filieres_by_etablissements(self, etablissement_ids: List[int]) -> Dict[int, List[Filiere]]:
+        """Récupérer en une seule requête les filières de plusieurs établissements"""
+        etablissement_ids = list(etablissement_ids)
+        filieres = {etab_id: [] for etab_id in etablissement_ids}
+        if not etablissement_ids:
+            return filieres
+
+        for row in self._rows(Filiere, f'''
+            SELECT {COLONNES_FILIERE}
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE f.etablissement_id = ANY($1::int[])
+            ORDER BY f.id
+        ''', etablissement_ids):
+            filieres[row.etablissement_id].append(row)
+        return filieres
+
+    @mesurer_sql
+    def get_etablissements_with_filiere_count(self) -> List[Dict]:
+        """Récupérer les établissements avec leur nombre de filières (une seule requête groupée)"""
+        return self._rows(EtablissementAvecCompte, '''
+            SELECT e.*, COUNT(f.id)::int AS nb_filieres
+            FROM etablissements e
+            LEFT JOIN filieres f ON f.etablissement_id = e.id
+            GROUP BY e.id
+            ORDER BY e.id
+        ''')
+
+    @mesurer_sql
+    def get_filiere_details(self, filiere_nom: str) -> Optional[Dict]:
+        """Récupérer les détails d'une filière spécifique"""
+        # Nom exact (à la casse et aux accents près) d'abord, comme le snapshot
+        rows = self._rows(Filiere, f'''
+            SELECT {COLONNES_FILIERE}
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE f.nom_normalise = catalogue_normaliser($1)
+            ORDER BY f.id
+            LIMIT 1
+        ''', filiere_nom)
+        if rows:
+            return rows[0]
+
+        if re.search(r'[^\W_]', normaliser(filiere_nom)):
+            # Phrase cherchée dans le seul nom (poids A), comme la requête FTS5
+            rows = self._rows(Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE ts_filter(f.search_vector, '{{a}}') @@ phraseto_tsquery('fr_unaccent', $1)
+                ORDER BY ts_rank_cd('{POIDS_RANG}', f.search_vector,
+                                    phraseto_tsquery('fr_unaccent', $1)) DESC, f.id
+                LIMIT 1
+            ''', filiere_nom)
+        else:
+            rows = self._rows(Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE f.nom_normalise LIKE '%' || catalogue_normaliser($1) || '%'
+                ORDER BY f.id
+                LIMIT 1
+            ''', filiere_nom)
+        return rows[0] if rows else None
+
+    @mesurer_sql
+    def get_filieres_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les filières par domaine d'intérêt"""
+        return self._rows(FiliereDomaine, f'''
+            SELECT {COLONNES_FILIERE}, d.nom AS domaine_nom
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            JOIN filiere_domaines fd ON f.id = fd.filiere_id
+            JOIN domaines_interet d ON fd.domaine_id = d.id
+            WHERE d.nom_normalise LIKE '%' || catalogue_normaliser($1) || '%'
+            ORDER BY f.id, d.id
+        ''', domaine)
+
+    @mesurer_sql
+    def get_filieres_by_type(self, type_filiere: str, etablissement: str = None) -> List[Dict]:
+        """Récupérer les filières par type (professionnelle/classique)"""
+        if etablissement:
+            return self._rows(Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE f.type = $1 AND e.nom_normalise LIKE '%' || catalogue_normaliser($2) || '%'
+                ORDER BY f.id
+            ''', type_filiere, etablissement)
+        return self._rows(Filiere, f'''
+            SELECT {COLONNES_FILIERE}
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE f.type = $1
+            ORDER BY f.id
+        ''', type_filiere)
+
+    @staticmethod
+    def _filtres_filieres(domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                          contient: str = None, apres_id: Optional[int] = None) -> Tuple[str, list]:
+        """Clause WHERE et paramètres ($1, $2, ...) des filtres de get_filieres"""
+        conditions, params = [], []
+
+        def parametre(valeur) -> str:
+            params.append(valeur)
+            return f'${len(params)}'
+
+        if domaine is not None:
+            conditions.append(f'''f.id IN (
+                SELECT fd.filiere_id
+                FROM domaines_interet d
+                JOIN filiere_domaines fd ON fd.domaine_id = d.id
+                WHERE d.nom_normalise LIKE '%' || catalogue_normaliser({parametre(domaine)}) || '%'
+            )''')
+        if type_filiere is not None:
+            conditions.append(f'f.type = {parametre(type_filiere)}')
+        if etablissement is not None:
+            conditions.append(
+                f"e.nom_normalise LIKE '%' || catalogue_normaliser({parametre(etablissement)}) || '%'"
+            )
+        if contient is not None:
+            motif = f"'%' || catalogue_normaliser({parametre(contient)}) || '%'"
+            conditions.append(f'(f.nom_normalise LIKE {motif} OR catalogue_normaliser(f.description) LIKE {motif})')
+        if apres_id is not None:
+            conditions.append(f'f.id > {parametre(apres_id)}')
+        return ' AND '.join(conditions) or 'TRUE', params
+
+    @mesurer_sql
+    def get_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                     contient: str = None, order_by: str = 'id', limit: Optional[int] = None,
+                     offset: int = 0, apres_id: Optional[int] = None) -> List[Dict]:
+        """Récupérer une page de filières filtrées et triées, en une seule requête"""
+        champ, decroissant = analyser_tri(order_by)
+        # NULL en premier dans l'ordre croissant, comme SQLite (PostgreSQL fait l'inverse)
+        tri = COLONNES_TRI_POSTGRES[champ] + (' DESC NULLS LAST' if decroissant else ' NULLS FIRST')
+        if champ != 'id':
+            tri += ', f.id'
+        where, params = self._filtres_filieres(domaine, type_filiere, etablissement, contient, apres_id)
+        return self._rows(Filiere, f'''
+            SELECT {COLONNES_FILIERE}
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE {where}
+            ORDER BY {tri}
+            LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
+        ''', *params, limit, offset)
+
+    @mesurer_sql
+    def count_filieres(self, domaine: str = None, type_filiere: str = None,
+                       etablissement: str = None, contient: str = None) -> int:
+        """Nombre de filières correspondant aux filtres de get_filieres"""
+        where, params = self._filtres_filieres(domaine, type_filiere, etablissement, contient)
+        rows = self._rows(None, f'''
+            SELECT COUNT(*) AS total
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE {where}
+        ''', *params)
+        return rows[0]['total']
+
+    @mesurer_sql
+    def get_filieres_similaires(self, filiere_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Filières les plus proches d'une filière, d'après la table précalculée"""
+        return self._rows(FiliereSimilaire, f'''
+            SELECT {COLONNES_FILIERE}, s.score
+            FROM filiere_similaires s
+            JOIN filieres f ON f.id = s.voisin_id
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE s.filiere_id = $1
+            ORDER BY s.rang
+            LIMIT $2
+        ''', filiere_id, limit)
+
+    async def _remplacer_similaires(self, lignes):
+        """Vider puis recharger filiere_similaires par COPY, dans une transaction"""
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM filiere_similaires")
+                await conn.copy_records_to_table(
+                    'filiere_similaires', records=lignes,
+                    columns=('filiere_id', 'rang', 'voisin_id', 'score'),
+                )
+
+    def remplacer_similaires(self, lignes: List[Tuple[int, int, int, float]]) -> int:
+        """Remplacer tout le contenu de filiere_similaires en une transaction"""
+        self._ensure_ready()
+        self._call(self._remplacer_similaires(lignes))
+        return len(lignes)
+
+    async def _appliquer_ecritures(self, ecritures: List[Ecriture]) -> int:
+        """Appliquer les écritures dans une transaction : COPY pour les insertions, executemany sinon"""
+        ecrites = 0
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                for operation, table, colonnes, lignes in ecritures:
+                    if operation == 'inserer':
+                        await conn.copy_records_to_table(table, records=lignes, columns=colonnes)
+                    elif operation == 'modifier':
+                        affectations = ', '.join(f'{c} = ${i}' for i, c in enumerate(colonnes, start=1))
+                        await conn.executemany(
+                            f"UPDATE {table} SET {affectations} WHERE id = ${len(colonnes) + 1}", lignes
+                        )
+                    else:
+                        conditions = ' AND '.join(f'{c} = ${i}' for i, c in enumerate(colonnes, start=1))
+                        await conn.executemany(f"DELETE FROM {table} WHERE {conditions}", lignes)
+                    ecrites += len(lignes)
+
+                # Les id ont été fournis : les séquences doivent repartir après le plus grand
+                for table in {e.table for e in ecritures if e.operation == 'inserer' and 'id' in e.colonnes}:
+                    await conn.execute(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                    )
+        return ecrites
+
+    def appliquer_ecritures(self, ecritures: List[Ecriture], reconstruire_index: bool = False) -> int:
+        """Appliquer des écritures en une transaction.
+
+        Le vecteur plein texte et les noms normalisés sont des colonnes
+        générées : il n'y a pas d'index dérivé à suspendre, ``reconstruire_index``
+        est sans effet.
+        """
+        self._ensure_ready()
+        # Sans délai global : un import dure bien plus que self.timeout, chaque
+        # instruction reste bornée par le command_timeout du pool
+        return asyncio.run_coroutine_threadsafe(self._appliquer_ecritures(ecritures), self._loop).result()
+
+    @mesurer_sql
+    def get_etablissements(self) -> List[Dict]:
+        """Récupérer tous les établissements"""
+        return self._rows(Etablissement, 'SELECT * FROM etablissements ORDER BY id')
+
+    @mesurer_sql
+    def get_processus_preinscription(self) -> List[Dict]:
+        """Récupérer le processus de préinscription"""
+        return self._rows(Etape, 'SELECT * FROM processus_preinscription ORDER BY etape')
+
+    @mesurer_sql
+    def get_documents_requis(self) -> List[Dict]:
+        """Récupérer la liste des documents requis"""
+        return self._rows(Document, 'SELECT * FROM documents_requis ORDER BY id')
+
+    @mesurer_sql
+    def get_dates_importantes(self) -> List[Dict]:
+        """Récupérer les dates importantes"""
+        return self._rows(DateImportante, 'SELECT * FROM dates_importantes ORDER BY date_debut')
+
+    @mesurer_sql
+    def search_filiere_ids(self, query: str, limit: Optional[int] = None,
+                           phrase: bool = False) -> Optional[List[int]]:
+        """Identifiants des filières correspondant à la recherche, les plus pertinentes d'abord.
+
+        Avec ``phrase``, la requête est cherchée telle quelle dans le seul nom,
+        comme le repli de get_filiere_details. Retourne None quand le texte ne
+        contient aucun mot cherchable.
+        """
+        if phrase:
+            if not re.search(r'[^\W_]', normaliser(query)):
+                return None
+            rows = self._rows(None, f'''
+                SELECT f.id
+                FROM filieres f
+                WHERE ts_filter(f.search_vector, '{{a}}') @@ phraseto_tsquery('fr_unaccent', $1)
+                ORDER BY ts_rank_cd('{POIDS_RANG}', f.search_vector,
+                                    phraseto_tsquery('fr_unaccent', $1)) DESC, f.id
+                LIMIT $2
+            ''', query, limit)
+            return [row['id'] for row in rows]
+
+        expression = requete_tsquery(query)
+        if expression is None:
+            return None
+        rows = self._rows(None, f'''
+            SELECT f.id
+            FROM filieres f
+            WHERE f.search_vector @@ to_tsquery('fr_unaccent', $1)
+            ORDER BY ts_rank_cd('{POIDS_RANG}', f.search_vector,
+                                to_tsquery('fr_unaccent', $1)) DESC, f.id
+            LIMIT $2
+        ''', expression, limit)
+        return [row['id'] for row in rows]
+
+    @mesurer_sql
+    def search_filieres(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Rechercher des filières par nom ou description, les plus pertinentes d'abord"""
+        expression = requete_tsquery(query)
+        if expression is None:
+            return self._rows(Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE f.nom ILIKE $1 OR f.description ILIKE $1
+                ORDER BY f.id
+                LIMIT $2
+            ''', f'%{query}%', limit)
+
+        return self._rows(Filiere, f'''
+            SELECT {COLONNES_FILIERE}
+            FROM filieres f
+            JOIN etablissements e ON f.etablissement_id = e.id
+            WHERE f.search_vector @@ to_tsquery('fr_unaccent', $1)
+            ORDER BY ts_rank_cd('{POIDS_RANG}', f.search_vector,
+                                to_tsquery('fr_unaccent', $1)) DESC, f.id
+            LIMIT $2
+        ''', expression, limit)
+
+    @mesurer_sql
+    def get_etablissements_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les établissements par domaine d'intérêt"""
+        return self._rows(EtablissementDomaine, '''
+            SELECT DISTINCT e.*, d.nom AS domaine_nom
+            FROM etablissements e
+            JOIN filieres f ON f.etablissement_id = e.id
+            JOIN filiere_domaines fd ON f.id = fd.filiere_id
+            JOIN domaines_interet d ON fd.domaine_id = d.id
+            WHERE d.nom_normalise LIKE '%' || catalogue_normaliser($1) || '%'
+            ORDER BY e.nom
+        ''', domaine)
@@ -0,0 +1,718 @@
+import os
+import re
+import sqlite3
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from database import migrations
+from database.backends.base import CatalogueBackend, Ecriture, TABLES_CATALOGUE, analyser_tri
+from database.catalogue import normaliser
+from database.metrics import mesurer_sql, metriques
+from database.records import (
+    DateImportante, Document, Etablissement, EtablissementAvecCompte, EtablissementDomaine,
+    Etape, Filiere, FiliereDomaine, FiliereSimilaire, Record,
+)
+
+logger = logging.getLogger(__name__)
+
+# Mots vides ignorés dans les recherches plein texte
+MOTS_VIDES = {
+    'a', 'au', 'aux', 'd', 'de', 'des', 'du', 'en', 'et', 'l', 'la', 'le',
+    'les', 'ou', 'pour', 'sur', 'un', 'une',
+}
+
+# Colonnes d'une filière et de son établissement, nommées comme les champs de
+# Filiere (nom_normalise, colonne technique, n'est jamais renvoyée)
+COLONNES_FILIERE = '''
+    f.id, f.nom, f.type, f.duree, f.description, f.debouches,
+    f.conditions_admission, f.etablissement_id, f.frais_inscription,
+    e.nom as etablissement_nom, e.contact as contact_etablissement,
+    e.site_web as site_web_etablissement
+'''
+
+# Colonnes d'un établissement, nommées comme les champs de Etablissement
+COLONNES_ETABLISSEMENT = 'e.id, e.nom, e.type, e.description, e.contact, e.site_web'
+
+# Colonne SQL de chaque critère de tri de get_filieres
+COLONNES_TRI = {
+    'id': 'f.id', 'nom': 'f.nom', 'type': 'f.type', 'duree': 'f.duree',
+    'frais_inscription': 'f.frais_inscription', 'etablissement_nom': 'e.nom',
+}
+
+# Poids BM25 des colonnes de filieres_fts : nom, description, debouches
+POIDS_BM25 = (10.0, 2.0, 1.0)
+
+def requete_fts(texte: str, phrase: bool = False) -> Optional[str]:
+    """Construire une expression MATCH FTS5 à partir d'un texte libre.
+
+    Par défaut, chaque mot significatif devient un préfixe (``"informat"*``)
+    et les mots sont combinés par OR : BM25 classe alors en tête les filières
+    qui contiennent le plus de termes. Avec ``phrase=True``, le texte est
+    cherché comme une phrase dans le nom de la filière.
+    """
+    mots = re.findall(r'\w+', normaliser(texte))
+    if not mots:
+        return None
+    if phrase:
+        return 'nom : "{}"'.format(' '.join(mots))
+    significatifs = [m for m in mots if m not in MOTS_VIDES] or mots
+    return ' OR '.join(f'"{m}"*' for m in significatifs)
+
+# Valeurs par liste IN (...) d'une instruction : les versions de SQLite
+# antérieures à 3.32 refusent plus de 999 paramètres
+TAILLE_PAQUET_IN = 500
+
+class ConnectionPool:
+    """Pool borné de connexions SQLite en lecture seule, partagé entre threads.
+
+    Les connexions sont ouvertes à la demande jusqu'à ``max_size`` puis
+    réutilisées ; au-delà, les appelants attendent qu'une connexion soit
+    rendue. Chaque connexion garde son propre cache de requêtes préparées
+    (``cached_statements``), ce qui évite de recompiler le SQL à chaque tour.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 5.0,
+                 cached_statements: int = 128):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self._stats = {'hits': 0, 'waits': 0, 'opens': 0}
+        # Dernière instruction SQL de chaque thread, pour le journal des requêtes lentes
+        self._derniere = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        """Ouvrir une nouvelle connexion en lecture seule"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute("PRAGMA query_only = ON")
+        migrations.enregistrer_fonctions(conn)
+        if metriques.seuil_requete_lente is not None:
+            conn.set_trace_callback(self._tracer)
+        return conn
+
+    def _tracer(self, sql: str):
+        """Mémoriser la dernière instruction exécutée par le thread courant"""
+        # Les instructions internes de FTS5 arrivent préfixées par « -- »
+        if not sql.startswith('--'):
+            self._derniere.sql = sql
+
+    def derniere_requete(self) -> Optional[str]:
+        """Dernière instruction SQL exécutée par le thread courant (si tracée)"""
+        return getattr(self._derniere, 'sql', None)
+
+    def acquire(self) -> sqlite3.Connection:
+        """Emprunter une connexion au pool"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Le pool de connexions est fermé")
+
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats['hits'] += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.max_size
+            if can_open:
+                self._opened += 1
+                self._stats['opens'] += 1
+            else:
+                self._stats['waits'] += 1
+
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Aucune connexion disponible après {self.timeout}s "
+                f"(pool de {self.max_size})"
+            )
+
+    def release(self, conn: sqlite3.Connection):
+        """Rendre une connexion au pool"""
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager qui emprunte puis rend une connexion"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Fermer toutes les connexions inactives et refuser les nouveaux emprunts"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Statistiques du pool pour le dimensionnement"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self._opened
+        stats['idle'] = self._idle.qsize()
+        stats['in_use'] = stats['size'] - stats['idle']
+        stats['max_size'] = self.max_size
+        return stats
+
+class SQLiteBackend(CatalogueBackend):
+    """Catalogue stocké dans un fichier SQLite local"""
+
+    def __init__(self, db_path: str = "university_douala.db", pool_size: int = 8,
+                 read_only: bool = False, poll_interval: float = 2.0):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.pool_size = pool_size
+        self.poll_interval = poll_interval
+
+        # Rien n'est ouvert ici : la base est initialisée au premier usage
+        self._pool = ConnectionPool(db_path, max_size=pool_size)
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self._has_fts: Optional[bool] = None
+        self._has_version: Optional[bool] = None
+        # Version du catalogue relevée par le thread de surveillance, et son signal d'arrêt
+        self._signature = None
+        self._surveillance: Optional[threading.Event] = None
+
+    def get_connection(self):
+        """Établir une connexion à la base de données (lecture/écriture)"""
+        conn = sqlite3.connect(self.db_path)
+        migrations.enregistrer_fonctions(conn)
+        return conn
+
+    def migrate(self) -> int:
+        """Créer ou mettre à jour le schéma (migrations puis données d'exemple)"""
+        conn = self.get_connection()
+        try:
+            return migrations.migrate(conn)
+        finally:
+            conn.close()
+
+    def _ensure_ready(self):
+        """Préparer la base au premier usage.
+
+        En lecture seule, aucune instruction DDL n'est exécutée : le fichier
+        doit déjà avoir été migré (``python -m database.migrations``).
+        """
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            if not self.read_only:
+                self.migrate()
+            else:
+                if not os.path.exists(self.db_path):
+                    raise FileNotFoundError(f"Base de données introuvable : {self.db_path}")
+                with self._pool.connection() as conn:
+                    version = migrations.get_schema_version(conn)
+                if version < migrations.LATEST_VERSION:
+                    logger.warning(
+                        f"Schéma en version {version} (attendue : {migrations.LATEST_VERSION}), "
+                        "lancez les migrations sans le mode lecture seule"
+                    )
+            with self._pool.connection() as conn:
+                self._signature = self._lire_signature(conn)
+            self._demarrer_surveillance()
+            self._ready = True
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Pool de connexions en lecture, la base étant préparée au premier accès"""
+        self._ensure_ready()
+        return self._pool
+
+    @property
+    def has_fts(self) -> bool:
+        """Indique si l'index plein texte des filières est disponible"""
+        if self._has_fts is None:
+            with self.pool.connection() as conn:
+                cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'filieres_fts'")
+                self._has_fts = cursor.fetchone() is not None
+        return self._has_fts
+
+    @property
+    def has_version(self) -> bool:
+        """Indique si la base tient à jour la version du catalogue (migration 5)"""
+        if self._has_version is None:
+            with self.pool.connection() as conn:
+                cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'catalogue_version'")
+                self._has_version = cursor.fetchone() is not None
+        return self._has_version
+
+    def stats(self) -> Dict[str, int]:
+        """Exposer les statistiques du pool de connexions (hits, waits, opens)"""
+        return self._pool.stats()
+
+    def close(self):
+        """Arrêter la surveillance de la version et fermer proprement les connexions du pool"""
+        if self._surveillance is not None:
+            self._surveillance.set()
+        self._pool.close()
+
+    def rouvrir(self):
+        """Remplacer le pool par un pool neuf ; la base reste considérée comme préparée.
+
+        Dans un processus fils, le thread de surveillance n'existe plus : il
+        est relancé.
+        """
+        self._pool = ConnectionPool(self.db_path, max_size=self.pool_size)
+        if self._ready:
+            self._demarrer_surveillance()
+
+    def derniere_requete(self) -> Optional[str]:
+        """Dernière instruction SQL exécutée par le thread courant"""
+        return self._pool.derniere_requete()
+
+    def signature(self, fraiche: bool = False):
+        """Version du catalogue, incrémentée par triggers à chaque écriture validée.
+
+        Par défaut, la dernière version relevée par le thread de surveillance :
+        aucune lecture, aucun emprunt au pool, et None tant que la base n'a
+        pas été préparée. ``fraiche=True`` la lit sur le pool (hors de la
+        boucle d'événements).
+        """
+        if not fraiche:
+            return self._signature
+        with self.pool.connection() as conn:
+            return self._lire_signature(conn)
+
+    def _demarrer_surveillance(self):
+        """Lancer le thread qui relève la version du catalogue toutes les poll_interval secondes"""
+        if self._surveillance is not None:
+            self._surveillance.set()
+        arret = self._surveillance = threading.Event()
+        threading.Thread(target=self._surveiller, args=(arret,), name="catalogue-sqlite",
+                         daemon=True).start()
+
+    def _surveiller(self, arret: threading.Event):
+        """Relever la version sur une connexion dédiée, hors du pool, jusqu'à l'arrêt"""
+        conn = None
+        try:
+            while not arret.wait(self.poll_interval):
+                try:
+                    if conn is None:
+                        conn = self._pool._open()
+                    self._signature = self._lire_signature(conn)
+                except sqlite3.Error as e:
+                    logger.warning(f"Signature du catalogue indisponible : {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _lire_signature(self, conn: sqlite3.Connection):
+        """Lire la version du catalogue sur ``conn``.
+
+        Une base qui n'a pas la table de version (lecture seule non migrée)
+        retombe sur la date et la taille du fichier et de son WAL.
+        """
+        if self._has_version is None:
+            cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'catalogue_version'")
+            self._has_version = cursor.fetchone() is not None
+        if self._has_version:
+            return conn.execute("SELECT version FROM catalogue_version WHERE id = 1").fetchone()[0]
+        signature = []
+        for path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            # Un WAL vide (créé à l'ouverture d'un lecteur) ne change pas le contenu
+            if stat is None or stat.st_size == 0:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def load_tables(self) -> Dict[str, List[Record]]:
+        """Charger toutes les tables du catalogue en une seule lecture"""
+        tables = {}
+        with self.pool.connection() as conn:
+            # Une seule transaction de lecture : toutes les tables viennent du
+            # même état de la base, même si une écriture est validée entre-temps
+            conn.execute("BEGIN")
+            try:
+                for cle, (table, classe) in TABLES_CATALOGUE.items():
+                    tables[cle] = self._lignes(conn, classe, f'SELECT * FROM {table} ORDER BY 1')
+            finally:
+                conn.rollback()
+        return tables
+
+    @staticmethod
+    def _lignes(conn: sqlite3.Connection, classe, sql: str, params=()) -> List[Record]:
+        """Exécuter une requête et construire un enregistrement par ligne"""
+        cursor = conn.cursor()
+        cursor.row_factory = classe.row_factory
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    # Méthodes pour récupérer les données
+    @mesurer_sql
+    def get_filieres_by_etablissement(self, etablissement_id: int) -> List[Dict]:
+        """Récupérer les filières d'un établissement"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE f.etablissement_id = ?
+            ''', (etablissement_id,))
+
+    @mesurer_sql
+    def get_filieres_by_etablissements(self, etablissement_ids: List[int]) -> Dict[int, List[Filiere]]:
+        """Récupérer les filières de plusieurs établissements, une requête par paquet d'identifiants"""
+        filieres = {etab_id: [] for etab_id in etablissement_ids}
+        ids = list(filieres)
+        if not ids:
+            return filieres
+
+        with self.pool.connection() as conn:
+            # Un établissement n'est que dans un paquet : ses filières restent triées par id
+            for debut in range(0, len(ids), TAILLE_PAQUET_IN):
+                paquet = ids[debut:debut + TAILLE_PAQUET_IN]
+                for filiere in self._lignes(conn, Filiere, f'''
+                    SELECT {COLONNES_FILIERE}
+                    FROM filieres f
+                    JOIN etablissements e ON f.etablissement_id = e.id
+                    WHERE f.etablissement_id IN ({', '.join('?' * len(paquet))})
+                    ORDER BY f.id
+                ''', paquet):
+                    filieres[filiere.etablissement_id].append(filiere)
+        return filieres
+
+    @mesurer_sql
+    def get_etablissements_with_filiere_count(self) -> List[Dict]:
+        """Récupérer les établissements avec leur nombre de filières (une seule requête groupée)"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, EtablissementAvecCompte, f'''
+                SELECT {COLONNES_ETABLISSEMENT}, COUNT(f.id) as nb_filieres
+                FROM etablissements e
+                LEFT JOIN filieres f ON f.etablissement_id = e.id
+                GROUP BY e.id
+                ORDER BY e.id
+            ''')
+
+    @mesurer_sql
+    def get_filiere_details(self, filiere_nom: str) -> Optional[Dict]:
+        """Récupérer les détails d'une filière spécifique"""
+        expression = requete_fts(filiere_nom, phrase=True) if self.has_fts else None
+        with self.pool.connection() as conn:
+            # Nom exact (à la casse et aux accents près) d'abord, comme le snapshot
+            filieres = self._lignes(conn, Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE f.nom_normalise = ?
+                ORDER BY f.id
+                LIMIT 1
+            ''', (normaliser(filiere_nom),))
+            if filieres:
+                return filieres[0]
+
+            if expression:
+                filieres = self._lignes(conn, Filiere, f'''
+                    SELECT {COLONNES_FILIERE}
+                    FROM filieres_fts
+                    JOIN filieres f ON f.id = filieres_fts.rowid
+                    JOIN etablissements e ON f.etablissement_id = e.id
+                    WHERE filieres_fts MATCH ?
+                    ORDER BY bm25(filieres_fts, ?, ?, ?), f.id
+                    LIMIT 1
+                ''', (expression, *POIDS_BM25))
+            else:
+                filieres = self._lignes(conn, Filiere, f'''
+                    SELECT {COLONNES_FILIERE}
+                    FROM filieres f
+                    JOIN etablissements e ON f.etablissement_id = e.id
+                    WHERE f.nom_normalise LIKE ?
+                    ORDER BY f.id
+                    LIMIT 1
+                ''', (f'%{normaliser(filiere_nom)}%',))
+        return filieres[0] if filieres else None
+
+    @mesurer_sql
+    def get_filieres_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les filières par domaine d'intérêt"""
+        # CROSS JOIN fixe l'ordre des jointures : le filtre par sous-chaîne ne
+        # peut utiliser aucun index, on parcourt donc la petite table des
+        # domaines puis idx_filiere_domaines_domaine, jamais toutes les liaisons
+        with self.pool.connection() as conn:
+            return self._lignes(conn, FiliereDomaine, f'''
+                SELECT {COLONNES_FILIERE}, d.nom as domaine_nom
+                FROM domaines_interet d
+                CROSS JOIN filiere_domaines fd ON fd.domaine_id = d.id
+                JOIN filieres f ON f.id = fd.filiere_id
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE d.nom_normalise LIKE ?
+            ''', (f'%{normaliser(domaine)}%',))
+
+    @mesurer_sql
+    def get_filieres_by_type(self, type_filiere: str, etablissement: str = None) -> List[Dict]:
+        """Récupérer les filières par type (professionnelle/classique)"""
+        with self.pool.connection() as conn:
+            if etablissement:
+                return self._lignes(conn, Filiere, f'''
+                    SELECT {COLONNES_FILIERE}
+                    FROM filieres f
+                    JOIN etablissements e ON f.etablissement_id = e.id
+                    WHERE f.type = ? AND e.nom_normalise LIKE ?
+                ''', (type_filiere, f'%{normaliser(etablissement)}%'))
+            return self._lignes(conn, Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE f.type = ?
+            ''', (type_filiere,))
+
+    @staticmethod
+    def _filtres_filieres(domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                          contient: str = None, apres_id: Optional[int] = None) -> Tuple[str, list]:
+        """Clause WHERE et paramètres des filtres de get_filieres"""
+        conditions, params = [], []
+        if domaine is not None:
+            # Sous-requête plutôt que jointure : une filière rattachée à
+            # plusieurs domaines correspondants n'apparaît qu'une fois
+            conditions.append('''f.id IN (
+                SELECT fd.filiere_id
+                FROM domaines_interet d
+                CROSS JOIN filiere_domaines fd ON fd.domaine_id = d.id
+                WHERE d.nom_normalise LIKE ?
+            )''')
+            params.append(f'%{normaliser(domaine)}%')
+        if type_filiere is not None:
+            conditions.append('f.type = ?')
+            params.append(type_filiere)
+        if etablissement is not None:
+            conditions.append('e.nom_normalise LIKE ?')
+            params.append(f'%{normaliser(etablissement)}%')
+        if contient is not None:
+            conditions.append('(f.nom_normalise LIKE ? OR normaliser(f.description) LIKE ?)')
+            params += [f'%{normaliser(contient)}%'] * 2
+        if apres_id is not None:
+            conditions.append('f.id > ?')
+            params.append(apres_id)
+        return ' AND '.join(conditions) or '1', params
+
+    @mesurer_sql
+    def get_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                     contient: str = None, order_by: str = 'id', limit: Optional[int] = None,
+                     offset: int = 0, apres_id: Optional[int] = None) -> List[Dict]:
+        """Récupérer une page de filières filtrées et triées, en une seule requête"""
+        champ, decroissant = analyser_tri(order_by)
+        tri = COLONNES_TRI[champ] + (' DESC' if decroissant else '')
+        if champ != 'id':
+            tri += ', f.id'
+        where, params = self._filtres_filieres(domaine, type_filiere, etablissement, contient, apres_id)
+        with self.pool.connection() as conn:
+            return self._lignes(conn, Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE {where}
+                ORDER BY {tri}
+                LIMIT ? OFFSET ?
+            ''', (*params, -1 if limit is None else limit, offset))
+
+    @mesurer_sql
+    def count_filieres(self, domaine: str = None, type_filiere: str = None,
+                       etablissement: str = None, contient: str = None) -> int:
+        """Nombre de filières correspondant aux filtres de get_filieres"""
+        where, params = self._filtres_filieres(domaine, type_filiere, etablissement, contient)
+        with self.pool.connection() as conn:
+            return conn.execute(f'''
+                SELECT COUNT(*)
+                FROM filieres f
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE {where}
+            ''', params).fetchone()[0]
+
+    @mesurer_sql
+    def get_filieres_similaires(self, filiere_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Filières les plus proches d'une filière, d'après la table précalculée"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, FiliereSimilaire, f'''
+                SELECT {COLONNES_FILIERE}, s.score
+                FROM filiere_similaires s
+                JOIN filieres f ON f.id = s.voisin_id
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE s.filiere_id = ?
+                ORDER BY s.rang
+                LIMIT ?
+            ''', (filiere_id, limit or -1))
+
+    def remplacer_similaires(self, lignes: List[Tuple[int, int, int, float]]) -> int:
+        """Remplacer tout le contenu de filiere_similaires en une transaction"""
+        self._ensure_ready()
+        conn = self.get_connection()
+        try:
+            with conn:
+                # Triggers de version suspendus : une seule incrémentation
+                # pour tout le remplacement au lieu d'une par ligne
+                conn.execute("BEGIN IMMEDIATE")
+                suspendus = migrations.suspendre_index_derives(conn.cursor(), ('filiere_similaires',))
+                conn.execute("DELETE FROM filiere_similaires")
+                conn.executemany(
+                    "INSERT INTO filiere_similaires (filiere_id, rang, voisin_id, score) VALUES (?, ?, ?, ?)",
+                    lignes
+                )
+                migrations.reconstruire_index_derives(conn.cursor(), suspendus)
+        finally:
+            conn.close()
+        return len(lignes)
+
+    def appliquer_ecritures(self, ecritures: List[Ecriture], reconstruire_index: bool = False) -> int:
+        """Appliquer des écritures en une transaction, index dérivés reconstruits à la fin si demandé"""
+        self._ensure_ready()
+        conn = self.get_connection()
+        ecrites = 0
+        try:
+            with conn:
+                # BEGIN explicite : sqlite3 n'ouvrirait pas de transaction avant
+                # les DROP TRIGGER, qui seraient validés immédiatement
+                conn.execute("BEGIN IMMEDIATE")
+                suspendus = migrations.suspendre_index_derives(conn.cursor()) if reconstruire_index else []
+                for operation, table, colonnes, lignes in ecritures:
+                    if operation != 'supprimer':
+                        colonnes, lignes = migrations.avec_nom_normalise(table, colonnes, lignes)
+                    ecrites += len(lignes)
+                    if operation == 'supprimer' and len(colonnes) == 1:
+                        # Par paquets de IN (...) : une seule passe sur la table
+                        # par paquet, même sans index sur la colonne (voisin_id)
+                        valeurs = [ligne[0] for ligne in lignes]
+                        for debut in range(0, len(valeurs), TAILLE_PAQUET_IN):
+                            paquet = valeurs[debut:debut + TAILLE_PAQUET_IN]
+                            conn.execute(f"DELETE FROM {table} WHERE {colonnes[0]} IN "
+                                         f"({', '.join('?' * len(paquet))})", paquet)
+                        continue
+                    if operation == 'inserer':
+                        sql = (f"INSERT INTO {table} ({', '.join(colonnes)}) "
+                               f"VALUES ({', '.join('?' * len(colonnes))})")
+                    elif operation == 'modifier':
+                        sql = f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in colonnes)} WHERE id = ?"
+                    else:
+                        sql = f"DELETE FROM {table} WHERE {' AND '.join(f'{c} = ?' for c in colonnes)}"
+                    conn.executemany(sql, lignes)
+                if suspendus:
+                    migrations.reconstruire_index_derives(conn.cursor(), suspendus)
+        finally:
+            conn.close()
+        return ecrites
+
+    @mesurer_sql
+    def get_etablissements(self) -> List[Dict]:
+        """Récupérer tous les établissements"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, Etablissement, f'SELECT {COLONNES_ETABLISSEMENT} FROM etablissements e')
+
+    @mesurer_sql
+    def get_processus_preinscription(self) -> List[Dict]:
+        """Récupérer le processus de préinscription"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, Etape, 'SELECT * FROM processus_preinscription ORDER BY etape')
+
+    @mesurer_sql
+    def get_documents_requis(self) -> List[Dict]:
+        """Récupérer la liste des documents requis"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, Document, 'SELECT * FROM documents_requis')
+
+    @mesurer_sql
+    def get_dates_importantes(self) -> List[Dict]:
+        """Récupérer les dates importantes"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, DateImportante, 'SELECT * FROM dates_importantes ORDER BY date_debut')
+
+    @mesurer_sql
+    def search_filiere_ids(self, query: str, limit: Optional[int] = None,
+                           phrase: bool = False) -> Optional[List[int]]:
+        """Identifiants des filières correspondant à la recherche, les plus pertinentes d'abord.
+
+        Avec ``phrase``, la requête est cherchée telle quelle dans le seul nom,
+        comme le repli de get_filiere_details. Retourne None quand l'index
+        plein texte ne peut pas servir la requête.
+        """
+        expression = requete_fts(query, phrase=phrase) if self.has_fts else None
+        if expression is None:
+            return None
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT rowid FROM filieres_fts
+                WHERE filieres_fts MATCH ?
+                ORDER BY bm25(filieres_fts, ?, ?, ?), rowid
+                LIMIT ?
+            ''', (expression, *POIDS_BM25, limit or -1))
+            return [row[0] for row in cursor.fetchall()]
+
+    @mesurer_sql
+    def search_filieres(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Rechercher des filières par nom ou description, les plus pertinentes d'abord"""
+        expression = requete_fts(query) if self.has_fts else None
+        with self.pool.connection() as conn:
+            if expression is None:
+                # Recherche par sous-chaîne, quand l'index FTS5 est indisponible
+                return self._lignes(conn, Filiere, f'''
+                    SELECT {COLONNES_FILIERE}
+                    FROM filieres f
+                    JOIN etablissements e ON f.etablissement_id = e.id
+                    WHERE f.nom LIKE ? OR f.description LIKE ?
+                    LIMIT ?
+                ''', (f'%{query}%', f'%{query}%', limit or -1))
+
+            return self._lignes(conn, Filiere, f'''
+                SELECT {COLONNES_FILIERE}
+                FROM filieres_fts
+                JOIN filieres f ON f.id = filieres_fts.rowid
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE filieres_fts MATCH ?
+                ORDER BY bm25(filieres_fts, ?, ?, ?)
+                LIMIT ?
+            ''', (expression, *POIDS_BM25, limit or -1))
+
+    @mesurer_sql
+    def get_etablissements_by_domaine(self, domaine: str) -> List[Dict]:
+        """Récupérer les établissements par domaine d'intérêt"""
+        with self.pool.connection() as conn:
+            return self._lignes(conn, EtablissementDomaine, f'''
+                SELECT DISTINCT {COLONNES_ETABLISSEMENT}, d.nom as domaine_nom
+                FROM domaines_interet d
+                CROSS JOIN filiere_domaines fd ON fd.domaine_id = d.id
+                JOIN filieres f ON f.id = fd.filiere_id
+                JOIN etablissements e ON f.etablissement_id = e.id
+                WHERE d.nom_normalise LIKE ?
+                ORDER BY e.nom
+            ''', (f'%{normaliser(domaine)}%',))
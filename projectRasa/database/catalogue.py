@@ -0,0 +1,256 @@
+import functools
+import unicodedata
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from database.backends.base import analyser_tri
+from database.records import (
+    DateImportante, Document, Domaine, Etablissement, EtablissementAvecCompte,
+    EtablissementDomaine, Etape, Filiere, FiliereDomaine, FiliereSimilaire,
+)
+
+def normaliser(texte: Optional[str]) -> str:
+    """Normaliser un texte pour les comparaisons (minuscules, sans accents)"""
+    if not texte:
+        return ""
+    decompose = unicodedata.normalize('NFKD', texte)
+    sans_accents = ''.join(c for c in decompose if not unicodedata.combining(c))
+    return ' '.join(sans_accents.casefold().split())
+
+def _figer(rows, classe) -> tuple:
+    """Transformer des lignes (dicts ou enregistrements) en tuple d'enregistrements immuables"""
+    return tuple(row if type(row) is classe else classe.depuis(row) for row in rows)
+
+class CatalogueSnapshot:
+    """Copie immuable du catalogue en mémoire, avec index précalculés.
+
+    Le snapshot est construit une seule fois à partir de la base puis n'est
+    plus jamais modifié : un rechargement construit un nouveau snapshot et
+    remplace la référence, ce qui rend l'échange atomique pour les lecteurs.
+    Les méthodes ``get_*`` reproduisent la sémantique des requêtes SQL de
+    ``UniversityDatabase`` (``LIKE '%...%'`` devient une inclusion sur les
+    noms normalisés).
+    """
+
+    def __init__(self, etablissements, filieres, domaines, liaisons,
+                 processus, documents, dates, similaires=(), signature=None):
+        self.signature = signature
+
+        self.etablissements = _figer(etablissements, Etablissement)
+        self.etablissements_by_id = {e['id']: e for e in self.etablissements}
+
+        details = []
+        for filiere in filieres:
+            etab = self.etablissements_by_id.get(filiere['etablissement_id'])
+            if etab is None:
+                # Même comportement que le JOIN des requêtes SQL
+                continue
+            details.append(Filiere.depuis(
+                filiere,
+                etablissement_nom=etab['nom'],
+                contact_etablissement=etab['contact'],
+                site_web_etablissement=etab['site_web'],
+            ))
+        self.filieres = tuple(details)
+        self.filieres_by_id = {f['id']: f for f in self.filieres}
+
+        self.filieres_by_etablissement: Dict[int, Tuple[Mapping, ...]] = {}
+        self.filieres_by_type: Dict[str, Tuple[Mapping, ...]] = {}
+        self.filieres_by_nom: Dict[str, Mapping] = {}
+        by_etab: Dict[int, List[Mapping]] = {}
+        by_type: Dict[str, List[Mapping]] = {}
+        for filiere in self.filieres:
+            by_etab.setdefault(filiere['etablissement_id'], []).append(filiere)
+            by_type.setdefault(filiere['type'], []).append(filiere)
+            self.filieres_by_nom.setdefault(normaliser(filiere['nom']), filiere)
+        self.filieres_by_etablissement = {k: tuple(v) for k, v in by_etab.items()}
+        self.filieres_by_type = {k: tuple(v) for k, v in by_type.items()}
+        self.etablissements_avec_compte = tuple(
+            EtablissementAvecCompte.depuis(e, nb_filieres=len(by_etab.get(e['id'], ())))
+            for e in self.etablissements
+        )
+        self._noms_filieres = tuple(
+            (normaliser(f['nom']), normaliser(f['description']), f)
+            for f in self.filieres
+        )
+        self._textes_filieres = {f['id']: (nom, description) for nom, description, f in self._noms_filieres}
+
+        self.domaines = _figer(domaines, Domaine)
+        self._noms_domaines = tuple((normaliser(d['nom']), d) for d in self.domaines)
+
+        # Filières par domaine, avec le nom du domaine comme dans la requête SQL
+        by_domaine: Dict[int, List[Mapping]] = {}
+        domaines_by_id = {d['id']: d for d in self.domaines}
+        for filiere_id, domaine_id in sorted({(l['filiere_id'], l['domaine_id']) for l in liaisons}):
+            filiere = self.filieres_by_id.get(filiere_id)
+            domaine = domaines_by_id.get(domaine_id)
+            if filiere is None or domaine is None:
+                continue
+            by_domaine.setdefault(domaine_id, []).append(
+                FiliereDomaine.depuis(filiere, domaine_nom=domaine['nom'])
+            )
+        self.filieres_by_domaine = {k: tuple(v) for k, v in by_domaine.items()}
+        # Mêmes filières, sans le nom du domaine, pour get_filieres
+        self._filieres_par_domaine = {
+            k: tuple(self.filieres_by_id[f['id']] for f in v) for k, v in self.filieres_by_domaine.items()
+        }
+
+        # Voisins précalculés de chaque filière, dans l'ordre des rangs ; les
+        # voisins supprimés depuis le calcul sont ignorés, comme par le JOIN SQL
+        par_filiere: Dict[int, List[Tuple[int, Mapping]]] = {}
+        for similarite in similaires:
+            voisin = self.filieres_by_id.get(similarite['voisin_id'])
+            if voisin is None:
+                continue
+            par_filiere.setdefault(similarite['filiere_id'], []).append(
+                (similarite['rang'], FiliereSimilaire.depuis(voisin, score=similarite['score']))
+            )
+        self.similaires_by_filiere: Dict[int, Tuple[Mapping, ...]] = {
+            k: tuple(f for _, f in sorted(v, key=lambda rv: rv[0])) for k, v in par_filiere.items()
+        }
+
+        # Sélections récentes de get_filieres : la pagination (« la suite ») et
+        # count_filieres réutilisent le filtrage et le tri de l'appel précédent
+        self._selection = functools.lru_cache(maxsize=64)(self._selectionner)
+
+        self.processus = _figer(sorted(processus, key=lambda p: p['etape']), Etape)
+        self.documents = _figer(documents, Document)
+        self.dates = _figer(sorted(dates, key=lambda d: d['date_debut'] or ''), DateImportante)
+
+    def _domaines_correspondants(self, domaine: str) -> List[Mapping]:
+        """Domaines dont le nom contient le texte recherché"""
+        recherche = normaliser(domaine)
+        return [d for nom, d in self._noms_domaines if recherche in nom]
+
+    # Équivalents en mémoire des méthodes de UniversityDatabase
+    def get_filieres_by_etablissement(self, etablissement_id: int) -> List[Mapping]:
+        """Récupérer les filières d'un établissement"""
+        return list(self.filieres_by_etablissement.get(etablissement_id, ()))
+
+    def get_filieres_by_etablissements(self, etablissement_ids) -> Dict[int, List[Mapping]]:
+        """Récupérer en une fois les filières de plusieurs établissements"""
+        return {etab_id: list(self.filieres_by_etablissement.get(etab_id, ()))
+                for etab_id in etablissement_ids}
+
+    def get_etablissements_with_filiere_count(self) -> List[Mapping]:
+        """Récupérer les établissements avec leur nombre de filières"""
+        return list(self.etablissements_avec_compte)
+
+    def get_filiere_details(self, filiere_nom: str) -> Optional[Mapping]:
+        """Récupérer les détails d'une filière : nom exact, sinon premier nom (par id) le contenant.
+
+        Sans classement : UniversityDatabase départage d'abord les noms proches
+        avec l'index plein texte du stockage.
+        """
+        recherche = normaliser(filiere_nom)
+        filiere = self.filieres_by_nom.get(recherche)
+        if filiere is not None:
+            return filiere
+        for nom, _, filiere in self._noms_filieres:
+            if recherche in nom:
+                return filiere
+        return None
+
+    def get_filieres_by_domaine(self, domaine: str) -> List[Mapping]:
+        """Récupérer les filières par domaine d'intérêt"""
+        filieres = []
+        for d in self._domaines_correspondants(domaine):
+            filieres.extend(self.filieres_by_domaine.get(d['id'], ()))
+        return filieres
+
+    def get_filieres_by_type(self, type_filiere: str, etablissement: str = None) -> List[Mapping]:
+        """Récupérer les filières par type (professionnelle/classique)"""
+        filieres = self.filieres_by_type.get(type_filiere, ())
+        if etablissement:
+            recherche = normaliser(etablissement)
+            return [f for f in filieres
+                    if recherche in normaliser(f['etablissement_nom'])]
+        return list(filieres)
+
+    def _selectionner(self, domaine: Optional[str], type_filiere: Optional[str],
+                      etablissement: Optional[str], contient: Optional[str],
+                      order_by: str) -> Tuple[Mapping, ...]:
+        """Filières correspondant aux filtres de get_filieres, triées par order_by puis par id"""
+        champ, decroissant = analyser_tri(order_by)
+        if domaine is not None:
+            # Partir de l'index par domaine plutôt que de toutes les filières
+            groupes = [self._filieres_par_domaine.get(d['id'], ())
+                       for d in self._domaines_correspondants(domaine)]
+            if len(groupes) == 1:
+                filieres = groupes[0]
+            else:
+                filieres = sorted({f['id']: f for groupe in groupes for f in groupe}.values(),
+                                  key=lambda f: f['id'])
+            if type_filiere is not None:
+                filieres = [f for f in filieres if f['type'] == type_filiere]
+        elif type_filiere is not None:
+            filieres = self.filieres_by_type.get(type_filiere, ())
+        else:
+            filieres = self.filieres
+
+        if etablissement is not None:
+            recherche = normaliser(etablissement)
+            etab_ids = {e['id'] for e in self.etablissements if recherche in normaliser(e['nom'])}
+            filieres = [f for f in filieres if f['etablissement_id'] in etab_ids]
+        if contient is not None:
+            recherche = normaliser(contient)
+            textes = self._textes_filieres
+            filieres = [f for f in filieres
+                        if recherche in textes[f['id']][0] or recherche in textes[f['id']][1]]
+        if champ != 'id' or decroissant:
+            # Tri stable : les ex æquo restent dans l'ordre des id ; NULL en
+            # premier dans l'ordre croissant, comme en SQL
+            filieres = sorted(filieres, key=lambda f: (f[champ] is not None, f[champ] or ''),
+                              reverse=decroissant)
+        return tuple(filieres)
+
+    def get_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                     contient: str = None, order_by: str = 'id', limit: Optional[int] = None,
+                     offset: int = 0, apres_id: Optional[int] = None) -> List[Mapping]:
+        """Récupérer une page de filières filtrées, triées par order_by puis par id"""
+        filieres = self._selection(domaine, type_filiere, etablissement, contient, order_by)
+        if apres_id is not None:
+            filieres = [f for f in filieres if f['id'] > apres_id]
+        return list(filieres[offset:None if limit is None else offset + limit])
+
+    def count_filieres(self, domaine: str = None, type_filiere: str = None,
+                       etablissement: str = None, contient: str = None) -> int:
+        """Nombre de filières correspondant aux filtres de get_filieres"""
+        return len(self._selection(domaine, type_filiere, etablissement, contient, 'id'))
+
+    def get_filieres_similaires(self, filiere_id: int, limit: Optional[int] = None) -> List[Mapping]:
+        """Filières les plus proches d'une filière, d'après la table précalculée"""
+        return list(self.similaires_by_filiere.get(filiere_id, ())[:limit])
+
+    def get_etablissements(self) -> List[Mapping]:
+        """Récupérer tous les établissements"""
+        return list(self.etablissements)
+
+    def get_processus_preinscription(self) -> List[Mapping]:
+        """Récupérer le processus de préinscription"""
+        return list(self.processus)
+
+    def get_documents_requis(self) -> List[Mapping]:
+        """Récupérer la liste des documents requis"""
+        return list(self.documents)
+
+    def get_dates_importantes(self) -> List[Mapping]:
+        """Récupérer les dates importantes"""
+        return list(self.dates)
+
+    def search_filieres(self, query: str) -> List[Mapping]:
+        """Rechercher des filières par nom ou description"""
+        recherche = normaliser(query)
+        return [f for nom, description, f in self._noms_filieres
+                if recherche in nom or recherche in description]
+
+    def get_etablissements_by_domaine(self, domaine: str) -> List[Mapping]:
+        """Récupérer les établissements par domaine d'intérêt"""
+        resultats = []
+        for d in self._domaines_correspondants(domaine):
+            etab_ids = {f['etablissement_id'] for f in self.filieres_by_domaine.get(d['id'], ())}
+            for etab_id in etab_ids:
+                resultats.append(EtablissementDomaine.depuis(
+                    self.etablissements_by_id[etab_id], domaine_nom=d['nom']
+                ))
+        resultats.sort(key=lambda e: e['nom'])
+        return resultats
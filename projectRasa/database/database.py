@@ -1,547 +1,388 @@
-import sqlite3
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional
+
+from database.backends.base import CatalogueBackend
+from database.backends.sqlite import SQLiteBackend
+from database.catalogue import CatalogueSnapshot, normaliser
+from database.metrics import mesurer_requete
+from database.recommender import FiliereRecommender
+from database.resolver import FuzzyResolver, charger_synonymes
 
 logger = logging.getLogger(__name__)
 
+# Catalogue servi : snapshot et index construits dessus (None tant qu'ils
+# n'ont pas servi), toujours remplacés ensemble
+EtatCatalogue = namedtuple('EtatCatalogue', ('snapshot', 'resolver', 'recommender'))
+
 class UniversityDatabase:
-    def __init__(self, db_path: str = "university_douala.db"):
-        self.db_path = db_path
-        self.init_database()
-
-    def get_connection(self):
-        """Établir une connexion à la base de données"""
-        return sqlite3.connect(self.db_path)
-
-    def init_database(self):
-        """Initialiser la structure de la base de données"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Table des établissements
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS etablissements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                type TEXT NOT NULL,
-                description TEXT,
-                contact TEXT,
-                site_web TEXT
-            )
-        ''')
-
-        # Table des filières
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS filieres (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                type TEXT NOT NULL, -- 'professionnelle' ou 'classique'
-                duree TEXT,
-                description TEXT,
-                debouches TEXT,
-                conditions_admission TEXT,
-                etablissement_id INTEGER,
-                frais_inscription TEXT,
-                FOREIGN KEY (etablissement_id) REFERENCES etablissements (id)
-            )
-        ''')
-
-        # Table des domaines d'intérêt
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS domaines_interet (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                description TEXT
-            )
-        ''')
-
-        # Table de liaison filières-domaines
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS filiere_domaines (
-                filiere_id INTEGER,
-                domaine_id INTEGER,
-                PRIMARY KEY (filiere_id, domaine_id),
-                FOREIGN KEY (filiere_id) REFERENCES filieres (id),
-                FOREIGN KEY (domaine_id) REFERENCES domaines_interet (id)
-            )
-        ''')
-
-        # Table du processus de préinscription
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS processus_preinscription (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                etape INTEGER NOT NULL,
-                description TEXT NOT NULL,
-                details TEXT,
-                liens_utiles TEXT
-            )
-        ''')
-
-        # Table des documents requis
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS documents_requis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type_document TEXT NOT NULL,
-                description TEXT,
-                obligatoire BOOLEAN DEFAULT 1
-            )
-        ''')
-
-        # Table des dates importantes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS dates_importantes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                evenement TEXT NOT NULL,
-                date_debut TEXT,
-                date_fin TEXT,
-                annee_academique TEXT
-            )
-        ''')
-
-        conn.commit()
-        self.populate_sample_data(conn)
-        conn.close()
-
-    def populate_sample_data(self, conn):
-        """Peupler la base avec des données d'exemple pour l'Université de Douala"""
-        cursor = conn.cursor()
-
-        # Vérifier si les données existent déjà
-        cursor.execute("SELECT COUNT(*) FROM etablissements")
-        if cursor.fetchone()[0] > 0:
+    """Accès au catalogue de l'université, quel que soit le stockage.
+
+    Par défaut le catalogue est servi par un fichier SQLite local ; un autre
+    stockage (PostgreSQL, ...) peut être passé via ``backend``. Les lectures
+    sont servies par le snapshot en mémoire, ou directement par le stockage
+    avec ``use_snapshot=False``.
+    """
+
+    def __init__(self, db_path: str = "university_douala.db", pool_size: int = 8,
+                 use_snapshot: bool = True, snapshot_check_interval: float = 2.0,
+                 synonyms_path: Optional[str] = "data/nlu.yml", read_only: bool = False,
+                 backend: Optional[CatalogueBackend] = None):
+        # Rien n'est ouvert ici : le stockage est initialisé au premier usage
+        self.backend = backend or SQLiteBackend(db_path, pool_size=pool_size, read_only=read_only)
+
+        # Catalogue en mémoire et ses index, publiés ensemble et rechargés en
+        # arrière-plan quand le contenu du stockage change
+        self.use_snapshot = use_snapshot
+        self.snapshot_check_interval = snapshot_check_interval
+        self._etat: Optional[EtatCatalogue] = None
+        self._snapshot_checked_at = 0.0
+        # Un seul rechargement à la fois ; _etat_lock protège la publication
+        # et la construction à la demande des index
+        self._reload_lock = threading.Lock()
+        self._etat_lock = threading.Lock()
+
+        # Version du catalogue servi, incrémentée à chaque publication (ou à
+        # chaque modification détectée sans snapshot)
+        self.catalogue_version = 0
+        self._signature = None
+
+        # Résolution approximative des noms et recommandation par pertinence
+        self.synonyms_path = synonyms_path
+        self._synonymes = None
+
+    def init_database(self) -> int:
+        """Créer ou mettre à jour le schéma du stockage"""
+        return self.backend.migrate()
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Exposer les statistiques du pool de connexions (hits, waits, opens)"""
+        return self.backend.stats()
+
+    def close(self):
+        """Fermer proprement les connexions du stockage"""
+        self.backend.close()
+
+    def rouvrir(self):
+        """Rouvrir le stockage (après close() ou dans un worker forké)"""
+        self.backend.rouvrir()
+
+    def modifications_en_attente(self) -> bool:
+        """Indique si le stockage a changé depuis la version servie (une lecture de signature)"""
+        return self.backend.signature(fraiche=True) != self._signature
+
+    def check_for_changes(self) -> int:
+        """Vérifier (au plus toutes les snapshot_check_interval s) si la base a changé.
+
+        La signature comparée est celle que le stockage relève en tâche de
+        fond : aucune lecture ni préparation de la base ici, cette méthode
+        peut donc être appelée à chaque tour depuis la boucle d'événements.
+        Un changement lance le rechargement en arrière-plan, sans attendre.
+        Retourne la version du catalogue servi.
+        """
+        now = time.monotonic()
+        if now - self._snapshot_checked_at >= self.snapshot_check_interval:
+            self._snapshot_checked_at = now
+            signature = self.backend.signature()
+            # None : stockage pas encore préparé, rien n'a pu être servi
+            if signature is not None and signature != self._signature:
+                if not self.use_snapshot:
+                    self._signature = signature
+                    self.catalogue_version += 1
+                elif self._etat is not None:
+                    self._lancer_rechargement()
+        return self.catalogue_version
+
+    def _synonymes_charges(self) -> Dict[str, str]:
+        """Synonymes du résolveur, lus une seule fois"""
+        if self._synonymes is None:
+            self._synonymes = charger_synonymes(self.synonyms_path) if self.synonyms_path else {}
+        return self._synonymes
+
+    def _construire_etat(self, precedent: Optional[EtatCatalogue]) -> EtatCatalogue:
+        """Charger un nouveau snapshot et reconstruire les index déjà utilisés.
+
+        Les index servis par l'état précédent sont reconstruits ici, avant
+        la publication : après l'échange, aucun lecteur n'a à les construire.
+        """
+        debut = time.perf_counter()
+        # Lue avant les tables : une écriture entre les deux provoque un rechargement de plus
+        signature = self.backend.signature(fraiche=True)
+        snapshot = CatalogueSnapshot(**self.backend.load_tables(), signature=signature)
+        resolver = recommender = None
+        if precedent is not None and precedent.resolver is not None:
+            resolver = FuzzyResolver(snapshot, self._synonymes_charges())
+        if precedent is not None and precedent.recommender is not None:
+            recommender = self._construire_recommender(snapshot, precedent.recommender)
+        logger.info("Catalogue chargé en mémoire (%d filières) en %.2fs",
+                    len(snapshot.filieres), time.perf_counter() - debut)
+        return EtatCatalogue(snapshot, resolver, recommender)
+
+    def _publier(self, etat: EtatCatalogue):
+        """Remplacer atomiquement le catalogue servi et ses index"""
+        with self._etat_lock:
+            self._etat = etat
+            self._signature = etat.snapshot.signature
+            self.catalogue_version += 1
+        self._snapshot_checked_at = time.monotonic()
+
+    def _lancer_rechargement(self):
+        """Recharger le catalogue dans un thread ; les lecteurs gardent l'état publié jusqu'à l'échange"""
+        # Pas de rechargements simultanés : un seul thread à la fois
+        if not self._reload_lock.acquire(blocking=False):
             return
 
-        # Établissements
-        etablissements = [
-            ("Faculté des Sciences", "Faculté", 
-             "Formation en sciences fondamentales et appliquées", 
-             "+237 233 40 20 10", "http://sciences.univ-douala.cm"),
-            ("Faculté de Médecine et des Sciences Biomédicales", "Faculté",
-             "Formation des professionnels de santé",
-             "+237 233 40 20 20", "http://medecine.univ-douala.cm"),
-            ("Faculté des Sciences Juridiques et Politiques", "Faculté",
-             "Formation en droit et sciences politiques",
-             "+237 233 40 20 30", "http://droit.univ-douala.cm"),
-            ("Institut Universitaire de Technologie (IUT)", "Institut",
-             "Formations technologiques et professionnelles",
-             "+237 233 40 20 40", "http://iut.univ-douala.cm"),
-            ("École Normale Supérieure (ENS)", "École",
-             "Formation des enseignants",
-             "+237 233 40 20 50", "http://ens.univ-douala.cm")
-        ]
-
-        cursor.executemany(
-            "INSERT INTO etablissements (nom, type, description, contact, site_web) VALUES (?, ?, ?, ?, ?)",
-            etablissements
-        )
-
-        # Domaines d'intérêt
-        domaines = [
-            ("Sciences et Technologies", "Domaines scientifiques et technologiques"),
-            ("Santé et Médecine", "Domaines de la santé et médecine"),
-            ("Droit et Sciences Politiques", "Domaines juridiques et politiques"),
-            ("Sciences Économiques", "Domaines économiques et de gestion"),
-            ("Lettres et Sciences Humaines", "Domaines littéraires et humaines"),
-            ("Éducation et Formation", "Domaines de l'éducation et formation")
-        ]
-
-        cursor.executemany(
-            "INSERT INTO domaines_interet (nom, description) VALUES (?, ?)",
-            domaines
-        )
-
-        # Filieres pour la Faculté des Sciences (professionnelles et classiques)
-        filieres_sciences = [
-            # Filieres classiques
-            ("Licence en Mathématiques", "classique", "3 ans", 
-             "Formation fondamentale en mathématiques pures et appliquées",
-             "Enseignement, Recherche, Industries", "Baccalauréat C ou D", 1, "50,000 FCFA"),
-            
-            ("Licence en Physique", "classique", "3 ans",
-             "Formation en physique fondamentale et expérimentale",
-             "Enseignement, Recherche, Laboratoires", "Baccalauréat C ou D", 1, "50,000 FCFA"),
-            
-            ("Licence en Chimie", "classique", "3 ans",
-             "Formation en chimie analytique et organique",
-             "Industries chimiques, Laboratoires, Recherche", "Baccalauréat C ou D", 1, "50,000 FCFA"),
-            
-            # Filieres professionnelles
-            ("Licence Professionnelle en Informatique", "professionnelle", "3 ans",
-             "Formation pratique en développement logiciel et réseaux",
-             "Développeur, Administrateur réseaux, Analyste", "Baccalauréat C, D ou E", 1, "75,000 FCFA"),
-            
-            ("Licence Professionnelle en Électronique", "professionnelle", "3 ans",
-             "Formation en électronique et télécommunications",
-             "Technicien supérieur, Maintenance électronique", "Baccalauréat C, D ou E", 1, "75,000 FCFA"),
-            
-            ("Licence Professionnelle en Génie Civil", "professionnelle", "3 ans",
-             "Formation technique en construction et bâtiment",
-             "Technicien BTP, Conducteur de travaux", "Baccalauréat C, D ou E", 1, "75,000 FCFA")
-        ]
-
-        cursor.executemany(
-            "INSERT INTO filieres (nom, type, duree, description, debouches, conditions_admission, etablissement_id, frais_inscription) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            filieres_sciences
-        )
-
-        # Autres filières
-        autres_filieres = [
-            ("Médecine Générale", "classique", "7 ans",
-             "Formation complète en médecine générale",
-             "Médecin généraliste, Spécialisation", "Baccalauréat C avec mention", 2, "100,000 FCFA"),
-            
-            ("Droit Privé", "classique", "4 ans",
-             "Formation en droit civil et commercial",
-             "Avocat, Juriste d'entreprise, Notaire", "Baccalauréat toutes séries", 3, "45,000 FCFA"),
-            
-            ("DUT en Génie Informatique", "professionnelle", "2 ans",
-             "Formation technique en informatique industrielle",
-             "Technicien informatique, Support technique", "Baccalauréat C, D ou technique", 4, "60,000 FCFA")
-        ]
-
-        cursor.executemany(
-            "INSERT INTO filieres (nom, type, duree, description, debouches, conditions_admission, etablissement_id, frais_inscription) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            autres_filieres
-        )
-
-        # Liaisons filières-domaines
-        filiere_domaines = [
-            (1, 1), (2, 1), (3, 1), (4, 1), (5, 1), (6, 1),  # Sciences
-            (7, 2),  # Santé
-            (8, 3), (9, 3),  # Droit
-            (4, 1), (5, 1), (6, 1), (9, 1)  # Technologies
-        ]
-
-        cursor.executemany(
-            "INSERT OR IGNORE INTO filiere_domaines (filiere_id, domaine_id) VALUES (?, ?)",
-            filiere_domaines
-        )
-
-        # Processus de préinscription
-        processus = [
-            (1, "Création de compte", 
-             "Se créer un compte sur la plateforme de préinscription",
-             "Rendez-vous sur http://preinscription.univ-douala.cm et cliquez sur 'Créer un compte'"),
-            
-            (2, "Remplissage du formulaire",
-             "Compléter le formulaire de préinscription en ligne",
-             "Fournir toutes les informations personnelles et académiques requises"),
-            
-            (3, "Upload des documents",
-             "Téléverser les documents numérisés requis",
-             "Documents à fournir : BAC, relevés de notes, photo d'identité, acte de naissance"),
-            
-            (4, "Validation du dossier",
-             "Soumission et validation finale du dossier",
-             "Vérifier toutes les informations avant soumission définitive")
-        ]
-
-        cursor.executemany(
-            "INSERT INTO processus_preinscription (etape, description, details, liens_utiles) VALUES (?, ?, ?, ?)",
-            processus
-        )
-
-        # Documents requis
-        documents = [
-            ("BAC ou équivalent", "Diplôme du Baccalauréat ou équivalent", 1),
-            ("Relevés de notes", "Relevés de notes du secondaire", 1),
-            ("Photo d'identité", "Photo d'identité récente format 4x4", 1),
-            ("Acte de naissance", "Copie d'acte de naissance", 1),
-            ("Certificat médical", "Certificat médical de non contre-indication", 0),
-            ("Lettre de motivation", "Lettre de motivation (pour certaines filières)", 0)
-        ]
-
-        cursor.executemany(
-            "INSERT INTO documents_requis (type_document, description, obligatoire) VALUES (?, ?, ?)",
-            documents
-        )
-
-        # Dates importantes
-        dates = [
-            ("Ouverture préinscription", "2024-06-01", "2024-07-15", "2024-2025"),
-            ("Clôture préinscription", "2024-07-15", "2024-07-15", "2024-2025"),
-            ("Début des cours", "2024-09-02", "2024-09-02", "2024-2025")
-        ]
-
-        cursor.executemany(
-            "INSERT INTO dates_importantes (evenement, date_debut, date_fin, annee_academique) VALUES (?, ?, ?, ?)",
-            dates
-        )
-
-        conn.commit()
+        def recharger():
+            try:
+                self._publier(self._construire_etat(self._etat))
+            except Exception:
+                logger.exception("Rechargement du catalogue impossible, l'ancien reste servi")
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=recharger, name="catalogue-rechargement", daemon=True).start()
+
+    def reload(self) -> CatalogueSnapshot:
+        """Recharger le catalogue maintenant et le publier avec ses index"""
+        with self._reload_lock:
+            etat = self._construire_etat(self._etat)
+            self._publier(etat)
+            return etat.snapshot
+
+    def _etat_courant(self) -> EtatCatalogue:
+        """État publié, chargé au premier accès"""
+        etat = self._etat
+        if etat is None:
+            with self._reload_lock:
+                if self._etat is None:
+                    self._publier(self._construire_etat(None))
+                return self._etat
+        self.check_for_changes()
+        return etat
+
+    @property
+    def snapshot(self) -> CatalogueSnapshot:
+        """Snapshot courant du catalogue, rechargé en arrière-plan si la base a été modifiée"""
+        return self._etat_courant().snapshot
+
+    @property
+    def resolver(self) -> FuzzyResolver:
+        """Résolveur approximatif construit sur le snapshot courant"""
+        etat = self._etat_courant()
+        if etat.resolver is not None:
+            return etat.resolver
+        with self._etat_lock:
+            etat = self._etat
+            if etat.resolver is None:
+                etat = self._etat = etat._replace(resolver=FuzzyResolver(etat.snapshot, self._synonymes_charges()))
+            return etat.resolver
+
+    @staticmethod
+    def _construire_recommender(snapshot: CatalogueSnapshot,
+                                precedent: Optional[FiliereRecommender]) -> FiliereRecommender:
+        """Construire l'index de recommandation d'un snapshot"""
+        recommender = FiliereRecommender(snapshot, precedent=precedent)
+        logger.info("Index de recommandation construit (%d filières, %d reprises)",
+                    len(recommender.filieres), recommender.reutilisees)
+        return recommender
+
+    @property
+    def recommender(self) -> FiliereRecommender:
+        """Index de recommandation construit sur le snapshot courant.
+
+        À chaque nouveau snapshot, seules les filières ajoutées ou modifiées
+        sont re-vectorisées ; les autres reprennent les termes de l'index précédent.
+        """
+        etat = self._etat_courant()
+        if etat.recommender is not None:
+            return etat.recommender
+        with self._etat_lock:
+            etat = self._etat
+            if etat.recommender is None:
+                etat = self._etat = etat._replace(recommender=self._construire_recommender(etat.snapshot, None))
+            return etat.recommender
+
+    @mesurer_requete
+    def resolve(self, texte: str, kind: Optional[str] = None, k: int = 3,
+                min_score: float = 0.3) -> List[tuple]:
+        """Trouver les enregistrements les plus proches d'un nom mal orthographié.
+
+        ``kind`` restreint la recherche à 'filiere', 'etablissement' ou 'domaine'.
+        Retourne une liste de couples (enregistrement, score) triée par score.
+        """
+        return self.resolver.resolve(texte, kind=kind, k=k, min_score=min_score)
+
+    @mesurer_requete
+    def recommander_filieres(self, domaine: str = None, type_filiere: str = None, texte: str = None,
+                             k: int = 3, offset: int = 0) -> List[tuple]:
+        """Recommander les filières les plus pertinentes pour les préférences de l'utilisateur.
+
+        Retourne une liste de couples (filière, score) triée par score décroissant ;
+        ``offset`` saute les premières recommandations (pour « la suite »).
+        """
+        return self.recommender.recommander(domaine, type_filiere, texte, k=k, offset=offset)
+
+    @mesurer_requete
+    def count_recommandations(self, domaine: str = None, type_filiere: str = None, texte: str = None) -> int:
+        """Compter les filières pertinentes pour les préférences de l'utilisateur"""
+        return self.recommender.compter(domaine, type_filiere, texte)
+
+    @mesurer_requete
+    def calculer_filieres_similaires(self, filiere_id: int, k: int = 3) -> List[tuple]:
+        """Filières les plus proches d'une filière, calculées à la volée par l'index de recommandation.
+
+        Sert quand la table filiere_similaires n'a pas (encore) de voisins
+        pour cette filière. Retourne une liste de couples (filière, score).
+        """
+        return self.recommender.voisins_de(filiere_id, k)
 
     # Méthodes pour récupérer les données
+    @mesurer_requete
     def get_filieres_by_etablissement(self, etablissement_id: int) -> List[Dict]:
         """Récupérer les filières d'un établissement"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT f.*, e.nom as etablissement_nom 
-            FROM filieres f 
-            JOIN etablissements e ON f.etablissement_id = e.id 
-            WHERE f.etablissement_id = ?
-        ''', (etablissement_id,))
-        
-        filieres = []
-        for row in cursor.fetchall():
-            filieres.append({
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'duree': row[3],
-                'description': row[4],
-                'debouches': row[5],
-                'conditions_admission': row[6],
-                'etablissement_id': row[7],
-                'frais_inscription': row[8],
-                'etablissement_nom': row[9]
-            })
-        
-        conn.close()
-        return filieres
-
+        if self.use_snapshot:
+            return self.snapshot.get_filieres_by_etablissement(etablissement_id)
+        return self.backend.get_filieres_by_etablissement(etablissement_id)
+
+    @mesurer_requete
+    def get_filieres_by_etablissements(self, etablissement_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Récupérer en une seule requête les filières de plusieurs établissements"""
+        etablissement_ids = list(etablissement_ids)
+        if self.use_snapshot:
+            return self.snapshot.get_filieres_by_etablissements(etablissement_ids)
+        return self.backend.get_filieres_by_etablissements(etablissement_ids)
+
+    @mesurer_requete
+    def get_etablissements_with_filiere_count(self) -> List[Dict]:
+        """Récupérer les établissements avec leur nombre de filières (une seule requête groupée)"""
+        if self.use_snapshot:
+            return self.snapshot.get_etablissements_with_filiere_count()
+        return self.backend.get_etablissements_with_filiere_count()
+
+    @mesurer_requete
     def get_filiere_details(self, filiere_nom: str) -> Optional[Dict]:
         """Récupérer les détails d'une filière spécifique"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT f.*, e.nom as etablissement_nom, e.contact, e.site_web
-            FROM filieres f 
-            JOIN etablissements e ON f.etablissement_id = e.id 
-            WHERE f.nom LIKE ?
-        ''', (f'%{filiere_nom}%',))
-        
-        row = cursor.fetchone()
-        if row:
-            result = {
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'duree': row[3],
-                'description': row[4],
-                'debouches': row[5],
-                'conditions_admission': row[6],
-                'etablissement_id': row[7],
-                'frais_inscription': row[8],
-                'etablissement_nom': row[9],
-                'contact_etablissement': row[10],
-                'site_web_etablissement': row[11]
-            }
-        else:
-            result = None
-        
-        conn.close()
-        return result
-
+        if self.use_snapshot:
+            snapshot = self.snapshot
+            filiere = snapshot.filieres_by_nom.get(normaliser(filiere_nom))
+            if filiere is not None:
+                return filiere
+            # Entre plusieurs noms proches, le classement plein texte du stockage
+            # départage, comme sans snapshot ; le snapshot fournit la ligne
+            ids = self.backend.search_filiere_ids(filiere_nom, limit=1, phrase=True)
+            if ids is None:
+                return snapshot.get_filiere_details(filiere_nom)
+            return snapshot.filieres_by_id.get(ids[0]) if ids else None
+        return self.backend.get_filiere_details(filiere_nom)
+
+    @mesurer_requete
     def get_filieres_by_domaine(self, domaine: str) -> List[Dict]:
         """Récupérer les filières par domaine d'intérêt"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT f.*, e.nom as etablissement_nom, d.nom as domaine_nom
-            FROM filieres f
-            JOIN etablissements e ON f.etablissement_id = e.id
-            JOIN filiere_domaines fd ON f.id = fd.filiere_id
-            JOIN domaines_interet d ON fd.domaine_id = d.id
-            WHERE d.nom LIKE ?
-        ''', (f'%{domaine}%',))
-        
-        filieres = []
-        for row in cursor.fetchall():
-            filieres.append({
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'duree': row[3],
-                'description': row[4],
-                'debouches': row[5],
-                'conditions_admission': row[6],
-                'etablissement_id': row[7],
-                'frais_inscription': row[8],
-                'etablissement_nom': row[9],
-                'domaine_nom': row[10]
-            })
-        
-        conn.close()
-        return filieres
+        if self.use_snapshot:
+            return self.snapshot.get_filieres_by_domaine(domaine)
+        return self.backend.get_filieres_by_domaine(domaine)
 
+    @mesurer_requete
     def get_filieres_by_type(self, type_filiere: str, etablissement: str = None) -> List[Dict]:
         """Récupérer les filières par type (professionnelle/classique)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        if etablissement:
-            cursor.execute('''
-                SELECT f.*, e.nom as etablissement_nom
-                FROM filieres f
-                JOIN etablissements e ON f.etablissement_id = e.id
-                WHERE f.type = ? AND e.nom LIKE ?
-            ''', (type_filiere, f'%{etablissement}%'))
-        else:
-            cursor.execute('''
-                SELECT f.*, e.nom as etablissement_nom
-                FROM filieres f
-                JOIN etablissements e ON f.etablissement_id = e.id
-                WHERE f.type = ?
-            ''', (type_filiere,))
-        
-        filieres = []
-        for row in cursor.fetchall():
-            filieres.append({
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'duree': row[3],
-                'description': row[4],
-                'debouches': row[5],
-                'conditions_admission': row[6],
-                'etablissement_id': row[7],
-                'frais_inscription': row[8],
-                'etablissement_nom': row[9]
-            })
-        
-        conn.close()
-        return filieres
+        if self.use_snapshot:
+            return self.snapshot.get_filieres_by_type(type_filiere, etablissement)
+        return self.backend.get_filieres_by_type(type_filiere, etablissement)
+
+    @mesurer_requete
+    def get_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                     contient: str = None, order_by: str = 'id', limit: Optional[int] = None,
+                     offset: int = 0, apres_id: Optional[int] = None) -> List[Dict]:
+        """Récupérer une page de filières filtrées et triées (voir CatalogueBackend.get_filieres)"""
+        if self.use_snapshot:
+            return self.snapshot.get_filieres(domaine, type_filiere, etablissement, contient,
+                                              order_by, limit, offset, apres_id)
+        return self.backend.get_filieres(domaine, type_filiere, etablissement, contient,
+                                         order_by, limit, offset, apres_id)
+
+    @mesurer_requete
+    def count_filieres(self, domaine: str = None, type_filiere: str = None,
+                       etablissement: str = None, contient: str = None) -> int:
+        """Nombre de filières correspondant aux filtres de get_filieres"""
+        if self.use_snapshot:
+            return self.snapshot.count_filieres(domaine, type_filiere, etablissement, contient)
+        return self.backend.count_filieres(domaine, type_filiere, etablissement, contient)
+
+    @mesurer_requete
+    def get_filieres_similaires(self, filiere_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Récupérer les filières les plus proches d'une filière (table précalculée)"""
+        if self.use_snapshot:
+            return self.snapshot.get_filieres_similaires(filiere_id, limit)
+        return self.backend.get_filieres_similaires(filiere_id, limit)
+
+    def iter_filieres(self, domaine: str = None, type_filiere: str = None, etablissement: str = None,
+                      contient: str = None, taille_lot: int = 500) -> Iterator[Dict]:
+        """Parcourir les filières filtrées dans l'ordre des id, sans tout charger d'un coup.
+
+        Sans snapshot, les filières sont lues par lots de ``taille_lot`` avec
+        une pagination par identifiant (``apres_id``) : chaque lot est une
+        requête courte qui ne garde pas de connexion entre deux lots.
+        """
+        if self.use_snapshot:
+            yield from self.snapshot.get_filieres(domaine, type_filiere, etablissement, contient)
+            return
+
+        apres_id = None
+        while True:
+            lot = self.backend.get_filieres(domaine, type_filiere, etablissement, contient,
+                                            limit=taille_lot, apres_id=apres_id)
+            yield from lot
+            if len(lot) < taille_lot:
+                return
+            apres_id = lot[-1]['id']
 
+    @mesurer_requete
     def get_etablissements(self) -> List[Dict]:
         """Récupérer tous les établissements"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM etablissements')
-        
-        etablissements = []
-        for row in cursor.fetchall():
-            etablissements.append({
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'description': row[3],
-                'contact': row[4],
-                'site_web': row[5]
-            })
-        
-        conn.close()
-        return etablissements
+        if self.use_snapshot:
+            return self.snapshot.get_etablissements()
+        return self.backend.get_etablissements()
 
+    @mesurer_requete
     def get_processus_preinscription(self) -> List[Dict]:
         """Récupérer le processus de préinscription"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM processus_preinscription ORDER BY etape')
-        
-        processus = []
-        for row in cursor.fetchall():
-            processus.append({
-                'id': row[0],
-                'etape': row[1],
-                'description': row[2],
-                'details': row[3],
-                'liens_utiles': row[4]
-            })
-        
-        conn.close()
-        return processus
+        if self.use_snapshot:
+            return self.snapshot.get_processus_preinscription()
+        return self.backend.get_processus_preinscription()
 
+    @mesurer_requete
     def get_documents_requis(self) -> List[Dict]:
         """Récupérer la liste des documents requis"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM documents_requis')
-        
-        documents = []
-        for row in cursor.fetchall():
-            documents.append({
-                'id': row[0],
-                'type_document': row[1],
-                'description': row[2],
-                'obligatoire': bool(row[3])
-            })
-        
-        conn.close()
-        return documents
+        if self.use_snapshot:
+            return self.snapshot.get_documents_requis()
+        return self.backend.get_documents_requis()
 
+    @mesurer_requete
     def get_dates_importantes(self) -> List[Dict]:
         """Récupérer les dates importantes"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM dates_importantes ORDER BY date_debut')
-        
-        dates = []
-        for row in cursor.fetchall():
-            dates.append({
-                'id': row[0],
-                'evenement': row[1],
-                'date_debut': row[2],
-                'date_fin': row[3],
-                'annee_academique': row[4]
-            })
-        
-        conn.close()
-        return dates
-
-    def search_filieres(self, query: str) -> List[Dict]:
-        """Rechercher des filières par nom ou description"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT f.*, e.nom as etablissement_nom
-            FROM filieres f
-            JOIN etablissements e ON f.etablissement_id = e.id
-            WHERE f.nom LIKE ? OR f.description LIKE ?
-        ''', (f'%{query}%', f'%{query}%'))
-        
-        filieres = []
-        for row in cursor.fetchall():
-            filieres.append({
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'duree': row[3],
-                'description': row[4],
-                'debouches': row[5],
-                'conditions_admission': row[6],
-                'etablissement_id': row[7],
-                'frais_inscription': row[8],
-                'etablissement_nom': row[9]
-            })
-        
-        conn.close()
-        return filieres
-
+        if self.use_snapshot:
+            return self.snapshot.get_dates_importantes()
+        return self.backend.get_dates_importantes()
+
+    @mesurer_requete
+    def search_filieres(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Rechercher des filières par nom ou description, les plus pertinentes d'abord"""
+        if not self.use_snapshot:
+            return self.backend.search_filieres(query, limit)
+
+        # L'index plein texte ne renvoie que les identifiants, les lignes viennent du snapshot
+        ids = self.backend.search_filiere_ids(query, limit)
+        if ids is None:
+            filieres = self.snapshot.search_filieres(query)
+            return filieres[:limit] if limit else filieres
+        filieres_by_id = self.snapshot.filieres_by_id
+        return [filieres_by_id[i] for i in ids if i in filieres_by_id]
+
+    @mesurer_requete
     def get_etablissements_by_domaine(self, domaine: str) -> List[Dict]:
         """Récupérer les établissements par domaine d'intérêt"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT DISTINCT e.*, d.nom as domaine_nom
-            FROM etablissements e
-            JOIN filieres f ON f.etablissement_id = e.id
-            JOIN filiere_domaines fd ON f.id = fd.filiere_id
-            JOIN domaines_interet d ON fd.domaine_id = d.id
-            WHERE d.nom LIKE ?
-            ORDER BY e.nom
-        ''', (f'%{domaine}%',))
-        
-        etablissements = []
-        for row in cursor.fetchall():
-            etablissements.append({
-                'id': row[0],
-                'nom': row[1],
-                'type': row[2],
-                'description': row[3],
-                'contact': row[4],
-                'site_web': row[5],
-                'domaine_nom': row[6]
-            })
-        
-        conn.close()
-        return etablissements
\ No newline at end of file
+        if self.use_snapshot:
+            return self.snapshot.get_etablissements_by_domaine(domaine)
+        return self.backend.get_etablissements_by_domaine(domaine)
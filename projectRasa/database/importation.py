@@ -0,0 +1,356 @@
+"""Import en masse de catalogues d'établissements depuis des fichiers CSV ou JSON.
+
+Chaque fichier décrit une table : etablissements, domaines ou filieres
+(d'après le début de son nom, ou --table). Formats acceptés :
+- ``.csv`` : une ligne d'en-tête avec les noms des colonnes ;
+- ``.jsonl`` : un objet JSON par ligne ;
+- ``.json`` : une liste d'objets, ou un objet {"etablissements": [...], "filieres": [...]}.
+
+Toutes les lignes valides sont gardées en mémoire, par table et par clé
+naturelle, puis comparées au catalogue existant : le nom normalisé, et pour
+une filière le nom de son établissement (colonne ``etablissement``) et son
+nom. La mémoire utilisée croît donc avec la taille des fichiers ; un
+fichier ``.json`` est de plus chargé en entier avant d'être lu, alors que
+``.csv`` et ``.jsonl`` sont lus ligne à ligne. Les lignes sont gardées
+jusqu'au bout parce que l'import est tout ou rien et que
+``--supprimer-absentes`` doit connaître toutes les filières importées.
+Seules les lignes nouvelles ou modifiées sont écrites : relancer un import
+ne change rien. La colonne facultative ``domaines`` d'une filière liste ses
+domaines séparés par des « ; » ; sans cette colonne, ses domaines ne sont
+pas modifiés.
+
+Toutes les écritures passent par executemany en une seule transaction, et
+aucune n'est faite si une ligne est invalide. Quand une grande part des
+filières change, l'index plein texte est reconstruit une fois à la fin
+plutôt que ligne à ligne ; les filières similaires sont recalculées une
+fois si des filières ont changé.
+
+Usage (depuis projectRasa/) :
+    python -m database.importation etablissements.csv filieres.csv
+    python -m database.importation catalogue.json --simulation
+    python -m database.importation filieres_udo.jsonl --url sqlite:////tmp/bench.db --supprimer-absentes
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from database.backends import backend_from_config, create_backend
+from database.backends.base import CatalogueBackend, Ecriture
+from database.catalogue import normaliser
+from database.similaires import construire_similaires
+
+# Tables importables : nom dans les fichiers -> (table SQL, colonnes, colonnes obligatoires)
+SCHEMAS = {
+    'etablissements': ('etablissements', ('nom', 'type', 'description', 'contact', 'site_web'),
+                       ('nom', 'type')),
+    'domaines': ('domaines_interet', ('nom', 'description'), ('nom',)),
+    'filieres': ('filieres', ('nom', 'type', 'duree', 'description', 'debouches', 'conditions_admission',
+                              'etablissement', 'frais_inscription', 'domaines'),
+                 ('nom', 'type', 'etablissement')),
+}
+
+# Colonnes écrites dans filieres, l'établissement étant résolu en etablissement_id
+COLONNES_FILIERE = ('nom', 'type', 'duree', 'description', 'debouches', 'conditions_admission',
+                    'etablissement_id', 'frais_inscription')
+
+TYPES_FILIERE = ('professionnelle', 'classique')
+
+# Au-delà de cette part des filières écrites, les index dérivés sont
+# reconstruits en une passe plutôt que tenus à jour ligne à ligne
+PART_RECONSTRUCTION = 0.2
+
+def _texte(valeur) -> Optional[str]:
+    """Valeur d'une cellule sans espaces superflus ; None si elle est vide"""
+    if valeur is None:
+        return None
+    texte = str(valeur).strip()
+    return texte or None
+
+def _table_du_fichier(chemin: Path) -> str:
+    """Table décrite par un fichier, d'après le début de son nom"""
+    nom = chemin.stem.lower()
+    for table in SCHEMAS:
+        if nom.startswith(table):
+            return table
+    raise ValueError(f"{chemin} : table inconnue, nommez le fichier {', '.join(SCHEMAS)}... ou utilisez --table")
+
+def lire_fichier(chemin: str, table: Optional[str] = None) -> Iterator[Tuple[str, int, Mapping]]:
+    """Lignes d'un fichier d'import : (table, numéro de ligne, valeurs) ; un .json est chargé en entier"""
+    chemin = Path(chemin)
+    suffixe = chemin.suffix.lower()
+    if suffixe == '.csv':
+        table = table or _table_du_fichier(chemin)
+        with open(chemin, newline='', encoding='utf-8-sig') as f:
+            # La ligne 1 est l'en-tête
+            for numero, ligne in enumerate(csv.DictReader(f), start=2):
+                yield table, numero, ligne
+    elif suffixe in ('.jsonl', '.ndjson'):
+        table = table or _table_du_fichier(chemin)
+        with open(chemin, encoding='utf-8') as f:
+            for numero, texte in enumerate(f, start=1):
+                if not texte.strip():
+                    continue
+                try:
+                    yield table, numero, json.loads(texte)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{chemin}:{numero} : JSON invalide ({e})")
+    elif suffixe == '.json':
+        with open(chemin, encoding='utf-8') as f:
+            donnees = json.load(f)
+        if isinstance(donnees, dict):
+            groupes = list(donnees.items())
+        else:
+            groupes = [(table or _table_du_fichier(chemin), donnees)]
+        for nom_table, lignes in groupes:
+            # Chaque élément de la liste est ensuite validé par Importation.ajouter
+            if not isinstance(lignes, list):
+                raise ValueError(f"{chemin} : {nom_table} doit être une liste d'objets, "
+                                 f"pas {type(lignes).__name__}")
+            for numero, ligne in enumerate(lignes, start=1):
+                yield nom_table, numero, ligne
+    else:
+        raise ValueError(f"{chemin} : format non pris en charge (csv, jsonl ou json)")
+
+class Importation:
+    """Lignes d'un import, validées puis comparées au catalogue existant.
+
+    ``lire`` accumule les lignes valides par clé naturelle et les erreurs ;
+    ``planifier`` calcule les écritures qui amènent le catalogue à ce
+    contenu et remplit ``bilan`` (lignes ajoutées, modifiées, inchangées et
+    supprimées par table).
+    """
+
+    def __init__(self):
+        # table -> clé naturelle -> valeurs validées
+        self.lignes: Dict[str, Dict[Tuple, Dict]] = {table: {} for table in SCHEMAS}
+        self._origines: Dict[Tuple, str] = {}
+        self.erreurs: List[str] = []
+        self.lues = 0
+        self.bilan: Dict[str, Dict[str, int]] = {}
+        self.filieres_modifiees = False
+
+    def lire(self, chemin: str, table: Optional[str] = None):
+        """Lire et valider toutes les lignes d'un fichier"""
+        try:
+            for nom_table, numero, valeurs in lire_fichier(chemin, table):
+                self.lues += 1
+                self.ajouter(nom_table, valeurs, f"{chemin}:{numero}")
+        except (OSError, ValueError) as e:
+            self.erreurs.append(str(e))
+
+    def ajouter(self, table: str, valeurs: Mapping, origine: str):
+        """Valider une ligne et la retenir sous sa clé naturelle"""
+        if table not in SCHEMAS:
+            self.erreurs.append(f"{origine} : table inconnue {table!r} (attendu : {', '.join(SCHEMAS)})")
+            return
+        if not isinstance(valeurs, Mapping):
+            self.erreurs.append(f"{origine} : objet attendu")
+            return
+        _, colonnes, obligatoires = SCHEMAS[table]
+        inconnues = [c for c in valeurs if c not in colonnes]
+        if inconnues:
+            self.erreurs.append(f"{origine} : colonnes inconnues {', '.join(map(str, inconnues))}")
+            return
+
+        ligne = {c: _texte(valeurs.get(c)) for c in colonnes if c != 'domaines'}
+        manquantes = [c for c in obligatoires if ligne[c] is None]
+        if manquantes:
+            self.erreurs.append(f"{origine} : {', '.join(manquantes)} obligatoire(s)")
+            return
+
+        if table == 'filieres':
+            ligne['type'] = ligne['type'].lower()
+            if ligne['type'] not in TYPES_FILIERE:
+                self.erreurs.append(f"{origine} : type {ligne['type']!r} (attendu : {', '.join(TYPES_FILIERE)})")
+                return
+            # Absente : domaines inchangés ; vide : plus aucun domaine
+            domaines = valeurs.get('domaines') if 'domaines' in valeurs else None
+            if isinstance(domaines, str):
+                domaines = domaines.split(';')
+            ligne['domaines'] = None if domaines is None else [d for d in map(_texte, domaines) if d]
+            cle = (normaliser(ligne['etablissement']), normaliser(ligne['nom']))
+        else:
+            cle = (normaliser(ligne['nom']),)
+
+        precedente = self._origines.get((table,) + cle)
+        if precedente is not None:
+            self.erreurs.append(f"{origine} : {table} en double (déjà en {precedente})")
+            return
+        self._origines[(table,) + cle] = origine
+        self.lignes[table][cle] = ligne
+
+    def _comparer(self, table: str, colonnes: Tuple[str, ...], importees: Dict[Tuple, Tuple],
+                  existantes: Dict[Tuple, Mapping], ids: Dict[Tuple, int],
+                  prochain_id: int) -> List[Ecriture]:
+        """Insertions et mises à jour d'une table ; ``ids`` reçoit l'id de chaque nouvelle clé"""
+        insertions, modifications, inchangees = [], [], 0
+        for cle, valeurs in importees.items():
+            existante = existantes.get(cle)
+            if existante is None:
+                ids[cle] = prochain_id
+                insertions.append((prochain_id,) + valeurs)
+                prochain_id += 1
+            elif tuple(_texte(existante[c]) if isinstance(existante[c], str) else existante[c]
+                       for c in colonnes) != valeurs:
+                modifications.append(valeurs + (existante['id'],))
+            else:
+                inchangees += 1
+        self.bilan[table] = {'ajoutees': len(insertions), 'modifiees': len(modifications),
+                             'inchangees': inchangees, 'supprimees': 0}
+        ecritures = []
+        if insertions:
+            ecritures.append(Ecriture('inserer', SCHEMAS[table][0], ('id',) + colonnes, insertions))
+        if modifications:
+            ecritures.append(Ecriture('modifier', SCHEMAS[table][0], colonnes, modifications))
+        return ecritures
+
+    def planifier(self, tables: Mapping[str, List[Mapping]], supprimer_absentes: bool = False) -> List[Ecriture]:
+        """Écritures qui appliquent l'import au catalogue ``tables`` (load_tables).
+
+        Avec ``supprimer_absentes``, les filières des établissements importés
+        qui ne figurent pas dans l'import sont supprimées. Les références
+        inconnues (établissement, domaine) sont ajoutées à ``erreurs``.
+        """
+        ecritures: List[Ecriture] = []
+        references = {}
+        for table, cle_snapshot in (('etablissements', 'etablissements'), ('domaines', 'domaines')):
+            _, colonnes, _ = SCHEMAS[table]
+            existantes, ids = {}, {}
+            for ligne in tables[cle_snapshot]:
+                cle = (normaliser(ligne['nom']),)
+                ids.setdefault(cle, ligne['id'])
+                existantes.setdefault(cle, ligne)
+            importees = {cle: tuple(ligne[c] for c in colonnes) for cle, ligne in self.lignes[table].items()}
+            prochain_id = max((ligne['id'] for ligne in tables[cle_snapshot]), default=0) + 1
+            ecritures += self._comparer(table, colonnes, importees, existantes, ids, prochain_id)
+            references[table] = ids
+
+        # Filières : l'établissement est résolu en id, les domaines en ids
+        etablissements = references['etablissements']
+        domaines = references['domaines']
+        noms_etablissements = {e['id']: normaliser(e['nom']) for e in tables['etablissements']}
+        importees, domaines_voulus = {}, {}
+        for cle, ligne in self.lignes['filieres'].items():
+            origine = self._origines[('filieres',) + cle]
+            etablissement_id = etablissements.get(cle[:1])
+            if etablissement_id is None:
+                self.erreurs.append(f"{origine} : établissement inconnu {ligne['etablissement']!r}")
+                continue
+            if ligne['domaines'] is not None:
+                inconnus = [d for d in ligne['domaines'] if (normaliser(d),) not in domaines]
+                if inconnus:
+                    self.erreurs.append(f"{origine} : domaine(s) inconnu(s) {', '.join(inconnus)}")
+                    continue
+                domaines_voulus[cle] = {domaines[(normaliser(d),)] for d in ligne['domaines']}
+            importees[cle] = tuple(etablissement_id if c == 'etablissement_id' else ligne[c]
+                                   for c in COLONNES_FILIERE)
+
+        existantes, ids = {}, {}
+        for filiere in tables['filieres']:
+            cle = (noms_etablissements.get(filiere['etablissement_id']), normaliser(filiere['nom']))
+            ids.setdefault(cle, filiere['id'])
+            existantes.setdefault(cle, filiere)
+
+        absentes = []
+        if supprimer_absentes:
+            concernes = {ligne[COLONNES_FILIERE.index('etablissement_id')] for ligne in importees.values()}
+            absentes = [(f['id'],) for cle, f in existantes.items()
+                        if f['etablissement_id'] in concernes and cle not in importees]
+            if absentes:
+                ecritures += [
+                    Ecriture('supprimer', 'filiere_domaines', ('filiere_id',), absentes),
+                    Ecriture('supprimer', 'filiere_similaires', ('filiere_id',), absentes),
+                    Ecriture('supprimer', 'filiere_similaires', ('voisin_id',), absentes),
+                    Ecriture('supprimer', 'filieres', ('id',), absentes),
+                ]
+        prochain_id = max((f['id'] for f in tables['filieres']), default=0) + 1
+        ecritures += self._comparer('filieres', COLONNES_FILIERE, importees, existantes, ids, prochain_id)
+        self.bilan['filieres']['supprimees'] = len(absentes)
+
+        # Liaisons filières-domaines des filières dont les domaines sont donnés
+        actuels: Dict[int, set] = {}
+        for liaison in tables['liaisons']:
+            actuels.setdefault(liaison['filiere_id'], set()).add(liaison['domaine_id'])
+        ajouts, retraits, inchangees = [], [], 0
+        for cle, voulus in domaines_voulus.items():
+            filiere_id = ids[cle]
+            presents = actuels.get(filiere_id, set())
+            ajouts += [(filiere_id, d) for d in sorted(voulus - presents)]
+            retraits += [(filiere_id, d) for d in sorted(presents - voulus)]
+            inchangees += len(voulus & presents)
+        if retraits:
+            ecritures.append(Ecriture('supprimer', 'filiere_domaines', ('filiere_id', 'domaine_id'), retraits))
+        if ajouts:
+            ecritures.append(Ecriture('inserer', 'filiere_domaines', ('filiere_id', 'domaine_id'), ajouts))
+        self.bilan['liaisons'] = {'ajoutees': len(ajouts), 'modifiees': 0, 'inchangees': inchangees,
+                                  'supprimees': len(retraits)}
+
+        self.filieres_modifiees = any(e.table in ('filieres', 'filiere_domaines') for e in ecritures)
+        return ecritures
+
+def reconstruction_utile(ecritures: List[Ecriture], nb_filieres: int) -> bool:
+    """Indique si les index dérivés doivent être reconstruits en une passe"""
+    lignes = sum(len(e.lignes) for e in ecritures if e.table == 'filieres')
+    return lignes > 0 and lignes >= PART_RECONSTRUCTION * nb_filieres
+
+def _debit(lignes: int, duree: float) -> str:
+    """Volume et débit d'une étape, pour le rapport"""
+    return f"{lignes} lignes en {duree:.2f}s ({lignes / duree if duree else 0:.0f} lignes/s)"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importer des catalogues d'établissements (CSV, JSON)")
+    parser.add_argument("fichiers", nargs='+')
+    parser.add_argument("--url", help="stockage du catalogue (par défaut celui du serveur d'actions)")
+    parser.add_argument("--table", choices=tuple(SCHEMAS), help="table de tous les fichiers CSV/JSONL")
+    parser.add_argument("--supprimer-absentes", action="store_true",
+                        help="supprimer les filières des établissements importés absentes des fichiers")
+    parser.add_argument("--simulation", action="store_true", help="afficher le bilan sans rien écrire")
+    parser.add_argument("--sans-similaires", action="store_true",
+                        help="ne pas recalculer les filières similaires")
+    parser.add_argument("--k", type=int, default=5, help="nombre de voisins par filière")
+    args = parser.parse_args(argv)
+
+    importation = Importation()
+    debut = time.perf_counter()
+    for chemin in args.fichiers:
+        importation.lire(chemin, args.table)
+    duree_lecture = time.perf_counter() - debut
+
+    backend: CatalogueBackend = create_backend(args.url) if args.url else backend_from_config()
+    try:
+        tables = backend.load_tables()
+        ecritures = importation.planifier(tables, args.supprimer_absentes)
+        if importation.erreurs:
+            for erreur in importation.erreurs[:50]:
+                print(erreur, file=sys.stderr)
+            print(f"{len(importation.erreurs)} erreur(s), rien n'a été importé", file=sys.stderr)
+            return 1
+
+        for table, compte in importation.bilan.items():
+            print(f"{table} : {compte['ajoutees']} ajoutées, {compte['modifiees']} modifiées, "
+                  f"{compte['inchangees']} inchangées, {compte['supprimees']} supprimées")
+        print(f"Lecture : {_debit(importation.lues, duree_lecture)}")
+        if args.simulation or not ecritures:
+            return 0
+
+        nb_filieres = len(tables['filieres']) + importation.bilan['filieres']['ajoutees']
+        reconstruire = reconstruction_utile(ecritures, nb_filieres)
+        debut = time.perf_counter()
+        ecrites = backend.appliquer_ecritures(ecritures, reconstruire_index=reconstruire)
+        print(f"Écriture : {_debit(ecrites, time.perf_counter() - debut)}"
+              + (", index reconstruits" if reconstruire else ""))
+
+        if importation.filieres_modifiees and not args.sans_similaires:
+            debut = time.perf_counter()
+            voisins = construire_similaires(backend, args.k)
+            print(f"Filières similaires : {voisins} voisins en {time.perf_counter() - debut:.2f}s")
+    finally:
+        backend.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
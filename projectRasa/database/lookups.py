@@ -0,0 +1,172 @@
+"""Tables de correspondance (lookup tables) et synonymes générés depuis le catalogue.
+
+Exporte les noms des filières, domaines d'intérêt et établissements, avec
+leurs variantes (nom sans le diplôme, sigle entre parenthèses, parties d'un
+domaine composé, minuscules, sans accents), dans un fichier NLU Rasa :
+
+- une table ``- lookup:`` par entité, utilisée par RegexFeaturizer comme
+  caractéristique de DIETClassifier ;
+- un bloc ``- synonym:`` par nom du catalogue, pour qu'EntitySynonymMapper
+  ramène une variante extraite au nom exact. Une variante partagée par
+  plusieurs noms (« Informatique ») reste dans les tables mais n'a pas de
+  synonyme.
+
+Le composant components.entites_catalogue.CatalogueEntityExtractor repère
+ces mêmes formes dans les messages, directement depuis le catalogue.
+
+Usage (depuis projectRasa/, avant ``rasa train``) :
+    python -m database.lookups
+    python -m database.lookups --url sqlite:////tmp/bench.db --sortie /tmp/lookups.yml
+"""
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from database.automate import AutomateMots, cle
+from database.backends import backend_from_config, create_backend
+from database.catalogue import normaliser
+from database.resolver import MOTS_IGNORES
+
+SORTIE_PAR_DEFAUT = "data/lookups_catalogue.yml"
+
+# Entité Rasa -> table du catalogue (clé de load_tables)
+ENTITES = (
+    ('filiere', 'filieres'),
+    ('domaine', 'domaines'),
+    ('etablissement', 'etablissements'),
+)
+
+# Diplôme en tête d'un nom de filière : « Licence Professionnelle en Informatique »
+DIPLOME = re.compile(
+    r"^(?:licence|master|dut|bts|doctorat|dipl[oô]me)(?:\s+professionnel(?:le)?)?\s+(?:en|de|des|d')\s*",
+    re.IGNORECASE,
+)
+# Sigle en fin de nom : « Institut Universitaire de Technologie (IUT) »
+SIGLE = re.compile(r"^(.+?)\s*\(([^()]+)\)$")
+
+# Mots trop généraux pour désigner seuls un nom du catalogue
+MOTS_GENERIQUES = {
+    'ecole', 'etudes', 'faculte', 'formation', 'formations', 'institut', 'licence',
+    'master', 'science', 'sciences', 'universite',
+}
+
+# Forme reconnue : (entité, forme, nom du catalogue ou None si la forme en désigne plusieurs)
+Forme = Tuple[str, str, Optional[str]]
+
+def variantes(entite: str, nom: str) -> List[str]:
+    """Nom et variantes sous lesquelles un utilisateur peut le citer"""
+    nom = ' '.join(nom.split())
+    resultat = [nom]
+    sigle = SIGLE.match(nom)
+    if sigle:
+        resultat.extend(sigle.groups())
+    if entite == 'filiere':
+        resultat.append(DIPLOME.sub('', nom))
+    elif entite == 'domaine':
+        resultat.extend(re.split(r'\s+et\s+', nom))
+
+    retenues = {}
+    for variante in resultat:
+        cle = normaliser(variante)
+        # Une variante trop courte ou trop générale repérerait n'importe quoi
+        if len(cle) >= 3 and cle not in MOTS_IGNORES and cle not in MOTS_GENERIQUES:
+            retenues.setdefault(cle, variante)
+    return list(retenues.values())
+
+def formes_catalogue(tables: Mapping[str, Iterable[Mapping]]) -> List[Forme]:
+    """Formes reconnues de chaque nom du catalogue, à partir des tables de load_tables.
+
+    Un nom exact désigne toujours son enregistrement. Une variante dérivée
+    n'en désigne un que si elle n'est ni variante ni partie d'un autre nom :
+    « Sciences Politiques » est propre à un domaine, « Informatique » est
+    partagé par deux filières et reste une simple forme, sans valeur.
+    """
+    noms = [(entite, record['nom']) for entite, table in ENTITES
+            for record in tables.get(table, ()) if record['nom']]
+    brutes = [(entite, variante, nom) for entite, nom in noms for variante in variantes(entite, nom)]
+
+    designes: Dict[tuple, set] = {}
+    for _, variante, nom in brutes:
+        designes.setdefault(cle(variante), set()).add(nom)
+    # Un seul passage de l'automate des formes sur chaque nom suffit à
+    # trouver les noms qui contiennent une forme
+    automate = AutomateMots((motif, motif) for motif in designes)
+    for _, nom in noms:
+        for _, _, motif in automate.occurrences(cle(nom)):
+            designes[motif].add(nom)
+
+    formes: Dict[Tuple[str, tuple], Forme] = {}
+    exacts = set()
+    for entite, variante, nom in brutes:
+        motif = cle(variante)
+        if motif == cle(nom):
+            # Le nom exact l'emporte sur une variante dérivée de même écriture
+            if (entite, motif) not in exacts:
+                exacts.add((entite, motif))
+                formes[entite, motif] = (entite, variante, nom)
+        elif (entite, motif) not in formes:
+            formes[entite, motif] = (entite, variante, nom if designes[motif] == {nom} else None)
+    return list(formes.values())
+
+def ecritures(forme: str) -> List[str]:
+    """Écritures d'une forme dans les fichiers NLU : telle quelle, en minuscules, sans accents"""
+    return list(dict.fromkeys((forme, forme.lower(), normaliser(forme))))
+
+def generer_nlu(formes: List[Forme]) -> str:
+    """Contenu du fichier NLU : une table par entité et les synonymes non ambigus"""
+    # EntitySynonymMapper ne distingue pas les entités : une écriture qui
+    # désigne deux noms, même d'entités différentes, n'a pas de synonyme
+    valeurs_par_cle: Dict[tuple, set] = {}
+    for _, forme, valeur in formes:
+        valeurs_par_cle.setdefault(cle(forme), set()).add(valeur)
+
+    lignes = [
+        "# Généré par « python -m database.lookups » depuis le catalogue : ne pas modifier à la main.",
+        'version: "3.1"',
+        "",
+        "nlu:",
+    ]
+    for entite, _ in ENTITES:
+        exemples = dict.fromkeys(
+            ecriture for kind, forme, _ in formes if kind == entite for ecriture in ecritures(forme)
+        )
+        if exemples:
+            lignes += [f"- lookup: {entite}", "  examples: |"]
+            lignes += [f"    - {exemple}" for exemple in exemples]
+            lignes.append("")
+
+    synonymes: Dict[str, Dict[str, None]] = {}
+    for _, forme, nom in formes:
+        if nom is None or len(valeurs_par_cle[cle(forme)]) > 1:
+            continue
+        exemples = synonymes.setdefault(nom, {})
+        for ecriture in ecritures(forme):
+            if ecriture != nom:
+                exemples[ecriture] = None
+    for nom, exemples in synonymes.items():
+        if exemples:
+            lignes += [f"- synonym: {json.dumps(nom, ensure_ascii=False)}", "  examples: |"]
+            lignes += [f"    - {exemple}" for exemple in exemples]
+            lignes.append("")
+    return "\n".join(lignes)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Générer les lookup tables et synonymes NLU du catalogue")
+    parser.add_argument("--url", help="stockage du catalogue (par défaut celui du serveur d'actions)")
+    parser.add_argument("--sortie", default=SORTIE_PAR_DEFAUT, help="fichier NLU écrit")
+    args = parser.parse_args(argv)
+
+    backend = create_backend(args.url) if args.url else backend_from_config()
+    try:
+        formes = formes_catalogue(backend.load_tables())
+    finally:
+        backend.close()
+    Path(args.sortie).write_text(generer_nlu(formes), encoding='utf-8')
+    print(f"{len(formes)} formes ({', '.join(e for e, _ in ENTITES)}) écrites dans {args.sortie}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
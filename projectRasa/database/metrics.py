@@ -0,0 +1,251 @@
+"""Instrumentation des actions et des requêtes au catalogue.
+
+Mesures relevées :
+- durée de chaque ``Action.run`` (histogramme par action, erreurs) ;
+- appels aux méthodes de UniversityDatabase : durée, nombre d'appels par
+  action, lignes retournées ;
+- requêtes réellement envoyées au stockage : durée, nombre par action ;
+- jauges collectées à la lecture : pool de connexions, cache de réponses.
+
+Les mesures sont exposées au format texte Prometheus sur
+``http://<hôte>:ACTION_METRICS_PORT/metrics`` (5056 par défaut, 0 pour
+désactiver). Avec UNIVERSITY_DB_SLOW_QUERY_MS, chaque requête plus lente
+que ce seuil est journalisée avec ses arguments et son SQL.
+"""
+import bisect
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bornes des histogrammes de durée, en secondes
+BORNES_DUREE = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Action en cours d'exécution, pour attribuer les requêtes à une action
+action_courante: contextvars.ContextVar[str] = contextvars.ContextVar('action_courante', default='')
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogramme:
+    """Histogramme cumulatif à bornes fixes"""
+
+    __slots__ = ('bornes', 'compteurs', 'somme', 'total')
+
+    def __init__(self, bornes: Tuple[float, ...] = BORNES_DUREE):
+        self.bornes = bornes
+        self.compteurs = [0] * (len(bornes) + 1)
+        self.somme = 0.0
+        self.total = 0
+
+    def observer(self, valeur: float):
+        """Ajouter une mesure"""
+        self.compteurs[bisect.bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.total += 1
+
+class Metriques:
+    """Registre des compteurs, histogrammes et jauges exposés"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compteurs: Dict[str, Dict[Labels, float]] = {}
+        self._histogrammes: Dict[str, Dict[Labels, Histogramme]] = {}
+        self._aide: Dict[str, str] = {}
+        self._collecteurs: List[Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]] = []
+        self.seuil_requete_lente: Optional[float] = None
+
+    def incrementer(self, nom: str, aide: str, labels: Dict[str, str], valeur: float = 1):
+        """Incrémenter un compteur"""
+        cle = tuple(sorted(labels.items()))
+        with self._lock:
+            self._aide.setdefault(nom, aide)
+            serie = self._compteurs.setdefault(nom, {})
+            serie[cle] = serie.get(cle, 0) + valeur
+
+    def observer(self, nom: str, aide: str, labels: Dict[str, str], valeur: float):
+        """Ajouter une mesure à un histogramme"""
+        cle = tuple(sorted(labels.items()))
+        with self._lock:
+            self._aide.setdefault(nom, aide)
+            serie = self._histogrammes.setdefault(nom, {})
+            histogramme = serie.get(cle)
+            if histogramme is None:
+                histogramme = serie[cle] = Histogramme()
+            histogramme.observer(valeur)
+
+    def ajouter_collecteur(self, collecteur: Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]):
+        """Enregistrer une fonction qui fournit des jauges (nom, aide, labels, valeur) à la lecture"""
+        self._collecteurs.append(collecteur)
+
+    def reinitialiser(self):
+        """Oublier toutes les mesures (les collecteurs sont conservés)"""
+        with self._lock:
+            self._compteurs.clear()
+            self._histogrammes.clear()
+
+    @staticmethod
+    def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+        """Labels au format Prometheus"""
+        contenu = ','.join(
+            '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for k, v in labels
+        )
+        return '{' + contenu + '}' if contenu else ''
+
+    def exposer(self) -> str:
+        """Toutes les mesures au format texte Prometheus"""
+        lignes = []
+        with self._lock:
+            for nom, serie in sorted(self._compteurs.items()):
+                lignes += [f"# HELP {nom} {self._aide[nom]}", f"# TYPE {nom} counter"]
+                for labels, valeur in sorted(serie.items()):
+                    lignes.append(f"{nom}{self._format_labels(labels)} {valeur:g}")
+
+            for nom, serie in sorted(self._histogrammes.items()):
+                lignes += [f"# HELP {nom} {self._aide[nom]}", f"# TYPE {nom} histogram"]
+                for labels, h in sorted(serie.items()):
+                    cumul = 0
+                    for borne, compteur in zip(h.bornes + (float('inf'),), h.compteurs):
+                        cumul += compteur
+                        le = '+Inf' if borne == float('inf') else f"{borne:g}"
+                        lignes.append(f"{nom}_bucket{self._format_labels(labels + (('le', le),))} {cumul}")
+                    lignes.append(f"{nom}_sum{self._format_labels(labels)} {h.somme:.9f}")
+                    lignes.append(f"{nom}_count{self._format_labels(labels)} {h.total}")
+
+        jauges: Dict[str, Tuple[str, List[str]]] = {}
+        for collecteur in self._collecteurs:
+            try:
+                mesures = list(collecteur())
+            except Exception as e:
+                logger.warning(f"Collecteur de métriques en échec : {e}")
+                continue
+            for nom, aide, labels, valeur in mesures:
+                entree = jauges.setdefault(nom, (aide, []))
+                entree[1].append(f"{nom}{self._format_labels(sorted(labels.items()))} {valeur:g}")
+        for nom, (aide, series) in sorted(jauges.items()):
+            lignes += [f"# HELP {nom} {aide}", f"# TYPE {nom} gauge"] + series
+
+        return '\n'.join(lignes) + '\n'
+
+# Registre partagé par les actions et la base de données
+metriques = Metriques()
+_seuil = os.environ.get("UNIVERSITY_DB_SLOW_QUERY_MS")
+metriques.seuil_requete_lente = float(_seuil) / 1000 if _seuil else None
+
+def _nb_lignes(resultat) -> int:
+    """Nombre de lignes d'un résultat de requête"""
+    if resultat is None:
+        return 0
+    if isinstance(resultat, dict) and resultat and isinstance(next(iter(resultat.values())), list):
+        return sum(len(v) for v in resultat.values())
+    if isinstance(resultat, (list, tuple)):
+        return len(resultat)
+    return 1
+
+def mesurer_action(run):
+    """Décorer ``Action.run`` : durée par action, erreurs, action courante pour les requêtes"""
+    @functools.wraps(run)
+    async def wrapper(self, dispatcher, tracker, domain):
+        nom = self.name()
+        jeton = action_courante.set(nom)
+        debut = time.perf_counter()
+        try:
+            return await run(self, dispatcher, tracker, domain)
+        except Exception:
+            metriques.incrementer('rasa_action_errors_total', "Exécutions d'action en erreur",
+                                  {'action': nom})
+            raise
+        finally:
+            metriques.observer('rasa_action_duration_seconds', "Durée d'exécution des actions",
+                               {'action': nom}, time.perf_counter() - debut)
+            action_courante.reset(jeton)
+    return wrapper
+
+def mesurer_requete(methode):
+    """Décorer une méthode de UniversityDatabase : durée, appels par action, lignes retournées"""
+    nom = methode.__name__
+
+    @functools.wraps(methode)
+    def wrapper(self, *args, **kwargs):
+        debut = time.perf_counter()
+        resultat = methode(self, *args, **kwargs)
+        metriques.observer('university_db_call_duration_seconds',
+                           "Durée des appels à UniversityDatabase (snapshot ou stockage)",
+                           {'method': nom}, time.perf_counter() - debut)
+        metriques.incrementer('university_db_calls_total', "Appels à UniversityDatabase par action",
+                              {'method': nom, 'action': action_courante.get()})
+        metriques.incrementer('university_db_rows_total', "Lignes retournées par UniversityDatabase",
+                              {'method': nom}, _nb_lignes(resultat))
+        return resultat
+    return wrapper
+
+def mesurer_sql(methode):
+    """Décorer une méthode d'un backend : requêtes envoyées au stockage et journal des requêtes lentes"""
+    nom = methode.__name__
+
+    @functools.wraps(methode)
+    def wrapper(self, *args, **kwargs):
+        debut = time.perf_counter()
+        resultat = methode(self, *args, **kwargs)
+        duree = time.perf_counter() - debut
+        backend = type(self).__name__
+        metriques.observer('university_db_query_duration_seconds', "Durée des requêtes au stockage",
+                           {'backend': backend, 'method': nom}, duree)
+        metriques.incrementer('university_db_queries_total', "Requêtes au stockage par action",
+                              {'backend': backend, 'method': nom, 'action': action_courante.get()})
+
+        seuil = metriques.seuil_requete_lente
+        if seuil is not None and duree >= seuil:
+            sql = ' '.join((self.derniere_requete() or '-').split())
+            logger.warning(
+                f"Requête lente ({duree * 1000:.1f} ms) {backend}.{nom}{args} "
+                f"[action={action_courante.get() or '-'}] : {sql}"
+            )
+        return resultat
+    return wrapper
+
+class _GestionnaireMetriques(BaseHTTPRequestHandler):
+    """Répondre à GET /metrics avec le texte Prometheus"""
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corps = metriques.exposer().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        # Pas de ligne de journal à chaque collecte de Prometheus
+        pass
+
+def demarrer_serveur(port: int, hote: str = "0.0.0.0", attente: float = 0.0) -> Optional[ThreadingHTTPServer]:
+    """Servir /metrics dans un thread dédié ; None si le port est indisponible.
+
+    Avec ``attente``, le port est redemandé pendant ce nombre de secondes :
+    un worker qui en remplace un autre attend que l'ancien l'ait libéré.
+    """
+    limite = time.monotonic() + attente
+    while True:
+        try:
+            serveur = ThreadingHTTPServer((hote, port), _GestionnaireMetriques)
+            break
+        except OSError as e:
+            if time.monotonic() >= limite:
+                logger.warning(f"Endpoint de métriques indisponible sur le port {port} : {e}")
+                return None
+            time.sleep(0.2)
+    serveur.daemon_threads = True
+    threading.Thread(target=serveur.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Métriques exposées sur http://{hote}:{port}/metrics")
+    return serveur
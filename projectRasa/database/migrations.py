@@ -0,0 +1,507 @@
+import logging
+import sqlite3
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from database.catalogue import normaliser
+
+logger = logging.getLogger(__name__)
+
+def _schema_initial(cursor):
+    """Tables du catalogue"""
+    # Table des établissements
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS etablissements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            type TEXT NOT NULL,
+            description TEXT,
+            contact TEXT,
+            site_web TEXT
+        )
+    ''')
+
+    # Table des filières
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS filieres (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            type TEXT NOT NULL, -- 'professionnelle' ou 'classique'
+            duree TEXT,
+            description TEXT,
+            debouches TEXT,
+            conditions_admission TEXT,
+            etablissement_id INTEGER,
+            frais_inscription TEXT,
+            FOREIGN KEY (etablissement_id) REFERENCES etablissements (id)
+        )
+    ''')
+
+    # Table des domaines d'intérêt
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS domaines_interet (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            description TEXT
+        )
+    ''')
+
+    # Table de liaison filières-domaines
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS filiere_domaines (
+            filiere_id INTEGER,
+            domaine_id INTEGER,
+            PRIMARY KEY (filiere_id, domaine_id),
+            FOREIGN KEY (filiere_id) REFERENCES filieres (id),
+            FOREIGN KEY (domaine_id) REFERENCES domaines_interet (id)
+        )
+    ''')
+
+    # Table du processus de préinscription
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS processus_preinscription (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            etape INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            details TEXT,
+            liens_utiles TEXT
+        )
+    ''')
+
+    # Table des documents requis
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS documents_requis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type_document TEXT NOT NULL,
+            description TEXT,
+            obligatoire BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # Table des dates importantes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dates_importantes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            evenement TEXT NOT NULL,
+            date_debut TEXT,
+            date_fin TEXT,
+            annee_academique TEXT
+        )
+    ''')
+
+# Triggers qui tiennent filieres_fts à jour ligne à ligne ; la mise à jour ne
+# réindexe une filière que si un champ indexé change (et pas à chaque écriture
+# de nom_normalise ou d'une autre colonne)
+TRIGGERS_PLEIN_TEXTE = {
+    'filieres_fts_ai': '''
+        CREATE TRIGGER IF NOT EXISTS filieres_fts_ai AFTER INSERT ON filieres BEGIN
+            INSERT INTO filieres_fts(rowid, nom, description, debouches)
+            VALUES (new.id, new.nom, new.description, new.debouches);
+        END
+    ''',
+    'filieres_fts_ad': '''
+        CREATE TRIGGER IF NOT EXISTS filieres_fts_ad AFTER DELETE ON filieres BEGIN
+            INSERT INTO filieres_fts(filieres_fts, rowid, nom, description, debouches)
+            VALUES ('delete', old.id, old.nom, old.description, old.debouches);
+        END
+    ''',
+    'filieres_fts_au': '''
+        CREATE TRIGGER IF NOT EXISTS filieres_fts_au AFTER UPDATE OF nom, description, debouches ON filieres BEGIN
+            INSERT INTO filieres_fts(filieres_fts, rowid, nom, description, debouches)
+            VALUES ('delete', old.id, old.nom, old.description, old.debouches);
+            INSERT INTO filieres_fts(rowid, nom, description, debouches)
+            VALUES (new.id, new.nom, new.description, new.debouches);
+        END
+    ''',
+}
+
+def _index_plein_texte(cursor):
+    """Index plein texte FTS5 des filières et ses triggers de synchronisation"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'filieres_fts'")
+    existait = cursor.fetchone() is not None
+
+    try:
+        # unicode61 + remove_diacritics : « génie » et « genie » donnent le même terme
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS filieres_fts USING fts5(
+                nom, description, debouches,
+                content='filieres', content_rowid='id',
+                tokenize="unicode61 remove_diacritics 2",
+                prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite compilé sans FTS5 : la recherche retombe sur LIKE
+        logger.warning(f"Index plein texte indisponible (FTS5) : {e}")
+        return
+
+    for sql in TRIGGERS_PLEIN_TEXTE.values():
+        cursor.execute(sql)
+
+    if not existait:
+        # Indexer les filières déjà présentes dans une base existante
+        cursor.execute("INSERT INTO filieres_fts(filieres_fts) VALUES ('rebuild')")
+
+# Tables dont le nom est aussi stocké normalisé (minuscules, sans accents)
+TABLES_NOM_NORMALISE = ('etablissements', 'filieres', 'domaines_interet')
+
+def enregistrer_fonctions(conn):
+    """Déclarer sur une connexion les fonctions SQL du catalogue.
+
+    Les filtres des lectures utilisent ``normaliser`` ; le schéma n'en
+    dépend pas : une connexion sans ces fonctions peut écrire dans la base.
+    """
+    conn.create_function('normaliser', 1, normaliser, deterministic=True)
+
+def avec_nom_normalise(table: str, colonnes: Sequence[str], lignes: Iterable[tuple]) -> Tuple[tuple, List[tuple]]:
+    """Colonnes et lignes d'une écriture complétées par nom_normalise, calculé depuis nom.
+
+    SQLite ne sait ni retirer les accents ni casefold : aucun trigger ne
+    tient nom_normalise à jour, toute écriture du nom le fournit avec la
+    ligne. Les valeurs qui suivent les colonnes (id d'un UPDATE) sont gardées.
+    """
+    if table not in TABLES_NOM_NORMALISE or 'nom' not in colonnes:
+        return tuple(colonnes), list(lignes)
+    position, fin = list(colonnes).index('nom'), len(colonnes)
+    return (tuple(colonnes) + ('nom_normalise',),
+            [tuple(ligne[:fin]) + (normaliser(ligne[position]),) + tuple(ligne[fin:]) for ligne in lignes])
+
+def _index_secondaires(cursor):
+    """Index des clés étrangères, des types et des noms normalisés"""
+    for table in TABLES_NOM_NORMALISE:
+        colonnes = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if 'nom_normalise' not in colonnes:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN nom_normalise TEXT")
+
+        # Remplissage en Python : SQLite ne sait ni retirer les accents ni casefold
+        lignes = cursor.execute(f"SELECT id, nom FROM {table}").fetchall()
+        cursor.executemany(
+            f"UPDATE {table} SET nom_normalise = ? WHERE id = ?",
+            [(normaliser(nom), id_) for id_, nom in lignes]
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_nom_normalise ON {table} (nom_normalise)")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_filieres_etablissement ON filieres (etablissement_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_filieres_type ON filieres (type)")
+
+    # La clé primaire (filiere_id, domaine_id) ne sert pas les jointures par domaine
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_filiere_domaines_domaine
+            ON filiere_domaines (domaine_id, filiere_id)
+    ''')
+
+def _table_similaires(cursor):
+    """Voisins précalculés des filières (python -m database.similaires)"""
+    # Une ligne par (filière, rang) : les voisins d'une filière se lisent dans
+    # l'ordre de la clé primaire, sans tri
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS filiere_similaires (
+            filiere_id INTEGER NOT NULL,
+            rang INTEGER NOT NULL,
+            voisin_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (filiere_id, rang),
+            FOREIGN KEY (filiere_id) REFERENCES filieres (id),
+            FOREIGN KEY (voisin_id) REFERENCES filieres (id)
+        ) WITHOUT ROWID
+    ''')
+
+# Tables dont toute modification change la version du catalogue
+TABLES_VERSIONNEES = (
+    'etablissements', 'filieres', 'domaines_interet', 'filiere_domaines',
+    'processus_preinscription', 'documents_requis', 'dates_importantes', 'filiere_similaires',
+)
+
+INCREMENTER_VERSION = "UPDATE catalogue_version SET version = version + 1, modifie_le = CURRENT_TIMESTAMP WHERE id = 1"
+
+def _triggers_version(table: str) -> Dict[str, str]:
+    """Triggers qui incrémentent la version du catalogue à chaque écriture dans une table"""
+    return {
+        f'{table}_version_{suffixe}': f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{suffixe} AFTER {evenement} ON {table} BEGIN
+                {INCREMENTER_VERSION};
+            END
+        '''
+        for suffixe, evenement in (('ai', 'INSERT'), ('ad', 'DELETE'), ('au', 'UPDATE'))
+    }
+
+def _version_catalogue(cursor):
+    """Version du catalogue tenue à jour par triggers, lue par les serveurs pour recharger"""
+    # Une seule ligne : vérifier si le catalogue a changé coûte une lecture par clé
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS catalogue_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0,
+            modifie_le TEXT
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO catalogue_version (id, modifie_le) VALUES (1, CURRENT_TIMESTAMP)")
+    for table in TABLES_VERSIONNEES:
+        for sql in _triggers_version(table).values():
+            cursor.execute(sql)
+
+def _triggers_index_derives() -> Dict[str, Dict[str, str]]:
+    """Triggers de l'index plein texte et de la version, par table puis par nom"""
+    triggers = {table: {} for table in TABLES_VERSIONNEES}
+    triggers['filieres'].update(TRIGGERS_PLEIN_TEXTE)
+    for table in TABLES_VERSIONNEES:
+        triggers[table].update(_triggers_version(table))
+    return triggers
+
+def suspendre_index_derives(cursor, tables: Optional[Iterable[str]] = None) -> List[str]:
+    """Supprimer les triggers des index dérivés avant une écriture en masse.
+
+    À appeler dans la transaction de l'écriture ; ``reconstruire_index_derives``
+    recrée ensuite les triggers, réindexe les filières en une passe et
+    n'incrémente la version du catalogue qu'une fois. ``tables`` limite la suspension aux
+    triggers de ces tables. Retourne les noms des triggers supprimés.
+    """
+    existants = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    supprimes = [nom for table, triggers in _triggers_index_derives().items()
+                 if tables is None or table in tables
+                 for nom in triggers if nom in existants]
+    for nom in supprimes:
+        cursor.execute(f"DROP TRIGGER {nom}")
+    return supprimes
+
+def reconstruire_index_derives(cursor, supprimes: List[str]):
+    """Recréer les triggers supprimés par suspendre_index_derives et reconstruire filieres_fts"""
+    triggers = {}
+    for par_nom in _triggers_index_derives().values():
+        triggers.update(par_nom)
+    for nom in supprimes:
+        cursor.execute(triggers[nom])
+    if 'filieres_fts_ai' in supprimes:
+        cursor.execute("INSERT INTO filieres_fts(filieres_fts) VALUES ('rebuild')")
+    if any('_version_' in nom for nom in supprimes):
+        cursor.execute(INCREMENTER_VERSION)
+
+# Données d'exemple pour l'Université de Douala
+
+# Établissements
+ETABLISSEMENTS_EXEMPLE = [
+    ("Faculté des Sciences", "Faculté", 
+     "Formation en sciences fondamentales et appliquées", 
+     "+237 233 40 20 10", "http://sciences.univ-douala.cm"),
+    ("Faculté de Médecine et des Sciences Biomédicales", "Faculté",
+     "Formation des professionnels de santé",
+     "+237 233 40 20 20", "http://medecine.univ-douala.cm"),
+    ("Faculté des Sciences Juridiques et Politiques", "Faculté",
+     "Formation en droit et sciences politiques",
+     "+237 233 40 20 30", "http://droit.univ-douala.cm"),
+    ("Institut Universitaire de Technologie (IUT)", "Institut",
+     "Formations technologiques et professionnelles",
+     "+237 233 40 20 40", "http://iut.univ-douala.cm"),
+    ("École Normale Supérieure (ENS)", "École",
+     "Formation des enseignants",
+     "+237 233 40 20 50", "http://ens.univ-douala.cm")
+]
+
+# Domaines d'intérêt
+DOMAINES_EXEMPLE = [
+    ("Sciences et Technologies", "Domaines scientifiques et technologiques"),
+    ("Santé et Médecine", "Domaines de la santé et médecine"),
+    ("Droit et Sciences Politiques", "Domaines juridiques et politiques"),
+    ("Sciences Économiques", "Domaines économiques et de gestion"),
+    ("Lettres et Sciences Humaines", "Domaines littéraires et humaines"),
+    ("Éducation et Formation", "Domaines de l'éducation et formation")
+]
+
+# Filieres pour la Faculté des Sciences (professionnelles et classiques)
+FILIERES_SCIENCES_EXEMPLE = [
+    # Filieres classiques
+    ("Licence en Mathématiques", "classique", "3 ans", 
+     "Formation fondamentale en mathématiques pures et appliquées",
+     "Enseignement, Recherche, Industries", "Baccalauréat C ou D", 1, "50,000 FCFA"),
+    
+    ("Licence en Physique", "classique", "3 ans",
+     "Formation en physique fondamentale et expérimentale",
+     "Enseignement, Recherche, Laboratoires", "Baccalauréat C ou D", 1, "50,000 FCFA"),
+    
+    ("Licence en Chimie", "classique", "3 ans",
+     "Formation en chimie analytique et organique",
+     "Industries chimiques, Laboratoires, Recherche", "Baccalauréat C ou D", 1, "50,000 FCFA"),
+    
+    # Filieres professionnelles
+    ("Licence Professionnelle en Informatique", "professionnelle", "3 ans",
+     "Formation pratique en développement logiciel et réseaux",
+     "Développeur, Administrateur réseaux, Analyste", "Baccalauréat C, D ou E", 1, "75,000 FCFA"),
+    
+    ("Licence Professionnelle en Électronique", "professionnelle", "3 ans",
+     "Formation en électronique et télécommunications",
+     "Technicien supérieur, Maintenance électronique", "Baccalauréat C, D ou E", 1, "75,000 FCFA"),
+    
+    ("Licence Professionnelle en Génie Civil", "professionnelle", "3 ans",
+     "Formation technique en construction et bâtiment",
+     "Technicien BTP, Conducteur de travaux", "Baccalauréat C, D ou E", 1, "75,000 FCFA")
+]
+
+# Autres filières
+AUTRES_FILIERES_EXEMPLE = [
+    ("Médecine Générale", "classique", "7 ans",
+     "Formation complète en médecine générale",
+     "Médecin généraliste, Spécialisation", "Baccalauréat C avec mention", 2, "100,000 FCFA"),
+    
+    ("Droit Privé", "classique", "4 ans",
+     "Formation en droit civil et commercial",
+     "Avocat, Juriste d'entreprise, Notaire", "Baccalauréat toutes séries", 3, "45,000 FCFA"),
+    
+    ("DUT en Génie Informatique", "professionnelle", "2 ans",
+     "Formation technique en informatique industrielle",
+     "Technicien informatique, Support technique", "Baccalauréat C, D ou technique", 4, "60,000 FCFA")
+]
+
+# Liaisons filières-domaines
+FILIERE_DOMAINES_EXEMPLE = [
+    (1, 1), (2, 1), (3, 1), (4, 1), (5, 1), (6, 1),  # Sciences
+    (7, 2),  # Santé
+    (8, 3), (9, 3),  # Droit
+    (4, 1), (5, 1), (6, 1), (9, 1)  # Technologies
+]
+
+# Processus de préinscription
+PROCESSUS_EXEMPLE = [
+    (1, "Création de compte", 
+     "Se créer un compte sur la plateforme de préinscription",
+     "Rendez-vous sur http://preinscription.univ-douala.cm et cliquez sur 'Créer un compte'"),
+    
+    (2, "Remplissage du formulaire",
+     "Compléter le formulaire de préinscription en ligne",
+     "Fournir toutes les informations personnelles et académiques requises"),
+    
+    (3, "Upload des documents",
+     "Téléverser les documents numérisés requis",
+     "Documents à fournir : BAC, relevés de notes, photo d'identité, acte de naissance"),
+    
+    (4, "Validation du dossier",
+     "Soumission et validation finale du dossier",
+     "Vérifier toutes les informations avant soumission définitive")
+]
+
+# Documents requis
+DOCUMENTS_EXEMPLE = [
+    ("BAC ou équivalent", "Diplôme du Baccalauréat ou équivalent", 1),
+    ("Relevés de notes", "Relevés de notes du secondaire", 1),
+    ("Photo d'identité", "Photo d'identité récente format 4x4", 1),
+    ("Acte de naissance", "Copie d'acte de naissance", 1),
+    ("Certificat médical", "Certificat médical de non contre-indication", 0),
+    ("Lettre de motivation", "Lettre de motivation (pour certaines filières)", 0)
+]
+
+# Dates importantes
+DATES_EXEMPLE = [
+    ("Ouverture préinscription", "2024-06-01", "2024-07-15", "2024-2025"),
+    ("Clôture préinscription", "2024-07-15", "2024-07-15", "2024-2025"),
+    ("Début des cours", "2024-09-02", "2024-09-02", "2024-2025")
+]
+
+# Ordre d'insertion des données d'exemple : (table, colonnes, lignes)
+DONNEES_EXEMPLE = [
+    ('etablissements', ('nom', 'type', 'description', 'contact', 'site_web'),
+     ETABLISSEMENTS_EXEMPLE),
+    ('domaines_interet', ('nom', 'description'), DOMAINES_EXEMPLE),
+    ('filieres', ('nom', 'type', 'duree', 'description', 'debouches',
+                  'conditions_admission', 'etablissement_id', 'frais_inscription'),
+     FILIERES_SCIENCES_EXEMPLE + AUTRES_FILIERES_EXEMPLE),
+    ('filiere_domaines', ('filiere_id', 'domaine_id'), FILIERE_DOMAINES_EXEMPLE),
+    ('processus_preinscription', ('etape', 'description', 'details', 'liens_utiles'),
+     PROCESSUS_EXEMPLE),
+    ('documents_requis', ('type_document', 'description', 'obligatoire'), DOCUMENTS_EXEMPLE),
+    ('dates_importantes', ('evenement', 'date_debut', 'date_fin', 'annee_academique'),
+     DATES_EXEMPLE),
+]
+
+def populate_sample_data(conn):
+    """Peupler la base avec des données d'exemple pour l'Université de Douala"""
+    cursor = conn.cursor()
+
+    # Vérifier si les données existent déjà
+    cursor.execute("SELECT COUNT(*) FROM etablissements")
+    if cursor.fetchone()[0] > 0:
+        return
+
+    for table, colonnes, lignes in DONNEES_EXEMPLE:
+        colonnes, lignes = avec_nom_normalise(table, colonnes, lignes)
+        placeholders = ', '.join('?' * len(colonnes))
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(colonnes)}) VALUES ({placeholders})",
+            lignes
+        )
+
+    conn.commit()
+
+# Migrations du schéma, appliquées dans l'ordre et une seule fois chacune
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Tables du catalogue", _schema_initial),
+    (2, "Index plein texte des filières", _index_plein_texte),
+    (3, "Index secondaires et noms normalisés", _index_secondaires),
+    (4, "Filières similaires précalculées", _table_similaires),
+    (5, "Version du catalogue", _version_catalogue),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn) -> int:
+    """Version du schéma enregistrée dans la base (0 si jamais migrée)"""
+    cursor = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    )
+    if cursor.fetchone() is None:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn) -> int:
+    """Appliquer les migrations manquantes puis les données d'exemple.
+
+    Chaque migration s'exécute dans sa propre transaction et est enregistrée
+    dans ``schema_version`` ; relancer la commande ne refait rien. Les
+    migrations exécutent leurs instructions une à une (jamais
+    ``executescript``, qui validerait la transaction en cours).
+    Retourne la version du schéma après migration.
+    """
+    enregistrer_fonctions(conn)
+    cursor = conn.cursor()
+
+    # Mode WAL : les lectures du pool ne bloquent pas les écritures
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+    version = get_schema_version(conn)
+    for numero, description, appliquer in MIGRATIONS:
+        if numero <= version:
+            continue
+        logger.info(f"Migration {numero} : {description}")
+        # BEGIN explicite : sqlite3 n'ouvre pas de transaction avant un CREATE,
+        # qui serait validé aussitôt ; une migration échouée est annulée en entier
+        cursor.execute("BEGIN")
+        try:
+            appliquer(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (numero, description)
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        version = numero
+
+    populate_sample_data(conn)
+    return version
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "university_douala.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        print(f"{db_path} : schéma en version {migrate(conn)}")
+    finally:
+        conn.close()
@@ -0,0 +1,322 @@
+import functools
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from database.catalogue import CatalogueSnapshot, normaliser
+from database.resolver import MOTS_IGNORES
+
+# Champs d'une filière pris en compte, avec leur poids dans les comptes de termes
+POIDS_CHAMPS = (('nom', 2), ('description', 1), ('debouches', 1))
+
+# Part du score apportée par le rattachement à un domaine demandé
+POIDS_DOMAINE = 0.5
+
+# Similarité entre deux filières : part des textes (cosinus TF-IDF), des
+# domaines en commun (Jaccard) et du type
+POIDS_VOISIN_TEXTE = 0.6
+POIDS_VOISIN_DOMAINES = 0.3
+POIDS_VOISIN_TYPE = 0.1
+
+# Similarité minimale des textes et domaines (type exclu) pour qu'une filière
+# soit proposée comme voisine : le bonus de type seul ne rapproche rien
+SIMILARITE_MIN_VOISIN = 0.1
+
+# Nombre de scores calculés à la fois (lignes x filières) pour les voisins
+TAILLE_BLOC_VOISINS = 2_000_000
+
+def termes(texte: Optional[str]) -> List[str]:
+    """Termes d'un texte : mots normalisés, sans mots vides, chiffres ni marque du pluriel"""
+    resultat = []
+    for mot in re.findall(r'[^\W\d_]+', normaliser(texte)):
+        if len(mot) < 2 or mot in MOTS_IGNORES:
+            continue
+        if len(mot) > 3 and mot[-1] in 'sx':
+            mot = mot[:-1]
+        resultat.append(mot)
+    return resultat
+
+class FiliereRecommender:
+    """Recommandation de filières classées par pertinence.
+
+    Chaque filière est représentée par un vecteur TF-IDF creux (nom,
+    description, débouchés) normalisé ; les préférences de l'utilisateur
+    (texte du domaine d'intérêt, domaines correspondants, type préféré)
+    donnent un vecteur de requête. Le score de toutes les filières pour un
+    lot de préférences est un seul produit de matrices creuses, puis un
+    ``argpartition`` garde les k meilleures.
+
+    Construit sur un snapshot immuable ; ``precedent`` permet de réutiliser
+    les comptes de termes des filières inchangées lors d'un rechargement,
+    seules les lignes modifiées ou nouvelles sont re-tokenisées.
+    """
+
+    def __init__(self, snapshot: CatalogueSnapshot, precedent: Optional['FiliereRecommender'] = None):
+        self.snapshot = snapshot
+        self.filieres = snapshot.filieres
+
+        # Le vocabulaire est conservé d'un index à l'autre : les colonnes des
+        # filières inchangées restent valables et ne sont pas recalculées
+        self.vocabulaire: Dict[str, int] = dict(precedent.vocabulaire) if precedent is not None else {}
+        anciens = precedent._termes if precedent is not None else {}
+
+        # Par filière : textes d'origine, colonnes des termes et comptes pondérés
+        self._termes: Dict[int, Tuple[tuple, np.ndarray, np.ndarray]] = {}
+        self.reutilisees = 0
+        for filiere in self.filieres:
+            textes = tuple(filiere[champ] for champ, _ in POIDS_CHAMPS)
+            entree = anciens.get(filiere['id'])
+            if entree is not None and entree[0] == textes:
+                self.reutilisees += 1
+            else:
+                entree = self._vectoriser(textes)
+            self._termes[filiere['id']] = entree
+
+        self._construire_matrice()
+        self._construire_domaines()
+        self._types = np.array([f['type'] for f in self.filieres], dtype=object)
+        self._codes_types = np.unique(self._types, return_inverse=True)[1]
+        self._bonus_profils: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        # Scores des préférences récentes : le compte et « la suite » réutilisent
+        # le calcul de la première page
+        self._score = functools.lru_cache(maxsize=64)(self._scorer)
+
+    def _vectoriser(self, textes: tuple) -> Tuple[tuple, np.ndarray, np.ndarray]:
+        """Colonnes et comptes pondérés des termes des champs d'une filière"""
+        comptes = Counter()
+        for (_, poids), texte in zip(POIDS_CHAMPS, textes):
+            for terme in termes(texte):
+                comptes[terme] += poids
+        colonnes = [self.vocabulaire.setdefault(terme, len(self.vocabulaire)) for terme in comptes]
+        return (textes, np.array(colonnes, dtype=np.int64),
+                np.array(list(comptes.values()), dtype=np.float64))
+
+    def _compacter(self, frequences: np.ndarray) -> np.ndarray:
+        """Retirer du vocabulaire les termes qui n'apparaissent plus ; nouvelles fréquences"""
+        conserves = np.flatnonzero(frequences)
+        nouvelles = np.full(len(frequences), -1, dtype=np.int64)
+        nouvelles[conserves] = np.arange(len(conserves))
+        self.vocabulaire = {t: int(nouvelles[j]) for t, j in self.vocabulaire.items() if nouvelles[j] >= 0}
+        self._termes = {i: (textes, nouvelles[colonnes], comptes)
+                        for i, (textes, colonnes, comptes) in self._termes.items()}
+        return frequences[conserves]
+
+    def _construire_matrice(self):
+        """Matrice TF-IDF (filières x termes), lignes normalisées"""
+        entrees = [self._termes[f['id']] for f in self.filieres]
+        frequences = np.bincount(
+            np.concatenate([e[1] for e in entrees] or [np.zeros(0, dtype=np.int64)]),
+            minlength=len(self.vocabulaire),
+        )
+        # Après de nombreuses modifications, la moitié du vocabulaire peut être morte
+        if np.count_nonzero(frequences) * 2 < len(frequences):
+            frequences = self._compacter(frequences)
+            entrees = [self._termes[f['id']] for f in self.filieres]
+
+        nb_filieres, nb_termes = len(entrees), len(self.vocabulaire)
+        longueurs = np.array([len(e[1]) for e in entrees], dtype=np.int64)
+        colonnes = np.concatenate([e[1] for e in entrees] or [np.zeros(0, dtype=np.int64)])
+        comptes = np.concatenate([e[2] for e in entrees] or [np.zeros(0)])
+
+        # IDF lissé ; TF sous-linéaire pour qu'un mot répété ne domine pas
+        self.idf = np.log((1 + nb_filieres) / (1 + frequences)) + 1.0
+        poids = (1.0 + np.log(comptes)) * self.idf[colonnes]
+        lignes = np.repeat(np.arange(nb_filieres), longueurs)
+        normes = np.sqrt(np.bincount(lignes, weights=poids ** 2, minlength=nb_filieres))
+        normes[normes == 0] = 1.0
+        self.matrice = sparse.csr_matrix(
+            (poids / normes[lignes], colonnes, np.concatenate(([0], np.cumsum(longueurs)))),
+            shape=(nb_filieres, nb_termes),
+        )
+
+    def _construire_domaines(self):
+        """Matrice d'appartenance (filières x domaines)"""
+        self._rangs = rangs = {f['id']: i for i, f in enumerate(self.filieres)}
+        self._colonnes_domaines = {d['id']: j for j, d in enumerate(self.snapshot.domaines)}
+        lignes, colonnes = [], []
+        for domaine_id, filieres in self.snapshot.filieres_by_domaine.items():
+            j = self._colonnes_domaines.get(domaine_id)
+            if j is None:
+                continue
+            for filiere in filieres:
+                lignes.append(rangs[filiere['id']])
+                colonnes.append(j)
+        self.appartenance = sparse.csr_matrix(
+            (np.ones(len(lignes)), (lignes, colonnes)),
+            shape=(len(self.filieres), len(self._colonnes_domaines)),
+        )
+
+    def _requete(self, domaine: Optional[str], texte: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Vecteurs de préférence : termes (TF-IDF normalisé) et domaines correspondants"""
+        vecteur = np.zeros(len(self.vocabulaire))
+        for terme, compte in Counter(termes(domaine) + termes(texte)).items():
+            j = self.vocabulaire.get(terme)
+            if j is not None:
+                vecteur[j] = (1.0 + np.log(compte)) * self.idf[j]
+        norme = np.linalg.norm(vecteur)
+        if norme:
+            vecteur /= norme
+
+        domaines = np.zeros(len(self._colonnes_domaines))
+        if domaine:
+            for d in self.snapshot._domaines_correspondants(domaine):
+                domaines[self._colonnes_domaines[d['id']]] = 1.0
+        return vecteur, domaines
+
+    def scores(self, preferences: Sequence[Mapping]) -> np.ndarray:
+        """Scores de toutes les filières pour un lot de préférences (une ligne par préférence).
+
+        Chaque préférence est un mapping avec les clés optionnelles
+        ``domaine``, ``type_filiere`` et ``texte`` ; le type préféré ne change
+        pas les scores, il ordonne le classement (voir _classer).
+        """
+        requetes = [self._requete(p.get('domaine'), p.get('texte')) for p in preferences]
+        termes_requetes = np.array([r[0] for r in requetes]).reshape(len(requetes), len(self.vocabulaire))
+        domaines_requetes = np.array([r[1] for r in requetes]).reshape(len(requetes), len(self._colonnes_domaines))
+
+        # Similarité cosinus et rattachement aux domaines pour tout le lot : produits
+        # de la matrice creuse par un bloc dense, sans transposer la matrice
+        scores = self.matrice @ termes_requetes.T + POIDS_DOMAINE * (self.appartenance @ domaines_requetes.T)
+        return np.ascontiguousarray(scores.T)
+
+    def _scorer(self, domaine: Optional[str], texte: Optional[str]) -> np.ndarray:
+        """Scores pour une préférence, en lecture seule (mémorisés par _score)"""
+        ligne = self.scores([{'domaine': domaine, 'texte': texte}])[0]
+        ligne.setflags(write=False)
+        return ligne
+
+    @staticmethod
+    def _meilleurs(ligne: np.ndarray, candidats: np.ndarray, n: int) -> np.ndarray:
+        """Les n meilleurs candidats (rangs) d'une ligne de scores, triés"""
+        if n < len(candidats):
+            # Seuls les n meilleurs (et leurs ex-aequo) sont triés : à score
+            # égal l'ordre des id départage, les pages restent cohérentes
+            seuil = np.partition(ligne[candidats], len(candidats) - n)[len(candidats) - n]
+            candidats = candidats[ligne[candidats] >= seuil]
+        return candidats[np.lexsort((candidats, -ligne[candidats]))][:n]
+
+    @classmethod
+    def _classer(cls, ligne: np.ndarray, k: int, offset: int,
+                 prioritaires: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rangs des filières classées offset..offset+k pour une ligne de scores.
+
+        Les filières pertinentes du masque ``prioritaires`` (type préféré)
+        passent avant les autres, chaque groupe étant classé par score.
+        """
+        fin = offset + k
+        pertinentes = ligne > 0
+        if prioritaires is None:
+            return cls._meilleurs(ligne, np.flatnonzero(pertinentes), fin)[offset:]
+        rangs = cls._meilleurs(ligne, np.flatnonzero(pertinentes & prioritaires), fin)
+        if len(rangs) < fin:
+            autres = cls._meilleurs(ligne, np.flatnonzero(pertinentes & ~prioritaires), fin - len(rangs))
+            rangs = np.concatenate((rangs, autres))
+        return rangs[offset:]
+
+    def _prioritaires(self, type_filiere: Optional[str]) -> Optional[np.ndarray]:
+        """Masque des filières du type préféré, ou None sans préférence"""
+        return self._types == type_filiere if type_filiere else None
+
+    def recommander_lot(self, preferences: Sequence[Mapping], k: int = 3,
+                        offset: int = 0) -> List[List[Tuple[Mapping, float]]]:
+        """Les filières classées offset..offset+k pour chaque préférence du lot, avec leur score"""
+        return [[(self.filieres[i], float(ligne[i]))
+                 for i in self._classer(ligne, k, offset, self._prioritaires(preference.get('type_filiere')))]
+                for preference, ligne in zip(preferences, self.scores(preferences))]
+
+    def recommander(self, domaine: str = None, type_filiere: str = None, texte: str = None,
+                    k: int = 3, offset: int = 0) -> List[Tuple[Mapping, float]]:
+        """Les k filières les plus pertinentes pour ces préférences (type préféré d'abord), avec leur score"""
+        ligne = self._score(domaine, texte)
+        return [(self.filieres[i], float(ligne[i]))
+                for i in self._classer(ligne, k, offset, self._prioritaires(type_filiere))]
+
+    def compter(self, domaine: str = None, type_filiere: str = None, texte: str = None) -> int:
+        """Nombre de filières pertinentes (score non nul) pour ces préférences"""
+        return int(np.count_nonzero(self._score(domaine, texte) > 0))
+
+    def _profils(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Profil (type, domaines) de chaque filière et bonus de similarité entre profils.
+
+        La part des domaines (Jaccard) et du type ne dépend que du profil ;
+        les profils distincts sont peu nombreux, leur table se calcule une fois.
+        """
+        indptr, indices = self.appartenance.indptr, self.appartenance.indices
+        profils: Dict[Tuple[int, frozenset], int] = {}
+        codes = np.empty(len(self.filieres), dtype=np.int64)
+        for i in range(len(self.filieres)):
+            cle = (int(self._codes_types[i]), frozenset(indices[indptr[i]:indptr[i + 1]].tolist()))
+            codes[i] = profils.setdefault(cle, len(profils))
+
+        bonus = np.zeros((len(profils), len(profils)))
+        for (type_a, domaines_a), a in profils.items():
+            for (type_b, domaines_b), b in profils.items():
+                union = len(domaines_a | domaines_b)
+                jaccard = len(domaines_a & domaines_b) / union if union else 0.0
+                bonus[a, b] = POIDS_VOISIN_DOMAINES * jaccard + POIDS_VOISIN_TYPE * (type_a == type_b)
+        return codes, bonus
+
+    def similarites(self, rangs: np.ndarray) -> np.ndarray:
+        """Similarité de quelques filières (rangs dans self.filieres) avec toutes les autres.
+
+        Une filière n'est jamais similaire à elle-même (score -1) ; une
+        filière dont les textes et domaines ne dépassent pas
+        SIMILARITE_MIN_VOISIN n'est pas similaire (score 0), quel que soit
+        son type.
+        """
+        if self._bonus_profils is None:
+            self._bonus_profils = self._profils()
+        codes, bonus = self._bonus_profils
+
+        # Matrice creuse du catalogue par un bloc dense de lignes : le résultat
+        # est de toute façon presque plein, un produit creux x creux serait plus lent
+        textes = (self.matrice @ self.matrice[rangs].toarray().T).T
+        scores = bonus[codes[rangs]][:, codes]
+        scores += POIDS_VOISIN_TEXTE * textes
+        meme_type = self._codes_types[rangs][:, None] == self._codes_types[None, :]
+        scores[scores - POIDS_VOISIN_TYPE * meme_type < SIMILARITE_MIN_VOISIN] = 0.0
+        scores[np.arange(len(rangs)), rangs] = -1.0
+        return scores
+
+    def voisins(self, k: int = 5) -> Iterator[Tuple[int, int, int, float]]:
+        """Les k voisins de chaque filière : tuples (filiere_id, rang, voisin_id, score).
+
+        Les similarités sont calculées par blocs de lignes pour borner la
+        mémoire sur un gros catalogue ; le classement de chaque bloc est
+        vectorisé (à score égal, le plus petit id d'abord, comme _classer).
+        """
+        nb_filieres = len(self.filieres)
+        k = min(k, nb_filieres - 1)
+        if k <= 0:
+            return
+        ids = [f['id'] for f in self.filieres]
+        taille_bloc = max(1, TAILLE_BLOC_VOISINS // nb_filieres)
+        for debut in range(0, nb_filieres, taille_bloc):
+            rangs = np.arange(debut, min(debut + taille_bloc, nb_filieres))
+            scores = self.similarites(rangs)
+
+            # Candidats : au moins le k-ième score de la ligne (ex-aequo compris)
+            seuils = np.partition(scores, nb_filieres - k, axis=1)[:, nb_filieres - k]
+            lignes, colonnes = np.nonzero((scores >= seuils[:, None]) & (scores > 0))
+            valeurs = scores[lignes, colonnes]
+
+            # Tri par ligne, score décroissant puis id ; k premiers de chaque ligne
+            ordre = np.lexsort((colonnes, -valeurs, lignes))
+            lignes, colonnes, valeurs = lignes[ordre], colonnes[ordre], valeurs[ordre]
+            positions = np.arange(len(lignes)) - np.searchsorted(lignes, lignes)
+            garder = positions < k
+            for i, position, j, score in zip(lignes[garder], positions[garder],
+                                             colonnes[garder], valeurs[garder]):
+                yield ids[rangs[i]], int(position) + 1, ids[j], float(score)
+
+    def voisins_de(self, filiere_id: int, k: int = 3) -> List[Tuple[Mapping, float]]:
+        """Les k filières les plus proches d'une filière, calculées à la volée"""
+        rang = self._rangs.get(filiere_id)
+        if rang is None:
+            return []
+        ligne = self.similarites(np.array([rang]))[0]
+        return [(self.filieres[j], float(ligne[j])) for j in self._classer(ligne, k, 0)]
@@ -0,0 +1,164 @@
+from collections import namedtuple
+from collections.abc import Mapping
+from typing import Any, Dict, Tuple
+
+class Record(Mapping):
+    """Enregistrement immuable du catalogue, compact et partageable.
+
+    Chaque type d'enregistrement est un ``namedtuple`` (pas de ``__dict__``
+    par instance, construction en C directement depuis la ligne renvoyée
+    par sqlite3) qui se comporte aussi comme un mapping en lecture :
+    ``filiere['nom']``, ``.get()``, ``.items()``, ``'nom' in filiere``,
+    ``dict(filiere)`` fonctionnent comme avec les dicts d'origine, en plus
+    de l'accès par attribut. Un enregistrement ne peut pas être modifié ;
+    il peut donc être partagé entre snapshot, caches et threads sans copie.
+    """
+
+    __slots__ = ()
+    # Fourni par le namedtuple de chaque sous-classe
+    _fields: Tuple[str, ...]
+    _positions: Dict[str, int] = {}
+
+    # Dernier ordre de colonnes vu par row_factory : (description, ordre ou None si identique)
+    _derniere_description: Tuple[Any, Any] = (None, None)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._positions = {champ: i for i, champ in enumerate(cls._fields)}
+        cls._derniere_description = (None, None)
+
+    @classmethod
+    def _creer(cls, valeurs):
+        """Construire l'enregistrement à partir des valeurs, dans l'ordre des champs"""
+        return tuple.__new__(cls, valeurs)
+
+    @classmethod
+    def depuis(cls, source: Mapping, **champs):
+        """Construire un enregistrement à partir d'un mapping (dict, Record, ligne asyncpg)"""
+        return cls._creer([champs[c] if c in champs else source.get(c) for c in cls._fields])
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """``row_factory`` sqlite3 : associe les colonnes aux champs par leur nom"""
+        description = cursor.description
+        derniere, ordre = cls._derniere_description
+        if derniere is not description:
+            noms = tuple(col[0] for col in description)
+            if noms == cls._fields:
+                ordre = None
+            else:
+                positions = {nom: i for i, nom in enumerate(noms)}
+                ordre = tuple(positions.get(champ) for champ in cls._fields)
+            cls._derniere_description = (description, ordre)
+        if ordre is None:
+            return cls._creer(row)
+        return cls._creer([None if i is None else row[i] for i in ordre])
+
+    def remplacer(self, **champs):
+        """Copie de l'enregistrement avec certains champs modifiés"""
+        return self.depuis(self, **champs)
+
+    def valeurs(self) -> Tuple[Any, ...]:
+        """Valeurs des champs, dans l'ordre de déclaration"""
+        return tuple.__getitem__(self, slice(None))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copie modifiable sous forme de dict"""
+        return dict(zip(self._fields, self.valeurs()))
+
+    # Les versions du namedtuple itèrent sur l'enregistrement, donc sur ses clés
+    _asdict = to_dict
+    _replace = remplacer
+
+    # Interface de mapping : les clés sont les noms des champs
+    def __getitem__(self, cle: str) -> Any:
+        return tuple.__getitem__(self, self._positions[cle])
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __contains__(self, cle) -> bool:
+        return cle in self._positions
+
+    __len__ = tuple.__len__
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return tuple.__eq__(self, other)
+        return Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        resultat = self.__eq__(other)
+        return resultat if resultat is NotImplemented else not resultat
+
+    __hash__ = tuple.__hash__
+
+    def __getnewargs__(self):
+        return self.valeurs()
+
+    def __repr__(self) -> str:
+        champs = ', '.join(f"{champ}={valeur!r}" for champ, valeur in zip(self._fields, self.valeurs()))
+        return f"{type(self).__name__}({champs})"
+
+CHAMPS_ETABLISSEMENT = ('id', 'nom', 'type', 'description', 'contact', 'site_web')
+
+CHAMPS_FILIERE = ('id', 'nom', 'type', 'duree', 'description', 'debouches',
+                  'conditions_admission', 'etablissement_id', 'frais_inscription',
+                  'etablissement_nom', 'contact_etablissement', 'site_web_etablissement')
+
+class Etablissement(Record, namedtuple('Etablissement', CHAMPS_ETABLISSEMENT)):
+    """Établissement de l'université"""
+    __slots__ = ()
+
+class EtablissementAvecCompte(Record, namedtuple('EtablissementAvecCompte',
+                                                 CHAMPS_ETABLISSEMENT + ('nb_filieres',))):
+    """Établissement avec son nombre de filières"""
+    __slots__ = ()
+
+class EtablissementDomaine(Record, namedtuple('EtablissementDomaine',
+                                              CHAMPS_ETABLISSEMENT + ('domaine_nom',))):
+    """Établissement proposant des filières d'un domaine d'intérêt"""
+    __slots__ = ()
+
+class Filiere(Record, namedtuple('Filiere', CHAMPS_FILIERE)):
+    """Filière avec le nom et les coordonnées de son établissement"""
+    __slots__ = ()
+
+class FiliereDomaine(Record, namedtuple('FiliereDomaine', CHAMPS_FILIERE + ('domaine_nom',))):
+    """Filière rattachée à un domaine d'intérêt"""
+    __slots__ = ()
+
+class FiliereSimilaire(Record, namedtuple('FiliereSimilaire', CHAMPS_FILIERE + ('score',))):
+    """Filière proche d'une autre, avec son score de similarité"""
+    __slots__ = ()
+
+class Domaine(Record, namedtuple('Domaine', ('id', 'nom', 'description'))):
+    """Domaine d'intérêt"""
+    __slots__ = ()
+
+class LiaisonDomaine(Record, namedtuple('LiaisonDomaine', ('filiere_id', 'domaine_id'))):
+    """Rattachement d'une filière à un domaine d'intérêt"""
+    __slots__ = ()
+
+class Similarite(Record, namedtuple('Similarite', ('filiere_id', 'rang', 'voisin_id', 'score'))):
+    """Voisin précalculé d'une filière (rang 1 = le plus proche)"""
+    __slots__ = ()
+
+class Etape(Record, namedtuple('Etape', ('id', 'etape', 'description', 'details', 'liens_utiles'))):
+    """Étape du processus de préinscription"""
+    __slots__ = ()
+
+class Document(Record, namedtuple('Document', ('id', 'type_document', 'description', 'obligatoire'))):
+    """Document requis pour la préinscription"""
+    __slots__ = ()
+
+    @classmethod
+    def _creer(cls, valeurs):
+        # obligatoire est stocké en INTEGER dans la base
+        *debut, obligatoire = valeurs
+        return tuple.__new__(cls, (*debut, bool(obligatoire)))
+
+class DateImportante(Record, namedtuple('DateImportante',
+                                        ('id', 'evenement', 'date_debut', 'date_fin', 'annee_academique'))):
+    """Date importante du calendrier académique"""
+    __slots__ = ()
@@ -0,0 +1,126 @@
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from database.catalogue import CatalogueSnapshot, normaliser
+
+# Mots trop fréquents pour distinguer deux noms du catalogue
+MOTS_IGNORES = {
+    'au', 'aux', 'de', 'des', 'du', 'en', 'et', 'la', 'le', 'les', 'pour',
+    'sur', 'un', 'une',
+}
+
+def trigrammes(texte: str) -> set:
+    """Trigrammes d'un texte normalisé, chaque mot étant bordé d'espaces"""
+    resultat = set()
+    for mot in texte.split():
+        mot = f"  {mot} "
+        for i in range(len(mot) - 2):
+            resultat.add(mot[i:i + 3])
+    return resultat
+
+def charger_synonymes(nlu_path: str) -> Dict[str, str]:
+    """Lire les blocs ``- synonym:`` d'un fichier NLU Rasa (exemple -> valeur canonique)"""
+    path = Path(nlu_path)
+    if not path.exists():
+        return {}
+
+    synonymes = {}
+    valeur = None
+    for ligne in path.read_text(encoding='utf-8').splitlines():
+        entete = re.match(r'^- (\w+):\s*(.*)$', ligne)
+        if entete:
+            valeur = entete.group(2).strip().strip('"\'') if entete.group(1) == 'synonym' else None
+            continue
+        exemple = re.match(r'^\s+- (.+)$', ligne)
+        if valeur and exemple:
+            synonymes[normaliser(exemple.group(1).strip().strip('"\''))] = valeur
+    return synonymes
+
+class FuzzyResolver:
+    """Résolution tolérante aux fautes des noms de filières, établissements et domaines.
+
+    Chaque enregistrement est indexé sous plusieurs clés normalisées (nom
+    complet, mots significatifs du nom, synonymes du fichier NLU). Un index
+    inversé trigramme -> clés permet de ne scorer que les clés qui partagent
+    au moins un trigramme avec la requête ; le score est le coefficient de
+    Dice entre les deux ensembles de trigrammes.
+    """
+
+    def __init__(self, snapshot: CatalogueSnapshot, synonymes: Optional[Dict[str, str]] = None):
+        self._cles: List[Tuple[str, str, Mapping, int]] = []
+        self._index: Dict[str, List[int]] = {}
+
+        sources = (
+            ('filiere', snapshot.filieres),
+            ('etablissement', snapshot.etablissements),
+            ('domaine', snapshot.domaines),
+        )
+        noms: Dict[str, List[Tuple[str, Mapping]]] = {}
+        for kind, records in sources:
+            for record in records:
+                nom = normaliser(record['nom'])
+                noms.setdefault(nom, []).append((kind, record))
+                self._ajouter(nom, kind, record)
+                for mot in re.findall(r'\w+', nom):
+                    if len(mot) >= 3 and mot not in MOTS_IGNORES:
+                        self._ajouter(mot, kind, record)
+
+        for exemple, valeur in (synonymes or {}).items():
+            cible = normaliser(valeur)
+            for kind, record in noms.get(cible, ()):
+                self._ajouter(exemple, kind, record)
+
+    def _ajouter(self, cle: str, kind: str, record: Mapping):
+        """Indexer une clé normalisée pour un enregistrement"""
+        grams = trigrammes(cle)
+        if not grams:
+            return
+        position = len(self._cles)
+        self._cles.append((cle, kind, record, len(grams)))
+        for gram in grams:
+            self._index.setdefault(gram, []).append(position)
+
+    def _scores(self, requete: str, kind: Optional[str]) -> Dict[Tuple[str, int], Tuple[Mapping, float]]:
+        """Meilleur score de chaque enregistrement pour un texte déjà normalisé"""
+        grams = trigrammes(requete)
+        communs = Counter()
+        for gram in grams:
+            communs.update(self._index.get(gram, ()))
+
+        meilleurs: Dict[Tuple[str, int], Tuple[Mapping, float]] = {}
+        for position, nb_communs in communs.items():
+            cle, cle_kind, record, nb_grams = self._cles[position]
+            if kind and cle_kind != kind:
+                continue
+            score = 1.0 if cle == requete else 2.0 * nb_communs / (len(grams) + nb_grams)
+            identite = (cle_kind, record['id'])
+            if identite not in meilleurs or score > meilleurs[identite][1]:
+                meilleurs[identite] = (record, score)
+        return meilleurs
+
+    def resolve(self, texte: str, kind: Optional[str] = None, k: int = 3,
+                min_score: float = 0.3) -> List[Tuple[Mapping, float]]:
+        """Retourner les k meilleurs enregistrements pour un texte, avec leur score (0-1)"""
+        requete = normaliser(texte)
+        if not requete:
+            return []
+        meilleurs = self._scores(requete, kind)
+
+        # Requête de plusieurs mots : moyenne des meilleurs scores mot à mot,
+        # pour que « licence infromatique » retrouve les deux mots séparément
+        mots = [m for m in requete.split() if m not in MOTS_IGNORES]
+        if len(mots) > 1:
+            cumul: Dict[Tuple[str, int], list] = {}
+            for mot in mots:
+                for identite, (record, score) in self._scores(mot, kind).items():
+                    cumul.setdefault(identite, [record, 0.0])[1] += score
+            for identite, (record, total) in cumul.items():
+                score = total / len(mots)
+                if identite not in meilleurs or score > meilleurs[identite][1]:
+                    meilleurs[identite] = (record, score)
+
+        resultats = [r for r in meilleurs.values() if r[1] >= min_score]
+        resultats.sort(key=lambda r: (-r[1], r[0]['id']))
+        return resultats[:k]
@@ -0,0 +1,300 @@
+"""Gestion du cache d'entraînement de Rasa (.rasa/cache).
+
+Rasa enregistre le résultat de chaque nœud du graphe d'entraînement dans
+un répertoire ``tmpXXXX`` du cache, référencé par une entrée de cache.db
+(empreinte, dernière utilisation, emplacement). Rien ne les supprime tant
+que le cache reste sous RASA_MAX_CACHE_SIZE : les répertoires s'accumulent
+d'un entraînement à l'autre, souvent avec un contenu identique.
+
+- ``rapport`` : taille par composant, entrées sans répertoire, répertoires
+  sans entrée, artefacts identiques ;
+- ``elaguer`` : supprime les entrées dont le répertoire a disparu, les
+  répertoires orphelins, les entrées inutilisées depuis ``--age-max`` jours,
+  puis les moins récemment utilisées jusqu'à revenir sous ``--taille-max`` ;
+- ``dedupliquer`` : remplace les fichiers identiques (même contenu) par des
+  liens durs vers un seul exemplaire. Chaque entrée garde son répertoire :
+  Rasa peut toujours en supprimer un sans toucher aux autres.
+
+Les entrées sont supprimées de cache.db dans une transaction avant leurs
+répertoires, pour qu'un entraînement concurrent ne trouve jamais une entrée
+dont le répertoire est en cours de suppression.
+
+Usage (depuis projectRasa/) :
+    python -m entrainement.cache rapport
+    python -m entrainement.cache elaguer --taille-max 200 --age-max 14
+    python -m entrainement.cache elaguer --simulation
+    python -m entrainement.cache dedupliquer
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+REPERTOIRE_PAR_DEFAUT = os.environ.get("RASA_CACHE_DIRECTORY", ".rasa/cache")
+# Budget par défaut : celui de Rasa (RASA_MAX_CACHE_SIZE, en Mio)
+TAILLE_MAX_PAR_DEFAUT = float(os.environ.get("RASA_MAX_CACHE_SIZE", "1000"))
+AGE_MAX_PAR_DEFAUT = 30
+# Un répertoire sans entrée plus récent que ce délai peut appartenir à un entraînement en cours
+DELAI_ORPHELIN = 3600
+MIO = 1024 * 1024
+
+# Fichiers caractéristiques des artefacts des composants de Rasa
+FICHIERS_COMPOSANTS = {
+    'ted_policy': 'TEDPolicy',
+    'unexpected_intent_policy': 'UnexpecTEDIntentPolicy',
+    'rule_policy.json': 'RulePolicy',
+    'memorized_turns.json': 'MemoizationPolicy',
+    'vocabularies.json': 'CountVectorsFeaturizer',
+    'patterns.json': 'RegexFeaturizer',
+    'feature_to_idx_dict.json': 'LexicalSyntacticFeaturizer',
+    'synonyms.json': 'EntitySynonymMapper',
+    'formes.json': 'CatalogueEntityExtractor',
+}
+
+Entree = namedtuple('Entree', ['cle', 'derniere_utilisation', 'version_rasa', 'repertoire'])
+# Fichier d'un artefact : (chemin, identité sur le disque (périphérique, inode), taille)
+Fichier = namedtuple('Fichier', ['chemin', 'inode', 'taille'])
+Bilan = namedtuple('Bilan', ['entrees', 'repertoires', 'octets'])
+Deduplication = namedtuple('Deduplication', ['fichiers', 'octets'])
+
+def composant(fichiers: Iterable[str]) -> str:
+    """Composant de Rasa qui a produit un artefact, d'après ses noms de fichiers"""
+    for nom in sorted(fichiers):
+        prefixe = nom.split('.', 1)[0]
+        if nom in FICHIERS_COMPOSANTS or prefixe in FICHIERS_COMPOSANTS:
+            return FICHIERS_COMPOSANTS.get(nom) or FICHIERS_COMPOSANTS[prefixe]
+        # DIETClassifier, ResponseSelector, ... préfixent leurs fichiers du nom de la classe
+        if re.fullmatch(r'[A-Z]\w+', prefixe) and '.' in nom:
+            return prefixe
+    return '?'
+
+def _mio(octets: float) -> str:
+    return f"{octets / MIO:.1f} Mio"
+
+class CacheEntrainement:
+    """Cache d'entraînement de Rasa : entrées de cache.db et répertoires d'artefacts"""
+
+    def __init__(self, repertoire: str = REPERTOIRE_PAR_DEFAUT):
+        self.repertoire = Path(repertoire)
+        self.base = self.repertoire / "cache.db"
+
+    def _connexion(self) -> sqlite3.Connection:
+        if not self.base.exists():
+            raise FileNotFoundError(f"Pas de cache d'entraînement dans {self.repertoire}")
+        return sqlite3.connect(str(self.base), timeout=30, isolation_level=None)
+
+    def _chemin(self, emplacement: Optional[str]) -> Optional[Path]:
+        """Répertoire d'une entrée ; les emplacements écrits sous Windows utilisent des antislashs"""
+        if not emplacement:
+            return None
+        return self.repertoire / re.split(r'[\\/]', emplacement.rstrip('\\/'))[-1]
+
+    def entrees(self) -> List[Entree]:
+        """Entrées de cache.db, de la moins à la plus récemment utilisée"""
+        conn = self._connexion()
+        try:
+            lignes = conn.execute(
+                "SELECT fingerprint_key, last_used, rasa_version, result_location "
+                "FROM cache_entry ORDER BY last_used"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [Entree(cle, datetime.fromisoformat(utilisation), version, self._chemin(emplacement))
+                for cle, utilisation, version, emplacement in lignes]
+
+    def repertoires(self) -> Dict[Path, List[Fichier]]:
+        """Répertoires d'artefacts présents dans le cache, avec leurs fichiers"""
+        resultat = {}
+        # Rasa crée ses répertoires d'artefacts avec tempfile.mkdtemp
+        for repertoire in sorted(p for p in self.repertoire.glob("tmp*") if p.is_dir()):
+            fichiers = []
+            for racine, _, noms in os.walk(repertoire):
+                for nom in noms:
+                    chemin = Path(racine) / nom
+                    stat = chemin.stat()
+                    fichiers.append(Fichier(chemin, (stat.st_dev, stat.st_ino), stat.st_size))
+            resultat[repertoire] = fichiers
+        return resultat
+
+    @staticmethod
+    def _taille(fichiers: Iterable[Fichier]) -> int:
+        """Octets occupés sur le disque, chaque inode n'étant compté qu'une fois"""
+        return sum({f.inode: f.taille for f in fichiers}.values())
+
+    @staticmethod
+    def _identiques(repertoires: Dict[Path, List[Fichier]]) -> List[List[Fichier]]:
+        """Groupes de fichiers de même contenu mais d'inodes différents"""
+        par_taille: Dict[int, Dict[tuple, Fichier]] = {}
+        for fichiers in repertoires.values():
+            for fichier in fichiers:
+                par_taille.setdefault(fichier.taille, {}).setdefault(fichier.inode, fichier)
+        groupes = []
+        for taille, par_inode in par_taille.items():
+            if len(par_inode) < 2 or taille == 0:
+                continue
+            par_contenu: Dict[str, List[Fichier]] = {}
+            for fichier in par_inode.values():
+                empreinte = hashlib.sha256(fichier.chemin.read_bytes()).hexdigest()
+                par_contenu.setdefault(empreinte, []).append(fichier)
+            groupes.extend(g for g in par_contenu.values() if len(g) > 1)
+        return groupes
+
+    def rapport(self) -> str:
+        """État du cache : tailles par composant, incohérences et doublons"""
+        entrees = self.entrees()
+        repertoires = self.repertoires()
+        references = {e.repertoire for e in entrees if e.repertoire}
+        pendantes = [e for e in entrees if e.repertoire and e.repertoire not in repertoires]
+        orphelins = [r for r in repertoires if r not in references]
+        tous = [f for fichiers in repertoires.values() for f in fichiers]
+        identiques = self._identiques(repertoires)
+        recuperables = sum(g[0].taille * (len(g) - 1) for g in identiques)
+
+        lignes = [
+            f"Cache {self.repertoire} : {len(entrees)} entrées, {len(repertoires)} répertoires",
+            f"Taille : {_mio(self._taille(tous))} sur le disque"
+            f" ({_mio(sum(f.taille for f in tous))} sans les liens durs)",
+            f"Entrées sans répertoire : {len(pendantes)} ; répertoires sans entrée : {len(orphelins)}",
+            f"Fichiers identiques : {sum(len(g) - 1 for g in identiques)} copies,"
+            f" {_mio(recuperables)} récupérables par déduplication",
+        ]
+        if entrees:
+            lignes.append(f"Utilisation : de {entrees[0].derniere_utilisation:%Y-%m-%d %H:%M}"
+                          f" à {entrees[-1].derniere_utilisation:%Y-%m-%d %H:%M}")
+
+        utilisations = {e.repertoire: e.derniere_utilisation for e in entrees if e.repertoire}
+        par_composant: Dict[str, List] = {}
+        for repertoire, fichiers in repertoires.items():
+            ligne = par_composant.setdefault(composant(f.chemin.name for f in fichiers), [0, [], None])
+            ligne[0] += 1
+            ligne[1].extend(fichiers)
+            utilisation = utilisations.get(repertoire)
+            if utilisation and (ligne[2] is None or utilisation > ligne[2]):
+                ligne[2] = utilisation
+        lignes.append("")
+        lignes.append(f"{'composant':28} {'artefacts':>9} {'taille':>12}  dernière utilisation")
+        for nom, (nombre, fichiers, utilisation) in sorted(
+                par_composant.items(), key=lambda c: -self._taille(c[1][1])):
+            date = f"{utilisation:%Y-%m-%d %H:%M}" if utilisation else "-"
+            lignes.append(f"{nom:28} {nombre:>9} {_mio(self._taille(fichiers)):>12}  {date}")
+        return "\n".join(lignes)
+
+    def elaguer(self, taille_max: Optional[float] = TAILLE_MAX_PAR_DEFAUT,
+                age_max: Optional[float] = AGE_MAX_PAR_DEFAUT, simulation: bool = False) -> Bilan:
+        """Ramener le cache sous ``taille_max`` Mio et supprimer les entrées de plus de ``age_max`` jours"""
+        entrees = self.entrees()
+        repertoires = self.repertoires()
+        a_supprimer: Set[str] = set()
+
+        # Entrées dont l'artefact a disparu : Rasa ne pourrait pas les réutiliser
+        for entree in entrees:
+            if entree.repertoire and entree.repertoire not in repertoires:
+                a_supprimer.add(entree.cle)
+        if age_max is not None:
+            # Rasa date les utilisations en UTC
+            limite = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=age_max)
+            a_supprimer.update(e.cle for e in entrees if e.derniere_utilisation < limite)
+
+        # Comptage des références de chaque inode, pour mesurer ce que libère
+        # réellement la suppression d'un répertoire dont des fichiers sont liés
+        restantes = [e for e in entrees if e.cle not in a_supprimer]
+        references = {e.repertoire for e in restantes if e.repertoire in repertoires}
+        tailles: Dict[tuple, int] = {}
+        liens: Dict[tuple, int] = {}
+        for repertoire in references:
+            for fichier in repertoires[repertoire]:
+                tailles[fichier.inode] = fichier.taille
+                liens[fichier.inode] = liens.get(fichier.inode, 0) + 1
+        total = sum(tailles.values())
+
+        if taille_max is not None:
+            for entree in restantes:
+                if total <= taille_max * MIO:
+                    break
+                if entree.repertoire not in references:
+                    continue
+                a_supprimer.add(entree.cle)
+                references.discard(entree.repertoire)
+                for fichier in repertoires[entree.repertoire]:
+                    liens[fichier.inode] -= 1
+                    if liens[fichier.inode] == 0:
+                        total -= fichier.taille
+
+        # Répertoires qui ne sont plus référencés, y compris les orphelins
+        # assez anciens pour ne pas appartenir à un entraînement en cours
+        gardes = {e.repertoire for e in entrees if e.cle not in a_supprimer}
+        connus = {e.repertoire for e in entrees}
+        maintenant = time.time()
+        supprimes = [r for r in repertoires if r not in gardes
+                     and (r in connus or maintenant - r.stat().st_mtime > DELAI_ORPHELIN)]
+        conserves = {f.inode for r in repertoires if r not in supprimes for f in repertoires[r]}
+        octets = self._taille(f for r in supprimes for f in repertoires[r] if f.inode not in conserves)
+
+        if not simulation:
+            if a_supprimer:
+                conn = self._connexion()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany("DELETE FROM cache_entry WHERE fingerprint_key = ?",
+                                     [(cle,) for cle in a_supprimer])
+                    conn.execute("COMMIT")
+                finally:
+                    conn.close()
+            for repertoire in supprimes:
+                shutil.rmtree(repertoire, ignore_errors=True)
+        return Bilan(len(a_supprimer), len(supprimes), octets)
+
+    def dedupliquer(self, simulation: bool = False) -> Deduplication:
+        """Remplacer les fichiers identiques par des liens durs vers un seul exemplaire"""
+        repertoires = self.repertoires()
+        fichiers, octets = 0, 0
+        for groupe in self._identiques(repertoires):
+            garde, *copies = groupe
+            for copie in copies:
+                if not simulation:
+                    temporaire = copie.chemin.with_name(copie.chemin.name + ".lien")
+                    try:
+                        os.link(garde.chemin, temporaire)
+                    except OSError:
+                        # Système de fichiers sans liens durs : la copie reste en place
+                        continue
+                    os.replace(temporaire, copie.chemin)
+                fichiers += 1
+                octets += copie.taille
+        return Deduplication(fichiers, octets)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rapport, élagage et déduplication du cache d'entraînement Rasa")
+    parser.add_argument("commande", choices=("rapport", "elaguer", "dedupliquer"))
+    parser.add_argument("--cache", default=REPERTOIRE_PAR_DEFAUT, help="répertoire du cache")
+    parser.add_argument("--taille-max", type=float, default=TAILLE_MAX_PAR_DEFAUT,
+                        help="taille maximale du cache en Mio (0 : aucune limite)")
+    parser.add_argument("--age-max", type=float, default=AGE_MAX_PAR_DEFAUT,
+                        help="jours sans utilisation avant suppression d'une entrée (0 : aucune limite)")
+    parser.add_argument("--simulation", action="store_true", help="afficher ce qui serait fait sans rien modifier")
+    args = parser.parse_args(argv)
+
+    cache = CacheEntrainement(args.cache)
+    if args.commande == "rapport":
+        print(cache.rapport())
+        return 0
+    prefixe = "Simulation : " if args.simulation else ""
+    if args.commande == "dedupliquer":
+        bilan = cache.dedupliquer(args.simulation)
+        print(f"{prefixe}{bilan.fichiers} fichiers remplacés par des liens durs, {_mio(bilan.octets)} libérés")
+        return 0
+    bilan = cache.elaguer(args.taille_max or None, args.age_max or None, args.simulation)
+    print(f"{prefixe}{bilan.entrees} entrées et {bilan.repertoires} répertoires supprimés,"
+          f" {_mio(bilan.octets)} libérés")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Entraînement incrémental : ne refaire que ce que les modifications imposent.
+
+Les entrées du projet sont réparties en groupes dont les empreintes sont
+comparées à celles du dernier entraînement réussi (.rasa/entrainement.json) :
+
+- ``config`` : config.yml et le code des composants personnalisés (components/) ;
+- ``domaine`` : domain.yml et les réponses déclarées dans les données ;
+- ``dialogue`` : stories et rules ;
+- ``etiquettes`` : intents et types d'entités annotés dans les exemples NLU ;
+- ``nlu`` : exemples NLU, lookup tables, synonymes et regex.
+
+Décision :
+
+- rien n'a changé : le modèle existant est conservé ;
+- seuls des exemples NLU ont changé, avec les mêmes étiquettes (cas des
+  mises à jour du catalogue par ``--catalogue``) : fine-tuning du dernier
+  modèle (``rasa train --finetune``) avec une fraction des epochs ;
+- sinon : entraînement complet, pendant lequel Rasa reprend de .rasa/cache
+  les composants du graphe dont les entrées n'ont pas changé (les
+  composants NLU quand seules les stories changent, par exemple).
+
+Après ``--max-finetune`` fine-tunings successifs, un entraînement complet
+est imposé pour que le modèle ne dérive pas. Le temps gagné est rapporté
+par rapport au dernier entraînement complet. Après chaque entraînement, le
+cache est ramené dans son budget de taille et d'âge (entrainement.cache).
+
+Usage (depuis projectRasa/) :
+    python -m entrainement.incremental
+    python -m entrainement.incremental --catalogue     # régénérer data/lookups_catalogue.yml avant
+    python -m entrainement.incremental --plan          # afficher la décision sans entraîner
+    python -m entrainement.incremental --epoch-fraction 0.3 --max-finetune 3
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ruamel.yaml import YAML
+
+from entrainement.cache import CacheEntrainement
+
+ETAT_PAR_DEFAUT = ".rasa/entrainement.json"
+# Entraînements conservés dans l'historique de l'état
+TAILLE_HISTORIQUE = 50
+
+# Annotations d'entités dans les exemples : [texte](entite), [texte](entite:role), {"entity": "entite"}
+ANNOTATION = re.compile(r'\[[^\]]*\]\((\w+)[:)]|\{\s*"entity"\s*:\s*"(\w+)"')
+
+Plan = namedtuple('Plan', ['mode', 'raison', 'groupes'])
+
+# Modes d'entraînement
+AUCUN, FINETUNE, COMPLET = 'aucun', 'finetune', 'complet'
+
+def empreinte(valeur: Any) -> str:
+    """Empreinte SHA-256 d'une valeur JSON (clés triées : l'ordre des clés YAML est ignoré)"""
+    texte = json.dumps(valeur, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+def _lire_yaml(path: Path) -> Any:
+    """Contenu d'un fichier YAML (None s'il est vide)"""
+    return YAML(typ='safe').load(path.read_text(encoding='utf-8'))
+
+def _fichiers(chemin: str, motifs=("*.yml", "*.yaml")) -> List[Path]:
+    """Fichiers d'un répertoire (récursivement) ou fichier seul, triés"""
+    path = Path(chemin)
+    if path.is_file():
+        return [path]
+    return sorted(f for motif in motifs for f in path.rglob(motif))
+
+def empreintes(config: str = "config.yml", domaine: str = "domain.yml", donnees: str = "data",
+               composants: str = "components") -> Dict[str, str]:
+    """Empreinte de chaque groupe d'entrées de l'entraînement"""
+    config_contenu = [_lire_yaml(Path(config))]
+    # Le code d'un composant personnalisé fait partie de la configuration du graphe
+    config_contenu += [f.read_text(encoding='utf-8') for f in _fichiers(composants, ("*.py",))]
+
+    domaine_contenu = [_lire_yaml(f) for f in _fichiers(domaine)]
+    nlu: List[Any] = []
+    dialogue: Dict[str, List[Any]] = {'stories': [], 'rules': []}
+    for fichier in _fichiers(donnees):
+        contenu = _lire_yaml(fichier) or {}
+        nlu.extend(contenu.get('nlu') or ())
+        for cle in dialogue:
+            dialogue[cle].extend(contenu.get(cle) or ())
+        if contenu.get('responses'):
+            domaine_contenu.append({'responses': contenu['responses']})
+
+    intents, entites = set(), set()
+    for bloc in nlu:
+        if 'intent' in bloc:
+            intents.add(bloc['intent'])
+        for groupes in ANNOTATION.findall(str(bloc.get('examples') or '')):
+            entites.update(g for g in groupes if g)
+
+    return {
+        'config': empreinte(config_contenu),
+        'domaine': empreinte(domaine_contenu),
+        'dialogue': empreinte(dialogue),
+        'etiquettes': empreinte({'intents': sorted(intents), 'entites': sorted(entites)}),
+        'nlu': empreinte(nlu),
+    }
+
+def planifier(actuelles: Dict[str, str], etat: Dict[str, Any], max_finetune: int = 5,
+              complet: bool = False) -> Plan:
+    """Choisir le mode d'entraînement d'après les groupes modifiés depuis le dernier entraînement"""
+    precedentes = etat.get('empreintes') or {}
+    groupes = [g for g, valeur in actuelles.items() if precedentes.get(g) != valeur]
+    modele = etat.get('modele')
+
+    if complet:
+        return Plan(COMPLET, "entraînement complet demandé", groupes)
+    if not modele or not Path(modele).exists():
+        return Plan(COMPLET, "aucun modèle précédent", groupes)
+    if not groupes:
+        return Plan(AUCUN, "aucune entrée modifiée", groupes)
+    if groupes != ['nlu']:
+        return Plan(COMPLET, f"entrées modifiées : {', '.join(groupes)}", groupes)
+    if etat.get('finetunes', 0) >= max_finetune:
+        return Plan(COMPLET, f"{etat['finetunes']} fine-tunings successifs depuis le dernier "
+                             "entraînement complet", groupes)
+    return Plan(FINETUNE, "seuls des exemples NLU ont changé", groupes)
+
+def _dernier_modele(sortie: str, depuis: float) -> Optional[str]:
+    """Modèle le plus récent écrit dans ``sortie`` après l'instant ``depuis``"""
+    modeles = [m for m in glob.glob(os.path.join(sortie, "*.tar.gz")) if os.path.getmtime(m) >= depuis]
+    return max(modeles, key=os.path.getmtime) if modeles else None
+
+def entrainer(plan: Plan, etat: Dict[str, Any], args) -> Optional[str]:
+    """Lancer ``rasa train`` selon le plan ; chemin du modèle produit"""
+    commande = [sys.executable, "-m", "rasa", "train", "--config", args.config, "--domain", args.domain,
+                "--data", args.data, "--out", args.out]
+    if plan.mode == FINETUNE:
+        commande += ["--finetune", etat['modele'], "--epoch-fraction", str(args.epoch_fraction)]
+    print(" ".join(commande[2:]), flush=True)
+
+    debut = time.time()
+    subprocess.run(commande, check=True)
+    return _dernier_modele(args.out, debut)
+
+def _duree(secondes: float) -> str:
+    """Durée lisible : 42.1s, 3min12s"""
+    if secondes < 60:
+        return f"{secondes:.1f}s"
+    return f"{int(secondes // 60)}min{int(secondes % 60):02d}s"
+
+def _lire_etat(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+def _ecrire_etat(path: Path, etat: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = path.with_suffix('.tmp')
+    temporaire.write_text(json.dumps(etat, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(temporaire, path)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Entraîner le modèle Rasa en ne refaisant que le nécessaire")
+    parser.add_argument("--config", default="config.yml")
+    parser.add_argument("--domain", default="domain.yml")
+    parser.add_argument("--data", default="data")
+    parser.add_argument("--out", default="models")
+    parser.add_argument("--etat", default=ETAT_PAR_DEFAUT, help="empreintes et durées des entraînements")
+    parser.add_argument("--epoch-fraction", type=float, default=0.2,
+                        help="fraction des epochs de config.yml pour un fine-tuning")
+    parser.add_argument("--max-finetune", type=int, default=5,
+                        help="fine-tunings successifs avant d'imposer un entraînement complet")
+    parser.add_argument("--catalogue", nargs='?', const='', metavar="URL",
+                        help="régénérer les lookup tables du catalogue (stockage par défaut sans URL)")
+    parser.add_argument("--complet", action="store_true", help="imposer un entraînement complet")
+    parser.add_argument("--plan", action="store_true", help="afficher la décision sans entraîner")
+    parser.add_argument("--sans-elagage", action="store_true",
+                        help="ne pas appliquer le budget du cache après l'entraînement")
+    args = parser.parse_args(argv)
+
+    if args.catalogue is not None:
+        from database import lookups
+        lookups.main(["--url", args.catalogue] if args.catalogue else [])
+
+    path_etat = Path(args.etat)
+    etat = _lire_etat(path_etat)
+    actuelles = empreintes(args.config, args.domain, args.data)
+    plan = planifier(actuelles, etat, args.max_finetune, args.complet)
+    print(f"Mode : {plan.mode} ({plan.raison})")
+    reference = etat.get('duree_complete')
+    if args.plan:
+        return 0
+    if plan.mode == AUCUN:
+        print(f"Modèle à jour : {etat['modele']}"
+              + (f" ({_duree(reference)} d'entraînement évitées)" if reference else ""))
+        return 0
+
+    debut = time.monotonic()
+    modele = entrainer(plan, etat, args)
+    duree = time.monotonic() - debut
+    if modele is None:
+        # Rasa n'écrit pas de modèle quand il juge le précédent à jour
+        print("Aucun nouveau modèle produit, l'état n'est pas modifié", file=sys.stderr)
+        return 1
+
+    if plan.mode == FINETUNE:
+        etat['finetunes'] = etat.get('finetunes', 0) + 1
+    else:
+        etat['finetunes'] = 0
+        etat['duree_complete'] = duree
+    etat.update(empreintes=actuelles, modele=modele)
+    etat['historique'] = (etat.get('historique') or [])[-(TAILLE_HISTORIQUE - 1):] + [{
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S"), 'mode': plan.mode, 'groupes': plan.groupes,
+        'duree': round(duree, 1), 'modele': modele,
+    }]
+    _ecrire_etat(path_etat, etat)
+
+    message = f"Modèle {modele} ({plan.mode}) en {_duree(duree)}"
+    if plan.mode == FINETUNE and reference:
+        message += (f" : {_duree(max(reference - duree, 0))} gagnées sur le dernier entraînement "
+                    f"complet ({_duree(reference)})")
+    print(message)
+
+    cache = CacheEntrainement()
+    if not args.sans_elagage and cache.base.exists():
+        bilan = cache.elaguer()
+        if bilan.entrees or bilan.repertoires:
+            print(f"Cache : {bilan.entrees} entrées et {bilan.repertoires} répertoires supprimés,"
+                  f" {bilan.octets / 1024 / 1024:.1f} Mio libérés")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())